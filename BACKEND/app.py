@@ -1,75 +1,592 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
-import pandas as pd
+import numpy as np
+import itertools
 import joblib
+import math
 import os
-from datetime import datetime
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+# Shared data loading lives with the ML scripts so both sides build the same frame
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from crowd_thresholds import load_for_model as thresholds_for_model
+from feature_encoder import CROWD_LEVELS, FeatureEncoder
+from tree_export import file_digest, load_for_model
+# Modules that pull in pandas (feature_engineering, utils.cube, utils.forecast,
+# utils.partitions) are imported by the loading functions below, so importing
+# this module stays cheap and the cost moves into init_app()
+from utils.compression import ResponseCompressor
+from utils.export import RECORD_FORMATS, iter_records
+from utils.json_provider import FastJSONProvider
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, Metrics
+from utils.prediction_cache import PredictionCache
+from utils.profiling import RequestProfiler, StackDumpWindow, read_report
+from utils.response_cache import ResponseCache
+from utils.state import Reloader, ServingState
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # Load model and feature columns
 MODEL_PATH = "../ML-ALGO/models/lightgbm_merged_model.pkl"
 FEATURES_PATH = "../ML-ALGO/models/feature_columns.pkl"
+TREES_PATH = "../ML-ALGO/models/lightgbm_merged_trees.npz"
+THRESHOLDS_PATH = "../ML-ALGO/models/crowd_thresholds.json"
 BIO_DATA_PATH = "../ML-ALGO/data/biometric data.csv"
 ENROL_DATA_PATH = "../ML-ALGO/data/enrolnment data.csv"
+SNAPSHOT_PATH = "../ML-ALGO/data/merged_snapshot.parquet"
+# Parquet parts of ingested delta rows, loaded on top of the snapshot or CSV merge
+DELTA_DIR = "../ML-ALGO/data/deltas"
+FORECAST_PATH = "../ML-ALGO/data/forecast_grid.npz"
+RESPONSE_CACHE_SIZE = 256
+PREDICTION_CACHE_SIZE = 4096
+PREDICT_BATCH_LIMIT = 10000
+REQUIRED_PREDICT_FIELDS = ['month', 'day', 'day_of_week', 'district']
+# Days from today covered by the forecast grid, and threads scoring it
+FORECAST_HORIZON_DAYS = int(os.environ.get("FORECAST_HORIZON_DAYS", "90"))
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+# Seconds between checks of the model/data files for changes; 0 disables watching
+RELOAD_WATCH_INTERVAL = float(os.environ.get("RELOAD_WATCH_INTERVAL", "0"))
+# Token expected in the X-Admin-Token header of admin endpoints; unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# "numpy" scores with the flattened tree export when it matches the model file, "lightgbm" always uses the booster
+MODEL_EVALUATOR = os.environ.get("MODEL_EVALUATOR", "numpy")
+# "global" labels crowd levels with the tercile thresholds saved at training time for
+# every query; "district" uses each district's own terciles, computed at load
+CROWD_LEVEL_SCOPE = os.environ.get("CROWD_LEVEL_SCOPE", "global")
+# Request counters and latency histograms served at /api/metrics; METRICS_ENABLED=0 turns them off
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+# Responses of at least COMPRESS_MIN_BYTES go out gzip/brotli-compressed to clients
+# that accept it; COMPRESSION_ENABLED=0 turns this off
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "1") != "0"
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+# PROFILING_ENABLED=1 lets admin requests ask for a profile (X-Profile header) and
+# enables the stack dump endpoint; reports and dumps are written to PROFILE_DIR
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# Ingested deltas are kept as separate segments until this many are waiting, then
+# folded into the loaded data in the background; 0 leaves them to the next reload
+COMPACT_SEGMENTS = int(os.environ.get("COMPACT_SEGMENTS", "4"))
+
+response_cache = ResponseCache(maxsize=RESPONSE_CACHE_SIZE)
+prediction_cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE)
+metrics = Metrics(enabled=METRICS_ENABLED)
+stack_dumps = StackDumpWindow(PROFILE_DIR)
+compressor = ResponseCompressor(min_size=COMPRESS_MIN_BYTES)
 
-model = None
-feature_columns = None
-merged_data = None
+# Requests read this once and use that object throughout, reloads replace it whole
+serving_state = ServingState()
+# The day a forecast roll-over failed; retried the next day rather than on every request
+forecast_roll_failed_on = None
 
-def load_model():
-    global model, feature_columns, merged_data
+def build_state(version, strict=True, data=None):
+    """
+    Load the model, data and derived indexes into a new ServingState, in
+    stages whose durations are kept in state.stage_timings: model, data,
+    indexes, forecast and a warmup prediction.
+    With strict=False a failure is printed and leaves that part of the state
+    empty (startup behaviour); with strict=True it is raised so a reload can
+    keep the current state instead. data, a frame in the compact merged
+    schema, is served instead of load_data() (benchmarks on generated data).
+    """
+    state = ServingState(version=version)
+    stage_start = time.perf_counter()
+    
+    def stage_done(name):
+        nonlocal stage_start
+        now = time.perf_counter()
+        state.stage_timings[name] = round(now - stage_start, 4)
+        stage_start = now
+    
     try:
-        model = joblib.load(MODEL_PATH)
-        feature_columns = joblib.load(FEATURES_PATH)
+        state.model_digest = file_digest(MODEL_PATH)
+        state.model = load_evaluator()
+        state.feature_columns = joblib.load(FEATURES_PATH)
+        state.encoder = FeatureEncoder(state.feature_columns)
+        thresholds = load_crowd_thresholds()
+        stage_done("model")
         print("✓ Model loaded successfully!")
-        print(f"✓ Features: {len(feature_columns)}")
+        print(f"✓ Features: {len(state.feature_columns)}")
         
         # Load and merge data for statistics
         try:
-            bio_df = pd.read_csv(BIO_DATA_PATH)
-            enrol_df = pd.read_csv(ENROL_DATA_PATH)
+            from feature_engineering import memory_usage
+            from utils.cube import AggregateCube
+            from utils.partitions import DateIndex, build_district_index
             
-            bio_df.columns = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_18_plus"]
-            enrol_df.columns = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_plus"]
+            if data is None:
+                data, state.data_fingerprint = load_data()
+            stage_done("data")
+            # Dates sorted inside each district, so a date window is a binary search
+            state.merged_data, state.district_index = build_district_index(data, sort_within="date")
+            state.date_index = DateIndex(state.merged_data, state.district_index)
+            state.aggregate_cube = AggregateCube(state.merged_data, state.district_index, thresholds,
+                                                 per_district=CROWD_LEVEL_SCOPE == "district")
+            stage_done("indexes")
             
-            # Data is already cleaned - no need for district mapping
-            
-            merged_data = pd.merge(bio_df, enrol_df, on=["date", "state", "district", "pincode"], how="outer")
-            merged_data = merged_data.fillna(0)
-            
-            merged_data["date"] = pd.to_datetime(merged_data["date"], format="mixed", dayfirst=True)
-            merged_data["total_enrolment"] = merged_data["age_0_5"] + merged_data["age_5_17"] + merged_data["age_18_plus"]
-            merged_data["total_biometric"] = merged_data["bio_age_5_17"] + merged_data["bio_age_18_plus"]
-            
-            unique_districts = len(merged_data['district'].unique())
-            print(f"✓ Data loaded: {len(merged_data)} records")
+            unique_districts = len(state.district_index)
+            print(f"✓ Data loaded: {len(state.merged_data)} records")
             print(f"✓ Unique districts: {unique_districts}")
+            print(f"✓ Data memory: {sum(memory_usage(state.merged_data).values()) / 1e6:.1f} MB")
+            print(f"✓ Aggregate cube: {len(state.aggregate_cube.cells)} cells")
         except Exception as e:
+            if strict:
+                raise
+            state.merged_data, state.district_index, state.date_index, state.aggregate_cube = None, {}, None, None
             print(f"⚠ Warning: Could not load data for statistics: {e}")
+        
+        if state.aggregate_cube is not None:
+            try:
+                state.forecast = load_forecast(state)
+                stage_done("forecast")
+            except Exception as e:
+                if strict:
+                    raise
+                state.forecast = None
+                print(f"⚠ Warning: Could not build forecast grid: {e}")
+        
+        warm_up(state)
+        stage_done("warmup")
+        print(f"✓ Warmup prediction done ({state.stage_timings['warmup'] * 1000:.1f} ms)")
             
     except Exception as e:
+        if strict:
+            raise
+        state.model, state.feature_columns, state.encoder = None, None, None
         print(f"✗ Error loading model: {e}")
+    
+    return state
+
+def load_evaluator():
+    """The NumPy tree export if it is usable, otherwise the pickled LightGBM model"""
+    if MODEL_EVALUATOR == "numpy" and os.path.exists(TREES_PATH):
+        try:
+            model = load_for_model(TREES_PATH, MODEL_PATH)
+            print(f"✓ Scoring with NumPy tree export ({model.n_trees} trees)")
+            return model
+        except Exception as e:
+            print(f"⚠ Tree export not used: {e}")
+    return joblib.load(MODEL_PATH)
+
+def load_crowd_thresholds():
+    """The crowd-level thresholds saved with the model, or None to use the terciles of the loaded data"""
+    if not os.path.exists(THRESHOLDS_PATH):
+        print("⚠ No crowd thresholds saved with the model - using terciles of the loaded data (re-run training)")
+        return None
+    try:
+        thresholds = thresholds_for_model(THRESHOLDS_PATH, MODEL_PATH)
+    except Exception as e:
+        print(f"⚠ Crowd thresholds not used: {e}")
+        return None
+    print(f"✓ Crowd thresholds from training: {thresholds.tolist()} ({CROWD_LEVEL_SCOPE} crowd levels)")
+    return thresholds
 
-load_model()
+def warm_up(state):
+    """
+    Score one input through the single-row and batch paths of a new state
+    before it serves, so the first real prediction does not pay for
+    first-call setup in the encoder and the evaluator.
+    """
+    today = date.today()
+    district = min(state.encoder.known_districts, default="Guntur")
+    row = {
+        'year': today.year, 'month': today.month, 'day': today.day,
+        'age_0_5': 1.0, 'age_5_17': 3.0, 'age_18_plus': 8.0, 'bio_age_5_17': 5.0, 'bio_age_18_plus': 12.0,
+        'total_enrolment': 12.0, 'total_biometric': 17.0,
+        'day_of_week': today.strftime('%A'), 'district': district
+    }
+    state.model.predict_proba(state.encoder.encode_one(row))
+    state.model.predict_proba(state.encoder.encode_many([row, row]))
+    state.warmed_up = True
+
+def load_forecast(state, rebuild=False):
+    """
+    Forecast grid for today onwards. Reuses the stored grid if it was built
+    from the same model, averages and horizon, otherwise scores it again.
+    """
+    from utils.cube import combine_views
+    from utils.forecast import ForecastGrid, build_forecast_grid, district_day_averages, forecast_key
+    
+    cells = combine_views(layer.aggregate_cube.select("All") for layer in state.cube_layers())
+    averages = district_day_averages(cells, state.districts())
+    start = date.today()
+    key = forecast_key(state.model_digest, averages, start, FORECAST_HORIZON_DAYS)
+    
+    grid = None if rebuild else ForecastGrid.load(FORECAST_PATH, key)
+    if grid is not None:
+        print(f"✓ Forecast grid loaded: {len(grid.districts)} districts x {grid.days} days")
+        return grid
+    
+    grid = build_forecast_grid(state.model, state.encoder, averages, start, FORECAST_HORIZON_DAYS,
+                               workers=FORECAST_WORKERS, key=key)
+    grid.save(FORECAST_PATH)
+    print(f"✓ Forecast grid built: {len(grid.districts)} districts x {grid.days} days")
+    return grid
+
+def roll_forecast(version):
+    """
+    The current state with only its forecast grid rebuilt to start today,
+    for the day the stored grid's first day has passed. The model, data and
+    indexes are shared, so worker memory shared since the fork stays shared.
+    """
+    global forecast_roll_failed_on
+    state = serving_state
+    if state.forecast is None or state.forecast.start >= date.today():
+        return None
+    try:
+        forecast = load_forecast(state)
+    except Exception:
+        forecast_roll_failed_on = date.today()
+        raise
+    return state.replace(version, forecast=forecast)
+
+def publish_state(state):
+    global serving_state
+    previous, serving_state = serving_state, state
+    # Cached responses were rendered from the previous model and data
+    response_cache.invalidate()
+    # Memoized predictions are keyed on the model file, so only a new model drops them
+    if state.model_digest != previous.model_digest:
+        prediction_cache.invalidate()
+    print(f"✓ Serving state version {state.version}")
+
+def load_data():
+    """
+    Load merged_data from the snapshot shared with the ML scripts, which is
+    rebuilt from the raw CSVs when they have changed, plus the ingested delta
+    parts. Returns (frame, fingerprint of the CSVs).
+    """
+    from feature_engineering import append_rows, load_merged_dataset, read_deltas
+    
+    df, info = load_merged_dataset(BIO_DATA_PATH, ENROL_DATA_PATH, SNAPSHOT_PATH)
+    fingerprint = info["fingerprint"]
+    if info["cached"]:
+        print("✓ Data loaded from snapshot")
+    else:
+        print("⚠ Snapshot missing or out of date - merged raw CSVs and saved a new snapshot")
+    
+    parts, skipped = read_deltas(DELTA_DIR, fingerprint)
+    if parts:
+        df = append_rows(df, parts)
+        print(f"✓ Ingested deltas applied: {len(parts)} parts, {sum(len(part) for part in parts)} rows")
+    if skipped:
+        print(f"⚠ {skipped} delta parts skipped - ingested on top of different source CSVs")
+    return df, fingerprint
+
+def ingest_delta(bio_file=None, enrol_file=None):
+    """
+    Incremental ingestion: clean and merge the delta extracts, keep the rows
+    whose (date, state, district, pincode) is new or that fill in counts a
+    loaded row lacks (see utils.ingest.check_rows), store them as a delta part
+    and publish a state with them added as a segment with its own indexes
+    (see utils.ingest.Segment). The work grows with the delta, not with the
+    history; folding segments into the loaded data and updating the forecast
+    is left to compact_segments(). Raises ValueError for an unusable delta or
+    when no data is loaded, IngestConflict for keys loaded with other counts.
+    """
+    from feature_engineering import write_delta
+    from utils.ingest import IngestConflict, add_segment, check_rows, read_delta
+    
+    start = time.perf_counter()
+    rows, report = read_delta(bio_file, enrol_file)
+    
+    def build(version):
+        state = serving_state
+        if state.merged_data is None:
+            report["error"] = "Data not loaded"
+            return None
+        try:
+            added, replaces, counts = check_rows(state, rows)
+        except IngestConflict as e:
+            # Refused, not a failed build: reported to the caller, not as the reloader's last error
+            report["error"] = e
+            return None
+        report.update(counts, added=len(added) - counts["merged"])
+        if added.empty:
+            report["error"] = "Nothing to ingest: every key is already present"
+            return None
+        
+        report["part"] = os.path.basename(write_delta(added, DELTA_DIR, state.data_fingerprint))
+        return add_segment(state, added, replaces, version)
+    
+    if not reloader.apply(build, writes_files=True):
+        if isinstance(report.get("error"), IngestConflict):
+            raise report["error"]
+        if "error" in report:
+            raise ValueError(report["error"])
+        raise RuntimeError(f"Ingestion failed: {reloader.last_error}")
+    report["version"] = reloader.version
+    report["segments"] = len(serving_state.segments)
+    report["seconds"] = round(time.perf_counter() - start, 4)
+    if COMPACT_SEGMENTS and report["segments"] >= COMPACT_SEGMENTS:
+        reloader.trigger(compact_segments, reads_files=False)
+    return report
+
+def compact_segments(version):
+    """
+    The current state with its ingested segments folded into the loaded data
+    and indexes, and the forecast rebuilt to cover their rows. This costs as
+    much as the history, so it runs in the background after ingest_delta()
+    and never on a request. None if there is nothing to fold.
+    """
+    from utils.ingest import compact
+    
+    state = serving_state
+    if not state.segments:
+        return None
+    compacted = compact(state, version)
+    compacted.forecast = load_forecast(compacted) if state.forecast is not None else None
+    return compacted
+
+reloader = Reloader(
+    build_state,
+    publish_state,
+    watch_paths=[MODEL_PATH, FEATURES_PATH, TREES_PATH, THRESHOLDS_PATH, BIO_DATA_PATH, ENROL_DATA_PATH, SNAPSHOT_PATH, DELTA_DIR]
+)
+
+_init_lock = threading.Lock()
+# Marks init_app()'s warmup request in the WSGI environ
+WARMUP_ENVIRON = "identiflow.warmup"
+WARMUP_PAYLOAD = {
+    "year": 2026, "month": 1, "day": 15, "day_of_week": "Thursday", "district": "Guntur",
+    "age_0_5": 1, "age_5_17": 3, "age_18_plus": 8, "bio_age_5_17": 5, "bio_age_18_plus": 12
+}
+
+def init_app(warmup=True):
+    """
+    Staged startup: build and publish the first serving state (model, data,
+    indexes, forecast, warmup prediction), then send one request through
+    Flask so its request handling is set up too. Nothing is loaded at import;
+    the __main__ block and wsgi.py call this, and the first request does if
+    nobody has. Calling it again does nothing.
+    """
+    with _init_lock:
+        if reloader.version > 0:
+            return
+        reloader.reload(strict=False)
+        if warmup:
+            # Flask's routing and request hooks, kept out of /api/metrics
+            app.test_client().get('/api/health', environ_base={WARMUP_ENVIRON: True})
+            warm_up_request_path()
+
+def warm_up_request_path():
+    """
+    JSON parsing, validation and serialization of /api/predict, called
+    directly so no request is counted and the model and caches are not touched
+    """
+    with app.test_request_context('/api/predict', method='POST', json=WARMUP_PAYLOAD):
+        row, _ = parse_prediction_input(request.json)
+        jsonify(format_prediction(row, np.full(3, 1 / 3), True)).get_data()
+
+@app.before_request
+def start_request_timer():
+    # Registered first, so a request that waits for init_app() is timed with the wait
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the response and time it under its route pattern (e.g. /api/pincode/<pincode>)"""
+    started = g.get("request_started")
+    # init_app()'s warmup request is not counted
+    if started is not None and WARMUP_ENVIRON not in request.environ:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+# Registered after the metrics hook so it runs first and its time is part of the request's
+@app.after_request
+def compress_response(response):
+    if COMPRESSION_ENABLED:
+        compressor.apply(response, request.accept_encodings)
+    return response
+
+@app.before_request
+def ensure_initialized():
+    if reloader.version > 0:
+        return
+    if request.endpoint in ('readiness', 'health_check'):
+        # Probes start the load but do not wait for it, so /api/ready can answer 503 meanwhile
+        if not _init_lock.locked():
+            threading.Thread(target=init_app, name="init-app", daemon=True).start()
+        return
+    init_app()
+
+@app.before_request
+def roll_forecast_over():
+    """
+    The forecast grid starts on the day it was built. Once the date has moved
+    on, rebuild it in the background; checked here rather than in the view so
+    a cached forecast response cannot skip it.
+    """
+    if request.endpoint != 'get_forecast':
+        return
+    grid = serving_state.forecast
+    if grid is not None and grid.start < date.today() and forecast_roll_failed_on != date.today():
+        reloader.trigger(roll_forecast, reads_files=False)
+
+def start_watcher():
+    """
+    Reload when the model/data files change. Started by each serving process
+    (the __main__ block below, or gunicorn's post_fork hook), since a thread
+    started before a fork does not carry over to the workers.
+    """
+    if RELOAD_WATCH_INTERVAL > 0:
+        reloader.watch(RELOAD_WATCH_INTERVAL)
+
+def is_admin(req):
+    return has_admin_token(req.headers)
+
+def has_admin_token(headers):
+    return ADMIN_TOKEN is not None and headers.get("X-Admin-Token") == ADMIN_TOKEN
+
+# Wraps the WSGI app only when enabled, so without it requests never reach the profiler
+if PROFILING_ENABLED:
+    app.wsgi_app = RequestProfiler(app.wsgi_app, has_admin_token, PROFILE_DIR)
+
+def date_window(args):
+    """
+    The optional ?start=&end= window (YYYY-MM-DD, both inclusive) as dates,
+    None where a bound is missing. Raises ValueError for a bad date or range.
+    """
+    try:
+        start = date.fromisoformat(args['start']) if args.get('start') else None
+        end = date.fromisoformat(args['end']) if args.get('end') else None
+    except ValueError:
+        raise ValueError("Invalid date, expected YYYY-MM-DD")
+    if start is not None and end is not None and start > end:
+        raise ValueError("start must not be after end")
+    return start, end
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """
+    Readiness probe: 200 once the model, data and indexes are built and the
+    warmup prediction has run, 503 before. /api/health only says the process is up.
+    """
+    state = serving_state
+    stages = {
+        "model": state.model is not None,
+        "data": state.merged_data is not None,
+        "indexes": state.aggregate_cube is not None,
+        "forecast": state.forecast is not None,
+        "warmup": state.warmed_up
+    }
+    # The forecast is reported but optional: /api/forecast answers 500 without it
+    ready = all(done for stage, done in stages.items() if stage != "forecast")
+    return jsonify({
+        "ready": ready,
+        "version": state.version,
+        "stages": stages,
+        "stage_seconds": state.stage_timings
+    }), 200 if ready else 503
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    state = serving_state
     return jsonify({
         "status": "healthy",
-        "model_loaded": model is not None,
-        "feature_columns_loaded": feature_columns is not None,
-        "feature_count": len(feature_columns) if feature_columns is not None else 0,
-        "data_loaded": merged_data is not None,
-        "data_records": len(merged_data) if merged_data is not None else 0
+        "model_loaded": state.model is not None,
+        "feature_columns_loaded": state.feature_columns is not None,
+        "feature_count": len(state.feature_columns) if state.feature_columns is not None else 0,
+        "data_loaded": state.merged_data is not None,
+        "data_records": state.record_count()
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request counts, errors and latency histograms per route, in the Prometheus text format"""
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled (METRICS_ENABLED=0)"}), 404
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the response and prediction caches, for sizing them"""
+    return jsonify({**response_cache.stats(), "predictions": prediction_cache.stats()})
+
+@app.route('/api/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """POST starts a background reload of model, data and indexes; GET reports its status"""
+    if not is_admin(request):
+        return jsonify({"success": False, "error": "Admin token required"}), 403
+    
+    if request.method == 'GET':
+        return jsonify({"success": True, **reloader.status()})
+    
+    started = reloader.trigger() is not None
+    return jsonify({"success": True, "started": started, **reloader.status()}), 202
+
+@app.route('/api/admin/ingest', methods=['POST'])
+def admin_ingest():
+    """
+    Ingest delta extracts sent as multipart files `bio` and/or `enrol` (raw
+    CSV layout). Only keys not already loaded are added; see ingest_delta().
+    """
+    if not is_admin(request):
+        return jsonify({"success": False, "error": "Admin token required"}), 403
+    
+    from utils.ingest import IngestConflict
+    
+    try:
+        report = ingest_delta(request.files.get('bio'), request.files.get('enrol'))
+    except IngestConflict as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    return jsonify({"success": True, **report})
+
+@app.route('/api/admin/profiles/<request_id>', methods=['GET'])
+def admin_profile(request_id):
+    """The stored profile of a request sent with X-Profile, by its X-Profile-Id"""
+    if not PROFILING_ENABLED:
+        return jsonify({"success": False, "error": "Profiling is disabled (PROFILING_ENABLED=1 enables it)"}), 404
+    if not is_admin(request):
+        return jsonify({"success": False, "error": "Admin token required"}), 403
+    
+    report = read_report(PROFILE_DIR, request_id)
+    if report is None:
+        return jsonify({"success": False, "error": f"No profile for request '{request_id}'"}), 404
+    return jsonify({"success": True, **report})
+
+@app.route('/api/admin/profile/stacks', methods=['GET', 'POST'])
+def admin_stack_dumps():
+    """
+    POST samples every thread for ?seconds= (default 60, at most 3600) every
+    ?interval= seconds (default 0.01) and writes a folded stack file for each
+    ?period= seconds (default 10) to PROFILE_DIR; GET reports the window.
+    """
+    if not PROFILING_ENABLED:
+        return jsonify({"success": False, "error": "Profiling is disabled (PROFILING_ENABLED=1 enables it)"}), 404
+    if not is_admin(request):
+        return jsonify({"success": False, "error": "Admin token required"}), 403
+    
+    if request.method == 'GET':
+        return jsonify({"success": True, **stack_dumps.status()})
+    
+    try:
+        seconds = float(request.args.get('seconds', 60))
+        interval = float(request.args.get('interval', 0.01))
+        period = float(request.args.get('period', 10))
+    except ValueError:
+        return jsonify({"success": False, "error": "seconds, interval and period must be numbers"}), 400
+    if not (0 < seconds <= 3600 and 0.001 <= interval <= period and period > 0):
+        return jsonify({"success": False, "error": "Need 0 < seconds <= 3600 and 0.001 <= interval <= period"}), 400
+    
+    started = stack_dumps.start(seconds, interval, period)
+    return jsonify({"success": True, "started": started, **stack_dumps.status()}), 202
+
 @app.route('/api/model-info', methods=['GET'])
 def model_info():
     """Get information about the loaded model"""
+    state = serving_state
     try:
-        if model is None:
+        if state.model is None:
             return jsonify({
                 "success": False,
                 "error": "Model not loaded"
@@ -77,9 +594,9 @@ def model_info():
         
         return jsonify({
             "success": True,
-            "model_type": str(type(model).__name__),
-            "features": feature_columns if feature_columns else [],
-            "feature_count": len(feature_columns) if feature_columns else 0,
+            "model_type": str(type(state.model).__name__),
+            "features": state.feature_columns if state.feature_columns else [],
+            "feature_count": len(state.feature_columns) if state.feature_columns else 0,
             "classes": ["Low", "Medium", "High"],
             "model_path": MODEL_PATH,
             "model_exists": os.path.exists(MODEL_PATH)
@@ -90,41 +607,35 @@ def model_info():
             "error": str(e)
         }), 500
 
-@app.route('/api/predict', methods=['POST'])
-def predict_crowd():
+def parse_prediction_input(data):
+    """
+    Validate one prediction input and convert its fields.
+    Returns (row, None) or (None, error_payload) for an invalid input.
+    """
+    # Validate required fields
+    missing_fields = [field for field in REQUIRED_PREDICT_FIELDS if field not in data]
+    
+    if missing_fields:
+        return None, {
+            "success": False,
+            "error": f"Missing required fields: {', '.join(missing_fields)}",
+            "required_fields": REQUIRED_PREDICT_FIELDS
+        }
+    
     try:
-        data = request.json
-        
-        # Check if model is loaded
-        if model is None or feature_columns is None:
-            return jsonify({
-                "success": False,
-                "error": "Model not loaded. Please check model files."
-            }), 500
-        
-        # Validate required fields
-        required_fields = ['month', 'day', 'day_of_week', 'district']
-        missing_fields = [field for field in required_fields if field not in data]
-        
-        if missing_fields:
-            return jsonify({
-                "success": False,
-                "error": f"Missing required fields: {', '.join(missing_fields)}",
-                "required_fields": required_fields
-            }), 400
-        
         # Calculate totals
         age_0_5 = float(data.get('age_0_5', 0))
         age_5_17 = float(data.get('age_5_17', 0))
         age_18_plus = float(data.get('age_18_plus', 0))
         bio_age_5_17 = float(data.get('bio_age_5_17', 0))
         bio_age_18_plus = float(data.get('bio_age_18_plus', 0))
+        if not all(math.isfinite(count) for count in (age_0_5, age_5_17, age_18_plus, bio_age_5_17, bio_age_18_plus)):
+            raise ValueError("age and biometric counts must be finite numbers")
         
         total_enrolment = age_0_5 + age_5_17 + age_18_plus
         total_biometric = bio_age_5_17 + bio_age_18_plus
         
-        # Create input dataframe
-        input_data = pd.DataFrame([{
+        row = {
             'year': int(data.get('year', 2026)),
             'month': int(data['month']),
             'day': int(data['day']),
@@ -136,327 +647,577 @@ def predict_crowd():
             'total_enrolment': total_enrolment,
             'total_biometric': total_biometric,
             'day_of_week': str(data['day_of_week']),
-            'district': str(data['district'])
-        }])
-        
-        # Encode categorical features
-        input_encoded = pd.get_dummies(
-            input_data,
-            columns=["day_of_week", "district"],
-            drop_first=True
-        )
-        
-        # Align with training features
-        for col in feature_columns:
-            if col not in input_encoded.columns:
-                input_encoded[col] = 0
+            'district': str(data['district']),
+            'input_summary': {
+                "total_enrolment": int(total_enrolment),
+                "total_biometric": int(total_biometric),
+                "district": data['district'],
+                "date": f"{data['month']}/{data['day']}"
+            }
+        }
+    except KeyError as e:
+        return None, {
+            "success": False,
+            "error": f"Missing or invalid field: {str(e)}"
+        }
+    except (TypeError, ValueError, OverflowError) as e:
+        # TypeError for null/list/object values, OverflowError for an infinite month, day or year
+        return None, {
+            "success": False,
+            "error": f"Invalid data type: {str(e)}"
+        }
+    
+    return row, None
+
+def format_prediction(row, probabilities, in_training):
+    """Response body for one scored input"""
+    return {
+        "success": True,
+        "prediction": CROWD_LEVELS[int(np.argmax(probabilities))],
+        "probabilities": {
+            "Low": float(probabilities[0]),
+            "Medium": float(probabilities[1]),
+            "High": float(probabilities[2])
+        },
+        "confidence": float(max(probabilities)),
+        "input_summary": row['input_summary'],
+        "district_in_training": in_training,
+        "warning": None if in_training else "District not in training data - using general patterns"
+    }
+
+@app.route('/api/predict', methods=['POST'])
+def predict_crowd():
+    state = serving_state
+    timer = metrics.stage_timer(request.path)
+    try:
+        data = request.json
         
-        input_encoded = input_encoded[feature_columns]
+        # Check if model is loaded
+        if state.model is None or state.feature_columns is None:
+            return jsonify({
+                "success": False,
+                "error": "Model not loaded. Please check model files."
+            }), 500
         
-        # Predict
-        prediction = model.predict(input_encoded)[0]
-        probabilities = model.predict_proba(input_encoded)[0]
+        row, error = parse_prediction_input(data)
+        timer.lap("validate")
+        if error:
+            return jsonify(error), 400
         
-        crowd_levels = ["Low", "Medium", "High"]
-        crowd_level = crowd_levels[prediction]
+        # Encode and predict (the predicted level is the argmax of the probabilities)
+        features = state.encoder.encode_one(row)
+        timer.lap("encode")
+        probabilities = prediction_cache.predict_proba(state, features)[0]
+        timer.lap("infer")
         
         # Check if district was in training data
-        district_in_training = any(col.startswith(f"district_{data['district']}") for col in feature_columns)
+        in_training = state.encoder.district_in_training(row['district'])
         
+        response = jsonify(format_prediction(row, probabilities, in_training))
+        response.headers["X-Model-Version"] = str(state.version)
+        timer.lap("serialize")
+        return response
+    
+    except Exception as e:
         return jsonify({
+            "success": False,
+            "error": f"Prediction error: {str(e)}"
+        }), 500
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_crowd_batch():
+    """
+    Score many inputs with one model call. Accepts {"inputs": [...]} or a bare
+    list of objects shaped like the /api/predict body. Each result has the
+    same shape as a /api/predict response; invalid inputs get their own
+    error entry without failing the batch.
+    """
+    state = serving_state
+    timer = metrics.stage_timer(request.path)
+    try:
+        data = request.json
+        inputs = data.get('inputs') if isinstance(data, dict) else data
+        
+        if state.model is None or state.feature_columns is None:
+            return jsonify({
+                "success": False,
+                "error": "Model not loaded. Please check model files."
+            }), 500
+        
+        if not isinstance(inputs, list):
+            return jsonify({
+                "success": False,
+                "error": "Expected a list of inputs or {\"inputs\": [...]}"
+            }), 400
+        
+        if len(inputs) > PREDICT_BATCH_LIMIT:
+            return jsonify({
+                "success": False,
+                "error": f"Batch too large: {len(inputs)} inputs (limit {PREDICT_BATCH_LIMIT})"
+            }), 400
+        
+        results = [None] * len(inputs)
+        rows, row_positions = [], []
+        for i, item in enumerate(inputs):
+            if not isinstance(item, dict):
+                results[i] = {"success": False, "error": "Each input must be an object"}
+                continue
+            row, error = parse_prediction_input(item)
+            if error:
+                results[i] = error
+            else:
+                rows.append(row)
+                row_positions.append(i)
+        timer.lap("validate")
+        
+        if rows:
+            features = state.encoder.encode_many(rows)
+            timer.lap("encode")
+            probabilities = prediction_cache.predict_proba(state, features)
+            timer.lap("infer")
+            
+            for i, row, row_probabilities in zip(row_positions, rows, probabilities):
+                in_training = state.encoder.district_in_training(row['district'])
+                results[i] = format_prediction(row, row_probabilities, in_training)
+        
+        response = jsonify({
             "success": True,
-            "prediction": crowd_level,
-            "probabilities": {
-                "Low": float(probabilities[0]),
-                "Medium": float(probabilities[1]),
-                "High": float(probabilities[2])
-            },
-            "confidence": float(max(probabilities)),
-            "input_summary": {
-                "total_enrolment": int(total_enrolment),
-                "total_biometric": int(total_biometric),
-                "district": data['district'],
-                "date": f"{data['month']}/{data['day']}"
-            },
-            "district_in_training": district_in_training,
-            "warning": None if district_in_training else "District not in training data - using general patterns"
+            "count": len(results),
+            "errors": len(results) - len(rows),
+            "results": results
         })
+        response.headers["X-Model-Version"] = str(state.version)
+        timer.lap("serialize")
+        return response
     
-    except KeyError as e:
-        return jsonify({
-            "success": False,
-            "error": f"Missing or invalid field: {str(e)}"
-        }), 400
-    except ValueError as e:
-        return jsonify({
-            "success": False,
-            "error": f"Invalid data type: {str(e)}"
-        }), 400
     except Exception as e:
         return jsonify({
             "success": False,
             "error": f"Prediction error: {str(e)}"
         }), 500
 
+def uncached(response):
+    """A 200 fallback (no data loaded, an error) that the response cache must not keep"""
+    response.cache_control.no_store = True
+    return response
+
+def select_scope(state, args):
+    """
+    The cube view for ?district= and the optional ?start=&end= window, as
+    (view, None), or (None, error response) for a bad window, an unknown
+    district or a window without records.
+    """
+    from utils.cube import combine_views
+    
+    district_filter = args.get('district', None)
+    
+    try:
+        start, end = date_window(args)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+    
+    # Apply district filter and date window if provided, to the loaded data and each ingested segment
+    views = []
+    for layer in state.cube_layers():
+        rows = layer.date_index.rows(district_filter, start, end) if start or end else None
+        views.append(layer.aggregate_cube.select(district_filter, rows))
+    cube = combine_views(views)
+    if cube is None:
+        return None, (jsonify({"error": f"No data found for district: {district_filter}"}), 404)
+    if cube.total_records == 0:
+        return None, (jsonify({"error": f"No data found between {start or 'the first record'} and {end or 'the last record'}"}), 404)
+    return cube, None
+
+def statistics_payload(cube, district_filter):
+    # Crowd levels are pre-aggregated per district (and for 'All') in the cube
+    crowd_dist = cube.crowd_distribution()
+    first, last = cube.date_range()
+    
+    return {
+        "total_records": cube.total_records,
+        "crowd_distribution": crowd_dist,
+        "avg_biometric": cube.mean('total_biometric'),
+        "avg_enrolment": cube.mean('total_enrolment'),
+        "districts": cube.districts(),
+        "date_range": {
+            "start": str(first.date()),
+            "end": str(last.date())
+        },
+        "total_biometric": cube.total('total_biometric'),
+        "total_enrolment": cube.total('total_enrolment'),
+        "district": district_filter or "All"
+    }
+
+def trends_payload(cube, district_filter):
+    # Monthly trends - use SUM instead of MEAN for better visualization
+    monthly_data = cube.monthly_totals()  # sorted by year and month
+    
+    # Format for frontend, from whole columns rather than row by row
+    monthly_formatted = [
+        {
+            'month': month,
+            'year': year,
+            'year_month': f"{year:04d}-{month:02d}",
+            'total_biometric': biometric,
+            'total_enrolment': enrolment
+        }
+        for year, month, biometric, enrolment in zip(
+            monthly_data.index.get_level_values('year').tolist(),
+            monthly_data.index.get_level_values('month').tolist(),
+            monthly_data['total_biometric'].astype(float).tolist(),
+            monthly_data['total_enrolment'].astype(float).tolist()
+        )
+    ]
+    by_day = cube.day_totals('total_biometric')  # Changed to sum
+    
+    return {
+        "monthly": monthly_formatted,
+        "by_day": dict(zip(by_day.index.tolist(), by_day.astype(float).tolist())),
+        "district": district_filter or "All",
+        "total_records": cube.total_records
+    }
+
+def analytics_payload(cube, district_filter):
+    # Monthly trends with crowd levels
+    monthly_crowd = cube.monthly_crowd()
+    
+    # District-wise statistics, first 10 districts
+    district_totals = cube.district_totals(['total_enrolment', 'total_biometric']).iloc[:10].astype(float)
+    district_stats = [
+        {'district': district, 'total_enrolment': enrolment, 'total_biometric': biometric}
+        for district, enrolment, biometric in zip(
+            district_totals.index.tolist(),
+            district_totals['total_enrolment'].tolist(),
+            district_totals['total_biometric'].tolist()
+        )
+    ]
+    
+    # Day of week analysis
+    day_means = cube.day_means(['total_enrolment', 'total_biometric'])
+    day_analysis = {
+        day: {'total_enrolment': enrolment, 'total_biometric': biometric}
+        for day, enrolment, biometric in zip(
+            day_means.index.tolist(), day_means['total_enrolment'].tolist(), day_means['total_biometric'].tolist()
+        )
+    }
+    
+    return {
+        "district_stats": district_stats,
+        "day_analysis": day_analysis,
+        "monthly_crowd": monthly_crowd,
+        "total_enrolment": cube.total('total_enrolment'),
+        "total_biometric": cube.total('total_biometric'),
+        "peak_month": cube.peak_month(),
+        "peak_day": cube.peak_day(),
+        "district": district_filter or "All"
+    }
+
 @app.route('/api/statistics', methods=['GET'])
+@response_cache.cached
 def get_statistics():
+    state = serving_state
     try:
         # Check if data is loaded
-        if merged_data is None:
-            return jsonify({
+        if state.merged_data is None:
+            return uncached(jsonify({
                 "error": "Data not loaded",
                 "total_records": 0,
                 "crowd_distribution": {},
                 "avg_biometric": 0,
                 "avg_enrolment": 0,
                 "districts": []
-            }), 200
+            }))
         
-        # Get optional district filter from query params
         district_filter = request.args.get('district', None)
+        cube, error = select_scope(state, request.args)
+        if error:
+            return error
         
-        df = merged_data.copy()
-        
-        # Apply district filter if provided
-        if district_filter and district_filter != 'All':
-            df = df[df['district'] == district_filter]
-            if len(df) == 0:
-                return jsonify({"error": f"No data found for district: {district_filter}"}), 404
-        
-        # Calculate crowd levels for statistics
-        df["crowd_level"] = pd.qcut(
-            df["total_biometric"],
-            q=3,
-            labels=["Low", "Medium", "High"],
-            duplicates="drop"
-        )
-        
-        # Calculate statistics
-        crowd_dist = df['crowd_level'].value_counts().to_dict()
-        
-        stats = {
-            "total_records": int(len(df)),
-            "crowd_distribution": {str(k): int(v) for k, v in crowd_dist.items()},
-            "avg_biometric": float(df['total_biometric'].mean()),
-            "avg_enrolment": float(df['total_enrolment'].mean()),
-            "districts": sorted(df['district'].unique().tolist()),
-            "date_range": {
-                "start": str(df['date'].min().date()),
-                "end": str(df['date'].max().date())
-            },
-            "total_biometric": int(df['total_biometric'].sum()),
-            "total_enrolment": int(df['total_enrolment'].sum()),
-            "district": district_filter or "All"
-        }
-        
-        return jsonify(stats)
+        return jsonify(statistics_payload(cube, district_filter))
     
     except Exception as e:
         print(f"Error in statistics: {e}")
-        return jsonify({
+        return uncached(jsonify({
             "error": str(e),
             "total_records": 0,
             "crowd_distribution": {},
             "avg_biometric": 0,
             "avg_enrolment": 0,
             "districts": []
-        }), 200
+        }))
 
 @app.route('/api/trends', methods=['GET'])
+@response_cache.cached
 def get_trends():
+    state = serving_state
     try:
-        if merged_data is None:
+        if state.merged_data is None:
             return jsonify({"error": "Data not loaded"}), 500
         
-        # Get optional district filter from query params
         district_filter = request.args.get('district', None)
+        cube, error = select_scope(state, request.args)
+        if error:
+            return error
         
-        df = merged_data.copy()
-        
-        # Apply district filter if provided
-        if district_filter and district_filter != 'All':
-            df = df[df['district'] == district_filter]
-            if len(df) == 0:
-                return jsonify({"error": f"No data found for district: {district_filter}"}), 404
-        
-        df["year"] = df["date"].dt.year
-        df["month"] = df["date"].dt.month
-        df["year_month"] = df["date"].dt.to_period('M').astype(str)
-        df["day_of_week"] = df["date"].dt.day_name()
-        
-        # Monthly trends - use SUM instead of MEAN for better visualization
-        monthly_data = df.groupby(['year', 'month', 'year_month']).agg({
-            'total_biometric': 'sum',  # Changed from 'mean' to 'sum'
-            'total_enrolment': 'sum'   # Changed from 'mean' to 'sum'
-        }).reset_index()
-        
-        # Sort by year and month
-        monthly_data = monthly_data.sort_values(['year', 'month'])
-        
-        # Format for frontend
-        monthly_formatted = []
-        for _, row in monthly_data.iterrows():
-            monthly_formatted.append({
-                'month': int(row['month']),
-                'year': int(row['year']),
-                'year_month': row['year_month'],
-                'total_biometric': float(row['total_biometric']),
-                'total_enrolment': float(row['total_enrolment'])
-            })
-        
-        trends = {
-            "monthly": monthly_formatted,
-            "by_day": df.groupby('day_of_week')['total_biometric'].sum().to_dict(),  # Changed to sum
-            "district": district_filter or "All",
-            "total_records": len(df)
-        }
-        
-        return jsonify(trends)
+        return jsonify(trends_payload(cube, district_filter))
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/districts', methods=['GET'])
+@response_cache.cached
 def get_districts():
+    state = serving_state
     try:
-        if merged_data is None:
-            return jsonify({"districts": []}), 200
+        if state.merged_data is None:
+            return uncached(jsonify({"districts": []}))
             
-        districts = sorted(merged_data['district'].unique().tolist())
-        return jsonify({"districts": districts})
+        return jsonify({"districts": state.districts()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/district-averages/<district>', methods=['GET'])
+@response_cache.cached
 def get_district_averages(district):
     """Get historical averages for a specific district by day of week"""
+    from utils.cube import combine_views
+    from utils.forecast import day_of_week_averages
+    
+    state = serving_state
     try:
-        if merged_data is None:
+        if state.merged_data is None:
             return jsonify({"error": "Data not loaded"}), 500
         
-        df = merged_data.copy()
-        
         # Filter by district
-        if district and district != 'All':
-            df = df[df['district'] == district]
-            if len(df) == 0:
-                # Return default averages if no data for district
-                return jsonify({
-                    "district": district,
-                    "averages": {
-                        "Monday": {"age_0_5": 1, "age_5_17": 3, "age_18_plus": 8, "bio_age_5_17": 5, "bio_age_18_plus": 12},
-                        "Tuesday": {"age_0_5": 2, "age_5_17": 4, "age_18_plus": 10, "bio_age_5_17": 6, "bio_age_18_plus": 14},
-                        "Wednesday": {"age_0_5": 1, "age_5_17": 2, "age_18_plus": 6, "bio_age_5_17": 4, "bio_age_18_plus": 9},
-                        "Thursday": {"age_0_5": 2, "age_5_17": 5, "age_18_plus": 12, "bio_age_5_17": 8, "bio_age_18_plus": 16},
-                        "Friday": {"age_0_5": 2, "age_5_17": 4, "age_18_plus": 11, "bio_age_5_17": 7, "bio_age_18_plus": 15},
-                        "Saturday": {"age_0_5": 2, "age_5_17": 5, "age_18_plus": 13, "bio_age_5_17": 9, "bio_age_18_plus": 17},
-                        "Sunday": {"age_0_5": 0, "age_5_17": 1, "age_18_plus": 3, "bio_age_5_17": 2, "bio_age_18_plus": 5}
-                    },
-                    "data_available": False
-                })
-        
-        df["day_of_week"] = df["date"].dt.day_name()
-        
-        # Calculate averages by day of week
-        day_averages = df.groupby('day_of_week').agg({
-            'age_0_5': 'mean',
-            'age_5_17': 'mean',
-            'age_18_plus': 'mean',
-            'bio_age_5_17': 'mean',
-            'bio_age_18_plus': 'mean'
-        }).round(0).astype(int)
-        
-        # Convert to dict with proper structure
-        averages_dict = {}
-        for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']:
-            if day in day_averages.index:
-                averages_dict[day] = {
-                    'age_0_5': int(day_averages.loc[day, 'age_0_5']),
-                    'age_5_17': int(day_averages.loc[day, 'age_5_17']),
-                    'age_18_plus': int(day_averages.loc[day, 'age_18_plus']),
-                    'bio_age_5_17': int(day_averages.loc[day, 'bio_age_5_17']),
-                    'bio_age_18_plus': int(day_averages.loc[day, 'bio_age_18_plus'])
-                }
-            else:
-                # Default values if no data for this day
-                averages_dict[day] = {
-                    'age_0_5': 1,
-                    'age_5_17': 3,
-                    'age_18_plus': 8,
-                    'bio_age_5_17': 5,
-                    'bio_age_18_plus': 12
-                }
+        cube = combine_views(layer.aggregate_cube.select(district) for layer in state.cube_layers())
+        if cube is None:
+            # Return default averages if no data for district
+            return jsonify({
+                "district": district,
+                "averages": {
+                    "Monday": {"age_0_5": 1, "age_5_17": 3, "age_18_plus": 8, "bio_age_5_17": 5, "bio_age_18_plus": 12},
+                    "Tuesday": {"age_0_5": 2, "age_5_17": 4, "age_18_plus": 10, "bio_age_5_17": 6, "bio_age_18_plus": 14},
+                    "Wednesday": {"age_0_5": 1, "age_5_17": 2, "age_18_plus": 6, "bio_age_5_17": 4, "bio_age_18_plus": 9},
+                    "Thursday": {"age_0_5": 2, "age_5_17": 5, "age_18_plus": 12, "bio_age_5_17": 8, "bio_age_18_plus": 16},
+                    "Friday": {"age_0_5": 2, "age_5_17": 4, "age_18_plus": 11, "bio_age_5_17": 7, "bio_age_18_plus": 15},
+                    "Saturday": {"age_0_5": 2, "age_5_17": 5, "age_18_plus": 13, "bio_age_5_17": 9, "bio_age_18_plus": 17},
+                    "Sunday": {"age_0_5": 0, "age_5_17": 1, "age_18_plus": 3, "bio_age_5_17": 2, "bio_age_18_plus": 5}
+                },
+                "data_available": False
+            })
         
+        # Calculate averages by day of week (defaults for days without data)
         return jsonify({
             "district": district,
-            "averages": averages_dict,
+            "averages": day_of_week_averages(cube),
             "data_available": True,
-            "records_analyzed": len(df)
+            "records_analyzed": cube.total_records
         })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/analytics', methods=['GET'])
-def get_analytics():
+@app.route('/api/pincode/<pincode>', methods=['GET'])
+@response_cache.cached
+def get_pincode(pincode):
+    """
+    Monthly trends, day-of-week averages and crowd-level distribution for one
+    pincode, or rolled up over every pincode starting with a shorter prefix
+    (e.g. /api/pincode/515 for all 515xxx). Crowd levels are those of the
+    pincode's district.
+    """
+    from utils.cube import PINCODE_DIGITS, combine_views
+    from utils.forecast import AVERAGE_COLUMNS
+    
+    state = serving_state
     try:
-        if merged_data is None:
+        if state.merged_data is None:
             return jsonify({"error": "Data not loaded"}), 500
         
-        # Get optional district filter from query params
-        district_filter = request.args.get('district', None)
+        if not pincode.isdigit() or not 1 <= len(pincode) <= PINCODE_DIGITS:
+            return jsonify({"error": f"Invalid pincode or prefix: {pincode} (1 to {PINCODE_DIGITS} digits)"}), 400
+        
+        cube = combine_views(layer.aggregate_cube.select_pincodes(pincode) for layer in state.cube_layers())
+        if cube is None:
+            return jsonify({"error": f"No data found for pincode: {pincode}"}), 404
         
-        df = merged_data.copy()
+        monthly = cube.monthly_totals().reset_index()
+        first, last = cube.date_range()
+        
+        return jsonify({
+            "pincode": pincode,
+            "level": "pincode" if len(pincode) == PINCODE_DIGITS else "prefix",
+            "pincodes": sorted(set().union(*(layer.aggregate_cube.pincodes_under(pincode)
+                                             for layer in state.layers()))),
+            "districts": cube.districts(),
+            "total_records": cube.total_records,
+            "date_range": {
+                "start": str(first.date()),
+                "end": str(last.date())
+            },
+            "crowd_distribution": cube.crowd_distribution(),
+            "monthly": [
+                {
+                    "year_month": f"{int(row['year']):04d}-{int(row['month']):02d}",
+                    "total_biometric": float(row['total_biometric']),
+                    "total_enrolment": float(row['total_enrolment'])
+                }
+                for _, row in monthly.iterrows()
+            ],
+            "day_averages": cube.day_means(AVERAGE_COLUMNS).round(2).to_dict('index'),
+            "total_biometric": cube.total('total_biometric'),
+            "total_enrolment": cube.total('total_enrolment')
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/forecast', methods=['GET'])
+@response_cache.cached
+def get_forecast():
+    """
+    Precomputed crowd forecast. With ?district= returns that district day by
+    day, otherwise the number of days per crowd level for every district.
+    Optional start/end (YYYY-MM-DD, inclusive) must fall inside the grid.
+    """
+    state = serving_state
+    try:
+        grid = state.forecast
+        if grid is None:
+            return jsonify({"success": False, "error": "Forecast not available"}), 500
         
-        # Apply district filter if provided
-        if district_filter and district_filter != 'All':
-            df = df[df['district'] == district_filter]
-            if len(df) == 0:
-                return jsonify({"error": f"No data found for district: {district_filter}"}), 404
+        try:
+            start = date.fromisoformat(request.args['start']) if 'start' in request.args else grid.start
+            end = date.fromisoformat(request.args['end']) if 'end' in request.args else grid.end
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid date, expected YYYY-MM-DD"}), 400
         
-        df["month"] = df["date"].dt.month
-        df["day_of_week"] = df["date"].dt.day_name()
+        if not grid.covers(start, end):
+            return jsonify({
+                "success": False,
+                "error": "Requested dates are outside the forecast",
+                "coverage": {"start": grid.start.isoformat(), "end": grid.end.isoformat()}
+            }), 400
         
-        # Calculate crowd levels
-        df["crowd_level"] = pd.qcut(
-            df["total_biometric"],
-            q=3,
-            labels=["Low", "Medium", "High"],
-            duplicates="drop"
-        )
+        district = request.args.get('district')
+        if district is None:
+            return jsonify({
+                "success": True,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "districts": grid.level_counts(start, end)
+            })
         
-        # District-wise statistics
-        district_stats = df.groupby('district').agg({
-            'total_enrolment': 'sum',
-            'total_biometric': 'sum'
-        }).reset_index()
-        
-        # Day of week analysis
-        day_analysis = df.groupby('day_of_week').agg({
-            'total_enrolment': 'mean',
-            'total_biometric': 'mean'
-        }).to_dict('index')
-        
-        # Monthly trends with crowd levels
-        monthly_crowd = df.groupby(['month', 'crowd_level']).size().reset_index(name='count')
-        
-        analytics = {
-            "district_stats": district_stats.to_dict('records')[:10],  # Top 10
-            "day_analysis": day_analysis,
-            "monthly_crowd": monthly_crowd.to_dict('records'),
-            "total_enrolment": int(df['total_enrolment'].sum()),
-            "total_biometric": int(df['total_biometric'].sum()),
-            "peak_month": int(df.groupby('month')['total_enrolment'].sum().idxmax()),
-            "peak_day": df['day_of_week'].value_counts().idxmax(),
-            "district": district_filter or "All"
-        }
+        if district not in grid.rows:
+            return jsonify({"success": False, "error": f"No forecast for district: {district}"}), 404
         
-        return jsonify(analytics)
+        return jsonify({
+            "success": True,
+            "district": district,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "forecast": grid.lookup(district, start, end)
+        })
+    
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/records', methods=['GET'])
+def export_records():
+    """
+    Stream row-level records as NDJSON (default) or CSV, optionally filtered
+    by district and an inclusive start/end date (YYYY-MM-DD). Rows are
+    formatted and sent a chunk at a time, never as one response body.
+    """
+    state = serving_state
+    if state.merged_data is None:
+        return jsonify({"error": "Data not loaded"}), 500
+    
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in RECORD_FORMATS:
+        return jsonify({"error": f"Unknown format: {fmt} (use {' or '.join(RECORD_FORMATS)})"}), 400
+    
+    try:
+        start, end = date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    district = request.args.get('district')
+    replaced = state.replaced()
+    parts = []
+    for number, layer in enumerate(state.layers()):
+        if start or end:
+            rows = layer.date_index.rows(district, start, end)
+        elif district is None or district == 'All':
+            rows = slice(0, len(layer.merged_data))
+        else:
+            rows = layer.district_index.get(district)
+        if rows is not None and number in replaced:
+            # Rows a later segment replaced with their merged version
+            rows = np.arange(len(layer.merged_data))[rows] if isinstance(rows, slice) else rows
+            rows = rows[~np.isin(rows, replaced[number])]
+        if rows is not None:
+            parts.append((layer.merged_data, rows))
+    if not parts:
+        # A district without data streams no rows
+        parts.append((state.merged_data, slice(0, 0)))
+    
+    # The loaded data first, then the rows of each ingested segment
+    records = itertools.chain.from_iterable(iter_records(df, rows, fmt, header=i == 0)
+                                            for i, (df, rows) in enumerate(parts))
+    response = Response(stream_with_context(records), mimetype=RECORD_FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=records.{fmt}"
+    response.headers["X-Data-Version"] = str(state.version)
+    return response
+
+@app.route('/api/analytics', methods=['GET'])
+@response_cache.cached
+def get_analytics():
+    state = serving_state
+    try:
+        if state.merged_data is None:
+            return jsonify({"error": "Data not loaded"}), 500
+        
+        district_filter = request.args.get('district', None)
+        cube, error = select_scope(state, request.args)
+        if error:
+            return error
+        
+        return jsonify(analytics_payload(cube, district_filter))
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/dashboard', methods=['GET'])
+@response_cache.cached
+def get_dashboard():
+    """
+    The /api/statistics, /api/analytics and /api/trends payloads for the same
+    ?district= and optional ?start=&end= window, from one cube selection and
+    in one response: what the dashboard loads on every district change.
+    """
+    state = serving_state
+    try:
+        if state.merged_data is None:
+            return jsonify({"error": "Data not loaded"}), 500
+        
+        district_filter = request.args.get('district', None)
+        cube, error = select_scope(state, request.args)
+        if error:
+            return error
+        
+        return jsonify({
+            "statistics": statistics_payload(cube, district_filter),
+            "analytics": analytics_payload(cube, district_filter),
+            "trends": trends_payload(cube, district_filter)
+        })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    init_app()
+    state = serving_state
     print("="*60)
     print("AADHAAR ANALYTICS BACKEND SERVER")
     print("="*60)
@@ -464,16 +1225,16 @@ if __name__ == '__main__':
     print(f"Model Exists: {os.path.exists(MODEL_PATH)}")
     print(f"Features Path: {FEATURES_PATH}")
     print(f"Features Exist: {os.path.exists(FEATURES_PATH)}")
-    print(f"Model Loaded: {model is not None}")
-    print(f"Feature Columns Loaded: {feature_columns is not None}")
-    print(f"Data Loaded: {merged_data is not None}")
+    print(f"Model Loaded: {state.model is not None}")
+    print(f"Feature Columns Loaded: {state.feature_columns is not None}")
+    print(f"Data Loaded: {state.merged_data is not None}")
     
-    if model is None:
+    if state.model is None:
         print("\n⚠️  WARNING: Model not loaded!")
         print("Please train the model first:")
         print("  cd ML-ALGO && python train_lightgbm_merged.py")
     
-    if merged_data is None:
+    if state.merged_data is None:
         print("\n⚠️  WARNING: Data not loaded!")
         print("Check data files:")
         print(f"  {BIO_DATA_PATH}")
@@ -483,4 +1244,5 @@ if __name__ == '__main__':
     print("Starting server on http://localhost:5000")
     print("="*60 + "\n")
     
+    start_watcher()
     app.run(debug=True, port=5000, host='0.0.0.0')
@@ -0,0 +1,92 @@
+"""
+Crowd levels: the uncached latency of /api/statistics and the cube build
+time with per-district terciles computed at load versus the training
+thresholds applied with searchsorted, next to the per-request pd.qcut over
+the filtered rows the endpoint used to run. Also counts the rows whose
+district-query label differs between the two definitions. Run from the
+BACKEND directory:
+
+    python benchmark_crowd_levels.py [repeats]
+"""
+import copy
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+import app as backend
+from utils.cube import CROWD_LEVELS, AggregateCube
+
+
+def median_ms(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def qcut_statistics(df, district):
+    """What /api/statistics computed per request before the cube: filter, qcut, count"""
+    rows = df if district == "All" else df[df["district"] == district]
+    levels = pd.qcut(rows["total_biometric"], q=3, labels=CROWD_LEVELS, duplicates="drop")
+    return {
+        "total_records": len(rows),
+        "crowd_distribution": levels.value_counts().to_dict(),
+        "avg_biometric": float(rows["total_biometric"].mean()),
+        "avg_enrolment": float(rows["total_enrolment"].mean()),
+        "districts": sorted(rows["district"].unique().tolist()),
+    }
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    backend.init_app()
+    state = backend.serving_state
+    df = state.merged_data
+    if df is None:
+        print("✗ Data not loaded - check the data files")
+        return
+    thresholds = backend.load_crowd_thresholds()
+
+    print("=" * 72)
+    print(f"CROWD LEVEL BENCHMARK ({len(df):,} records, {repeats} repeats)")
+    print("=" * 72)
+    cubes = {}
+    for name, per_district in [("district terciles", True), ("training thresholds", False)]:
+        start = time.perf_counter()
+        cubes[name] = AggregateCube(df, state.district_index, thresholds, per_district=per_district)
+        print(f"Cube build, {name:<24}{(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+    before, after = cubes["district terciles"], cubes["training thresholds"]
+    changed = int((before.crowd_district != after.crowd_district).sum())
+    print(f"Rows labelled differently in district queries: {changed:,} of {len(df):,}")
+    print(f"Training thresholds: {after.thresholds['All'].tolist()}")
+
+    districts = ["All", *sorted(state.district_index)[:3]]
+    client = backend.app.test_client()
+    print(f"\n{'/api/statistics (uncached)':<28}{'qcut ms':>12}{'district ms':>14}{'training ms':>14}")
+    print("-" * 72)
+    try:
+        for district in districts:
+            timings = [median_ms(lambda: qcut_statistics(df, district), repeats)]
+            for cube in (before, after):
+                variant = copy.copy(state)
+                variant.aggregate_cube = cube
+                backend.serving_state = variant
+
+                def request():
+                    # Every request is rendered, not served from the response cache
+                    backend.response_cache.invalidate()
+                    assert client.get(f"/api/statistics?district={district}").status_code == 200
+
+                timings.append(median_ms(request, repeats))
+            print(f"{district:<28}" + "".join(f"{t:>14.2f}" if i else f"{t:>12.2f}" for i, t in enumerate(timings)))
+    finally:
+        backend.serving_state = state
+
+
+if __name__ == "__main__":
+    main()
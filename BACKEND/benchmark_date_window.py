@@ -0,0 +1,84 @@
+"""
+Date windows: finding a window's rows by binary search in the date-sorted
+layout versus a boolean mask over every row, and the uncached latency of
+/api/statistics, /api/trends and /api/analytics for a one-week window, a
+one-month window, the full range and no window. Run from the BACKEND directory:
+
+    python benchmark_date_window.py [district] [repeats]
+"""
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+
+import app as backend
+
+ENDPOINTS = ["statistics", "trends", "analytics"]
+
+
+def median_ms(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    backend.init_app()
+    state = backend.serving_state
+    df = state.merged_data
+    if df is None:
+        print("✗ Data not loaded - check the data files")
+        return
+
+    district = sys.argv[1] if len(sys.argv) > 1 else df["district"].iloc[0]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    first, last = df["date"].min().date(), df["date"].max().date()
+    middle = first + (last - first) / 2
+    windows = {
+        "1 week": (middle, middle + timedelta(days=6)),
+        "1 month": (middle, middle + timedelta(days=30)),
+        "full range": (first, last),
+        "no window": (None, None),
+    }
+    dates = df["date"].to_numpy()
+
+    print("=" * 72)
+    print(f"DATE WINDOW BENCHMARK ({len(df):,} records, {repeats} repeats)")
+    print("=" * 72)
+    print(f"{'row lookup':<32}{'rows':>10}{'search ms':>14}{'mask ms':>14}")
+    print("-" * 72)
+    for scope in [district, "All"]:
+        partition = state.district_index[scope] if scope != "All" else slice(0, len(df))
+        for name, (start, end) in list(windows.items())[:3]:
+            rows = state.date_index.rows(scope, start, end)
+            search = median_ms(lambda: state.date_index.rows(scope, start, end), repeats)
+            lower, upper = np.datetime64(start, "ns"), np.datetime64(end + timedelta(days=1), "ns")
+            mask = median_ms(lambda: np.flatnonzero((dates[partition] >= lower) & (dates[partition] < upper)), repeats)
+            count = len(range(len(df))[rows]) if isinstance(rows, slice) else len(rows)
+            print(f"{scope + ', ' + name:<32}{count:>10,}{search:>14.3f}{mask:>14.3f}")
+
+    client = backend.app.test_client()
+    print(f"\n{'endpoint (uncached)':<44}{'median ms':>12}")
+    print("-" * 72)
+    for scope in [district, "All"]:
+        for endpoint in ENDPOINTS:
+            for name, (start, end) in windows.items():
+                url = f"/api/{endpoint}?district={scope}"
+                if start is not None:
+                    url += f"&start={start}&end={end}"
+
+                def request():
+                    # Every request is rendered, not served from the response cache
+                    backend.response_cache.invalidate()
+                    assert client.get(url).status_code == 200, url
+
+                print(f"{f'/api/{endpoint} {scope}, {name}':<44}{median_ms(request, repeats):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-request latency and allocation of the district-filtered endpoints.
+
+Drives the Flask app in-process through its test client, so no server is
+needed. Run from the BACKEND directory:
+
+    python benchmark_endpoints.py [district] [repeats]
+"""
+import statistics
+import sys
+import time
+import tracemalloc
+
+import app as backend
+from app import app
+
+ENDPOINTS = [
+    "/api/statistics?district={district}",
+    "/api/trends?district={district}",
+    "/api/analytics?district={district}",
+    "/api/dashboard?district={district}",
+    "/api/district-averages/{district}",
+]
+
+
+def measure(client, url, repeats):
+    """Median latency in ms and peak traced allocation in MB for one URL"""
+    client.get(url)  # warm up
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, f"{url} -> {response.status_code}"
+
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(timings), peak / 1e6
+
+
+def main():
+    backend.init_app()
+    serving_state = backend.serving_state
+    merged_data = serving_state.merged_data
+    if merged_data is None:
+        print("✗ Data not loaded - check the data files")
+        return
+
+    district = sys.argv[1] if len(sys.argv) > 1 else merged_data["district"].iloc[0]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    client = app.test_client()
+
+    print("=" * 72)
+    print(f"ENDPOINT BENCHMARK ({len(merged_data):,} records, {repeats} repeats)")
+    print("=" * 72)
+    print(f"{'endpoint':<44}{'median ms':>12}{'peak alloc MB':>16}")
+    print("-" * 72)
+    for scope in [district, "All"]:
+        for template in ENDPOINTS:
+            url = template.format(district=scope)
+            latency, peak = measure(client, url, repeats)
+            print(f"{url:<44}{latency:>12.2f}{peak:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Incremental ingestion versus a full reload: deltas of growing size (new days
+for pincodes already in the data) are ingested into the loaded dataset as
+segments, then folded in by one compaction, and both are compared with
+reloading everything. Delta parts and the forecast go to a temporary
+directory, so the real data is left untouched. Run from the BACKEND directory:
+
+    python benchmark_ingest.py [delta rows ...]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import app as backend
+
+DELTA_ROWS = [10, 100, 1_000, 10_000, 50_000]
+
+
+def make_delta(df, rows, first_day):
+    """Raw biometric and enrolment CSVs for `rows` new keys, from existing pincodes"""
+    rng = np.random.default_rng(rows)
+    sample = df[["state", "district", "pincode"]].drop_duplicates().sample(rows, replace=True, random_state=rows)
+    days = first_day + pd.to_timedelta(rng.integers(0, 1000, rows), unit="D")
+    keys = sample.assign(date=days.strftime("%d-%m-%Y")).drop_duplicates(["date", "district", "pincode"])
+    keys = keys[["date", "state", "district", "pincode"]]
+    bio = keys.assign(bio_age_5_17=rng.poisson(4, len(keys)), bio_age_17_=rng.poisson(9, len(keys)))
+    enrol = keys.sample(frac=0.3, random_state=1).assign(age_0_5=1, age_5_17=2, age_18_greater=3)
+    return bio.to_csv(index=False).encode(), enrol.to_csv(index=False).encode()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DELTA_ROWS
+    with tempfile.TemporaryDirectory() as directory:
+        backend.DELTA_DIR = os.path.join(directory, "deltas")
+        backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+        # Compacted once, after the last delta, so each ingest is timed on its own
+        backend.COMPACT_SEGMENTS = 0
+        backend.init_app()
+        df = backend.serving_state.merged_data
+        if df is None:
+            print("✗ Data not loaded - check the data files")
+            return
+
+        start = time.perf_counter()
+        backend.reloader.reload()
+        full_reload = time.perf_counter() - start
+
+        print("=" * 72)
+        print(f"INCREMENTAL INGESTION ({len(df):,} records loaded)")
+        print("=" * 72)
+        print(f"Full reload (merge/snapshot, indexes, forecast): {full_reload:.2f} s\n")
+        print(f"{'delta rows':>12}{'added':>10}{'ingest s':>12}{'rows total':>14}{'segments':>10}")
+        print("-" * 72)
+        first_day = df["date"].max() + pd.Timedelta(days=1)
+        for rows in sizes:
+            bio, enrol = make_delta(backend.serving_state.merged_data, rows, first_day)
+            report = backend.ingest_delta(io.BytesIO(bio), io.BytesIO(enrol))
+            first_day += pd.Timedelta(days=1000)
+            total = backend.serving_state.record_count()
+            print(f"{rows:>12,}{report['added']:>10,}{report['seconds']:>12.3f}{total:>14,}{report['segments']:>10}")
+
+        start = time.perf_counter()
+        backend.reloader.apply(backend.compact_segments, reads_files=False)
+        print(f"\nCompaction of every segment (background, forecast included): {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        backend.reloader.reload()
+        print(f"Full reload with every delta part: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Prediction latency and throughput of /api/predict and /api/predict/batch.
+
+Drives the Flask app in-process through its test client. Run from the
+BACKEND directory:
+
+    python benchmark_predict.py
+"""
+import random
+import statistics
+import time
+
+import app as backend
+from app import app
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_inputs(count, districts, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "year": 2026,
+        "month": rng.randint(1, 12),
+        "day": rng.randint(1, 28),
+        "day_of_week": rng.choice(DAYS),
+        "district": rng.choice(districts),
+        "age_0_5": rng.randint(0, 5),
+        "age_5_17": rng.randint(0, 10),
+        "age_18_plus": rng.randint(0, 20),
+        "bio_age_5_17": rng.randint(0, 15),
+        "bio_age_18_plus": rng.randint(0, 30)
+    } for _ in range(count)]
+
+
+def batch_throughput(client, inputs, repeats):
+    """Rows per second through /api/predict/batch for one batch size"""
+    client.post("/api/predict/batch", json={"inputs": inputs})  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        response = client.post("/api/predict/batch", json={"inputs": inputs})
+        assert response.status_code == 200 and response.json["errors"] == 0
+    return len(inputs) * repeats / (time.perf_counter() - start)
+
+
+def single_latency(client, inputs):
+    """p50 and p99 latency in ms of individual /api/predict calls"""
+    for payload in inputs[:20]:
+        client.post("/api/predict", json=payload)  # warm up
+    timings = []
+    for payload in inputs:
+        start = time.perf_counter()
+        assert client.post("/api/predict", json=payload).status_code == 200
+        timings.append((time.perf_counter() - start) * 1000)
+    percentiles = statistics.quantiles(timings, n=100)
+    return percentiles[49], percentiles[98]
+
+
+def single_throughput(client, inputs):
+    """Rows per second sending each input to /api/predict"""
+    start = time.perf_counter()
+    for payload in inputs:
+        assert client.post("/api/predict", json=payload).status_code == 200
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def main():
+    backend.init_app()
+    serving_state = backend.serving_state
+    if serving_state.model is None:
+        print("✗ Model not loaded - train it first")
+        return
+
+    districts = sorted(serving_state.district_index) or ["Guntur"]
+    client = app.test_client()
+
+    p50, p99 = single_latency(client, make_inputs(1000, districts, seed=1))
+    print("=" * 60)
+    print("PREDICTION LATENCY")
+    print("=" * 60)
+    print(f"/api/predict p50: {p50:.2f} ms   p99: {p99:.2f} ms")
+
+    print("\n" + "=" * 60)
+    print("PREDICTION THROUGHPUT")
+    print("=" * 60)
+    print(f"{'mode':<32}{'rows/sec':>14}")
+    print("-" * 60)
+    print(f"{'/api/predict x 500':<32}{single_throughput(client, make_inputs(500, districts)):>14,.0f}")
+    for size, repeats in [(1, 500), (100, 50), (10000, 3)]:
+        rate = batch_throughput(client, make_inputs(size, districts), repeats)
+        print(f"{f'/api/predict/batch size {size:,}':<32}{rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
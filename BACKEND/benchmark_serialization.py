@@ -0,0 +1,78 @@
+"""
+Serialization and wire size of the district=All payloads of /api/statistics,
+/api/analytics, /api/trends and /api/dashboard: time to build the payload,
+encode it with the stdlib encoder (Flask's default provider) and with
+orjson (FastJSONProvider), and to compress the body with gzip and, when the
+brotli package is installed, br. Run from the BACKEND directory:
+
+    python benchmark_serialization.py [repeats]
+"""
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+import app as backend
+from utils.compression import ResponseCompressor, brotli
+from utils.json_provider import FastJSONProvider, orjson
+
+
+def best_us(function, repeats):
+    """Best of repeats calls, in microseconds (the least disturbed on a busy machine)"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return min(timings)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    backend.init_app()
+    if backend.serving_state.aggregate_cube is None:
+        print("✗ Data not loaded - check the data files")
+        return
+    cube = backend.serving_state.aggregate_cube.select("All", None)
+
+    builders = {
+        "statistics": lambda: backend.statistics_payload(cube, "All"),
+        "analytics": lambda: backend.analytics_payload(cube, "All"),
+        "trends": lambda: backend.trends_payload(cube, "All"),
+    }
+    builders["dashboard"] = lambda: {name: build() for name, build in list(builders.items())[:3]}
+    stdlib = DefaultJSONProvider(backend.app)
+    stdlib.default = FastJSONProvider.default
+    fast = backend.app.json
+    compressor = ResponseCompressor()
+
+    print("=" * 96)
+    print(f"SERIALIZATION BENCHMARK (district=All, best of {repeats})")
+    print("=" * 96)
+    if orjson is None:
+        print("⚠ orjson is not installed - FastJSONProvider falls back to the stdlib encoder")
+    if brotli is None:
+        print("⚠ brotli is not installed - br is not measured")
+    print(f"{'Payload':<12} {'build µs':>10} {'stdlib µs':>10} {'orjson µs':>10} {'bytes':>7} "
+          f"{'gzip µs':>9} {'gzip B':>7} {'br µs':>8} {'br B':>7}")
+    for name, build in builders.items():
+        payload = build()
+        body = fast.encode(payload)
+        assert body == f"{stdlib.dumps(payload, separators=(',', ':'))}\n".encode(), name
+        row = [
+            best_us(build, repeats),
+            best_us(lambda: stdlib.dumps(payload, separators=(",", ":")), repeats),
+            best_us(lambda: fast.encode(payload), repeats),
+        ]
+        gzip_us = best_us(lambda: compressor.compress(body, "gzip"), repeats)
+        line = (f"{name:<12} {row[0]:>10.0f} {row[1]:>10.1f} {row[2]:>10.1f} {len(body):>7} "
+                f"{gzip_us:>9.1f} {len(compressor.compress(body, 'gzip')):>7}")
+        if brotli is not None:
+            br_us = best_us(lambda: compressor.compress(body, "br"), repeats)
+            line += f" {br_us:>8.1f} {len(compressor.compress(body, 'br')):>7}"
+        print(line)
+    print("\n✓ orjson bodies are byte-identical to the stdlib encoder's")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Benchmark suite for the backend API on generated data: for each dataset size
+(100k, 1M and 10M rows by default) rows in the served schema are generated,
+the app builds its serving state from them, and every endpoint is driven
+through Flask's test client. Per endpoint it records latency percentiles,
+throughput and the peak memory allocated by one request; per size the
+state build time and the peak RSS of the process. Response and prediction
+caches are cleared before every request, so the numbers are the work a
+cache miss does.
+
+Each size runs in its own process so peak RSS is not inherited from the
+previous one. Results are saved as JSON, with the git commit, for comparing
+two runs. Uses the model files in ../ML-ALGO/models; the data files are not
+needed. Run from the BACKEND directory:
+
+    python benchmark_suite.py [--sizes 100000 1000000] [--requests 30] [--output results.json]
+    python benchmark_suite.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import quote
+
+import joblib
+import numpy as np
+import pandas as pd
+
+SIZES = [100_000, 1_000_000, 10_000_000]
+REQUESTS = 30
+DAYS = 365
+FIRST_DAY = "2025-01-01"
+# Used when no model is around to take district names from
+FALLBACK_DISTRICTS = [f"District {i:02d}" for i in range(1, 27)]
+# Mean of each count column on an average day, close to the real extracts
+COUNT_MEANS = {"bio_age_5_17": 3.2, "bio_age_18_plus": 7.3, "age_0_5": 0.27, "age_5_17": 0.55, "age_18_plus": 0.82}
+# Share of more pincodes than needed, so (date, pincode) keys are drawn without repeats
+KEY_HEADROOM = 1.25
+
+
+def make_merged_data(rows, districts, seed=0):
+    """
+    `rows` rows of merged data in the compact schema the backend serves, with
+    unique (date, district, pincode) keys over DAYS days. Each district gets
+    enough six-digit pincodes for the keys, and counts follow the seasonal and
+    day-of-week shape of generate_synthetic_data.py. Built in memory rather
+    than through raw CSVs, which would take minutes to write and merge at 10M rows.
+    """
+    from feature_engineering import DAY_NAMES, compact_frame
+    from generate_synthetic_data import MONTH_SHAPE, WEEKDAY_SHAPE
+
+    rng = np.random.default_rng(seed)
+    pincodes_per_district = int(np.ceil(rows / (len(districts) * DAYS) * KEY_HEADROOM))
+    keys = rng.choice(len(districts) * pincodes_per_district * DAYS, size=rows, replace=False)
+    keys.sort()
+    day, slot = keys % DAYS, keys // DAYS
+    del keys
+    district, pincode = slot // pincodes_per_district, slot % pincodes_per_district
+    del slot
+
+    # Built in the compact dtypes from the start: object columns would cost
+    # gigabytes at 10M rows, and compact_frame() then leaves them as they are
+    dates = pd.Timestamp(FIRST_DAY) + pd.to_timedelta(day, unit="D")
+    shape = MONTH_SHAPE[dates.month - 1] * WEEKDAY_SHAPE[dates.dayofweek]
+    df = pd.DataFrame({
+        "date": dates,
+        "state": pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), categories=["Andhra Pradesh"]),
+        "district": pd.Categorical.from_codes(district.astype(np.int16), categories=districts),
+        # Spread districts over 500000-5xxxxx like real postal circles
+        "pincode": (500000 + district * 2000 + pincode).astype(np.int32),
+        **{column: rng.poisson(mean * shape).astype(np.uint16) for column, mean in COUNT_MEANS.items()},
+        "year": dates.year.astype(np.int16),
+        "month": dates.month.astype(np.int8),
+        "day": dates.day.astype(np.int8),
+        "day_of_week": pd.Categorical.from_codes(dates.dayofweek.astype(np.int8), categories=DAY_NAMES),
+    })
+    del dates, shape, day, district, pincode
+    df["total_enrolment"] = df["age_0_5"].astype(np.int32) + df["age_5_17"] + df["age_18_plus"]
+    df["total_biometric"] = df["bio_age_5_17"].astype(np.int32) + df["bio_age_18_plus"]
+    return compact_frame(df)
+
+
+def model_districts(features_path):
+    columns = joblib.load(features_path) if os.path.exists(features_path) else []
+    districts = sorted(column[len("district_"):] for column in columns if column.startswith("district_"))
+    return districts or FALLBACK_DISTRICTS
+
+
+def endpoints(df):
+    """(name, method, url, json body) for every endpoint, with arguments taken from df"""
+    district = df["district"].value_counts().idxmax()
+    pincode = int(df.loc[df["district"] == district, "pincode"].iloc[0])
+    week_start = pd.Timestamp(FIRST_DAY) + pd.Timedelta(days=70)
+    window = f"start={week_start:%Y-%m-%d}&end={week_start + pd.Timedelta(days=6):%Y-%m-%d}"
+    d = quote(district)
+    payload = {"month": 6, "day": 15, "day_of_week": "Sunday", "district": district,
+               "age_0_5": 1, "age_5_17": 3, "age_18_plus": 8, "bio_age_5_17": 5, "bio_age_18_plus": 12}
+    rng = np.random.default_rng(1)
+    batch = [{**payload, "day": int(day), "bio_age_18_plus": int(count)}
+             for day, count in zip(rng.integers(1, 29, 100), rng.integers(0, 30, 100))]
+    return [
+        ("health", "GET", "/api/health", None),
+        ("ready", "GET", "/api/ready", None),
+        ("model-info", "GET", "/api/model-info", None),
+        ("districts", "GET", "/api/districts", None),
+        ("statistics All", "GET", "/api/statistics", None),
+        ("statistics district", "GET", f"/api/statistics?district={d}", None),
+        ("statistics week", "GET", f"/api/statistics?{window}", None),
+        ("trends All", "GET", "/api/trends", None),
+        ("trends district", "GET", f"/api/trends?district={d}", None),
+        ("analytics All", "GET", "/api/analytics", None),
+        ("analytics district", "GET", f"/api/analytics?district={d}", None),
+        ("dashboard All", "GET", "/api/dashboard", None),
+        ("dashboard district", "GET", f"/api/dashboard?district={d}", None),
+        ("district-averages", "GET", f"/api/district-averages/{d}", None),
+        ("pincode", "GET", f"/api/pincode/{pincode}", None),
+        ("pincode prefix", "GET", f"/api/pincode/{str(pincode)[:3]}", None),
+        ("forecast All", "GET", "/api/forecast", None),
+        ("forecast district", "GET", f"/api/forecast?district={d}", None),
+        ("records district week", "GET", f"/api/records?district={d}&{window}&format=csv", None),
+        ("predict", "POST", "/api/predict", payload),
+        ("predict batch 100", "POST", "/api/predict/batch", {"inputs": batch}),
+        ("metrics", "GET", "/api/metrics", None),
+    ]
+
+
+def send(backend, client, method, url, body):
+    backend.response_cache.invalidate()
+    backend.prediction_cache.invalidate()
+    start = time.perf_counter()
+    response = client.open(url, method=method, json=body)
+    size = len(response.get_data())
+    return time.perf_counter() - start, response.status_code, size
+
+
+def measure(backend, client, method, url, body, requests):
+    send(backend, client, method, url, body)  # warm up
+    timings, statuses = [], set()
+    for _ in range(requests):
+        seconds, status, size = send(backend, client, method, url, body)
+        timings.append(seconds * 1000)
+        statuses.add(status)
+
+    tracemalloc.start()
+    send(backend, client, method, url, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(timings, [50, 90, 99])
+    return {
+        "status": sorted(statuses),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "requests_per_s": round(requests / (sum(timings) / 1000), 1),
+        "peak_alloc_mb": round(peak / 1e6, 3),
+        "response_bytes": size,
+    }
+
+
+def run_size(rows, requests, seed):
+    """Every endpoint against `rows` generated rows, in this process"""
+    import app as backend
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+        start = time.perf_counter()
+        df = make_merged_data(rows, model_districts(backend.FEATURES_PATH), seed)
+        generated = time.perf_counter() - start
+        if not backend.reloader.apply(lambda version, data=df: backend.build_state(version, data=data)):
+            raise RuntimeError(f"Could not build the serving state: {backend.reloader.last_error}")
+        del df
+        state = backend.serving_state
+        result = {
+            "rows": rows,
+            "generate_seconds": round(generated, 3),
+            "stage_seconds": state.stage_timings,
+            "endpoints": {},
+        }
+        client = backend.app.test_client()
+        for name, method, url, body in endpoints(state.merged_data):
+            result["endpoints"][name] = {"url": url, **measure(backend, client, method, url, body, requests)}
+            print(f"  {name:<24}{result['endpoints'][name]['p50_ms']:>10.2f} ms", file=sys.stderr)
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_size(result):
+    print(f"\n{result['rows']:,} rows - generated in {result['generate_seconds']:.1f} s, "
+          f"state built in {sum(result['stage_seconds'].values()):.1f} s, peak RSS {result['peak_rss_mb']:,.0f} MB")
+    print(f"{'endpoint':<24}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'req/s':>10}{'peak MB':>10}{'bytes':>12}")
+    print("-" * 86)
+    for name, e in result["endpoints"].items():
+        flag = "" if e["status"] in ([200], [202]) else f"  status {e['status']}"
+        print(f"{name:<24}{e['p50_ms']:>10.2f}{e['p90_ms']:>10.2f}{e['p99_ms']:>10.2f}"
+              f"{e['requests_per_s']:>10.0f}{e['peak_alloc_mb']:>10.2f}{e['response_bytes']:>12,}{flag}")
+
+
+def compare(before_path, after_path):
+    """p50 and peak allocation of every endpoint in two result files, after/before"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print("=" * 86)
+    print(f"COMPARISON {before.get('commit')} -> {after.get('commit')}")
+    print("=" * 86)
+    for size, result in after["sizes"].items():
+        old = before["sizes"].get(size)
+        if old is None:
+            continue
+        print(f"\n{int(size):,} rows")
+        print(f"{'endpoint':<24}{'p50 before':>12}{'p50 after':>12}{'ratio':>8}{'peak MB before':>16}{'after':>8}")
+        print("-" * 86)
+        for name, e in result["endpoints"].items():
+            if name not in old["endpoints"]:
+                continue
+            o = old["endpoints"][name]
+            ratio = e["p50_ms"] / o["p50_ms"] if o["p50_ms"] else float("nan")
+            print(f"{name:<24}{o['p50_ms']:>12.2f}{e['p50_ms']:>12.2f}{ratio:>8.2f}"
+                  f"{o['peak_alloc_mb']:>16.2f}{e['peak_alloc_mb']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint on generated data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="rows of generated data")
+    parser.add_argument("--requests", type=int, default=REQUESTS, help="timed requests per endpoint")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.worker:
+        # One size, in a fresh process; the result goes to stdout as JSON, the log to stderr
+        sys.stdout, log = sys.stderr, sys.stdout
+        result = run_size(args.worker, args.requests, args.seed)
+        log.write(json.dumps(result))
+        return
+
+    results = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "requests": args.requests,
+        "seed": args.seed,
+        "sizes": {},
+    }
+    print("=" * 86)
+    print(f"BACKEND BENCHMARK SUITE (commit {results['commit']}, {args.requests} requests per endpoint)")
+    print("=" * 86)
+    for rows in args.sizes:
+        print(f"\nRunning {rows:,} rows...")
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(rows),
+             "--requests", str(args.requests), "--seed", str(args.seed)],
+            stdout=subprocess.PIPE, text=True,
+        )
+        if process.returncode != 0:
+            print(f"✗ {rows:,} rows failed (exit code {process.returncode})")
+            results["sizes"][str(rows)] = {"rows": rows, "error": f"exit code {process.returncode}"}
+            continue
+        results["sizes"][str(rows)] = json.loads(process.stdout)
+        print_size(results["sizes"][str(rows)])
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
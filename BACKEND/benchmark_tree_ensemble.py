@@ -0,0 +1,87 @@
+"""
+Scoring latency of the NumPy tree export against LightGBM's predict_proba
+for batch sizes from 1 to 100k rows. Needs a trained model and its export
+(ML-ALGO/train_lightgbm_merged.py writes both). Run from the BACKEND directory:
+
+    python benchmark_tree_ensemble.py
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from feature_encoder import FeatureEncoder
+from tree_export import load_for_model
+
+MODEL_PATH = "../ML-ALGO/models/lightgbm_merged_model.pkl"
+FEATURES_PATH = "../ML-ALGO/models/feature_columns.pkl"
+TREES_PATH = "../ML-ALGO/models/lightgbm_merged_trees.npz"
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_features(encoder, count, seed=0):
+    rng = np.random.default_rng(seed)
+    districts = sorted(encoder.known_districts) or ["Guntur"]
+    rows = [{
+        "year": 2026,
+        "month": int(rng.integers(1, 13)),
+        "day": int(rng.integers(1, 29)),
+        "day_of_week": DAYS[rng.integers(0, 7)],
+        "district": districts[rng.integers(0, len(districts))],
+        "age_0_5": int(rng.integers(0, 6)),
+        "age_5_17": int(rng.integers(0, 11)),
+        "age_18_plus": int(rng.integers(0, 21)),
+        "bio_age_5_17": int(rng.integers(0, 16)),
+        "bio_age_18_plus": int(rng.integers(0, 31)),
+    } for _ in range(count)]
+    for row in rows:
+        row["total_enrolment"] = row["age_0_5"] + row["age_5_17"] + row["age_18_plus"]
+        row["total_biometric"] = row["bio_age_5_17"] + row["bio_age_18_plus"]
+    return encoder.encode_many(rows)
+
+
+def best_time(score, features, budget=1.0):
+    """Best of several runs in ms, repeating small batches until the time budget is spent"""
+    score(features)  # warm up
+    timings, spent = [], 0.0
+    while len(timings) < 3 or (spent < budget and len(timings) < 200):
+        start = time.perf_counter()
+        score(features)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+    return min(timings) * 1000
+
+
+def main():
+    if not os.path.exists(TREES_PATH):
+        print("✗ Tree export not found - run ML-ALGO/train_lightgbm_merged.py first")
+        return
+
+    model = joblib.load(MODEL_PATH)
+    ensemble = load_for_model(TREES_PATH, MODEL_PATH)
+    encoder = FeatureEncoder(joblib.load(FEATURES_PATH))
+    features = make_features(encoder, max(BATCH_SIZES))
+
+    diff = np.abs(ensemble.predict_proba(features) - model.predict_proba(features)).max()
+    print("=" * 60)
+    print("TREE EXPORT vs LIGHTGBM")
+    print("=" * 60)
+    print(f"Trees: {ensemble.n_trees}   split nodes: {len(ensemble.feature):,}   max leaves: {ensemble.max_leaves}")
+    print(f"Max probability difference on {len(features):,} rows: {diff:.2e}")
+
+    print(f"\n{'batch':>8}{'lightgbm ms':>14}{'numpy ms':>12}{'speedup':>10}")
+    print("-" * 60)
+    for size in BATCH_SIZES:
+        batch = features[:size]
+        lightgbm_ms = best_time(model.predict_proba, batch)
+        numpy_ms = best_time(ensemble.predict_proba, batch)
+        print(f"{size:>8,}{lightgbm_ms:>14.3f}{numpy_ms:>12.3f}{lightgbm_ms / numpy_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
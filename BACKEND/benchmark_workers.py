@@ -0,0 +1,127 @@
+"""
+Memory per worker and throughput of the gunicorn setup (wsgi.py,
+gunicorn.conf.py) for 1 to 8 worker processes, with the app preloaded in the
+master and without. Starts each server on a spare port, waits until it
+answers, drives it from separate client processes and reads the workers'
+RSS and PSS (RSS with shared pages split between the processes sharing
+them) from /proc. Linux only. Run from the BACKEND directory:
+
+    python benchmark_workers.py
+"""
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from urllib.parse import quote
+
+PORT = 5077
+WORKER_COUNTS = [1, 2, 4, 8]
+CLIENT_PROCESSES = 8
+DURATION = 5.0
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def client(districts, seed):
+    """Mixed predictions and cached dashboard reads for DURATION seconds; returns requests completed"""
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", PORT)
+    done = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.5:
+            body = json.dumps({
+                "month": rng.randint(1, 12), "day": rng.randint(1, 28),
+                "day_of_week": rng.choice(DAYS), "district": rng.choice(districts),
+                "age_0_5": rng.randint(0, 5), "age_18_plus": rng.randint(0, 20),
+                "bio_age_5_17": rng.randint(0, 15), "bio_age_18_plus": rng.randint(0, 30),
+            })
+            connection.request("POST", "/api/predict", body, {"Content-Type": "application/json"})
+        else:
+            path = rng.choice(["/api/statistics", "/api/trends", "/api/analytics"])
+            connection.request("GET", f"{path}?district={quote(rng.choice(districts))}")
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 200, response.status
+        done += 1
+    return done
+
+
+def memory_kb(pid):
+    """(RSS, PSS) of one process in kB"""
+    with open(f"/proc/{pid}/status") as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        pss = next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+    return rss, pss
+
+
+def worker_pids(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def wait_until_ready(server, workers, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=5)
+            connection.request("GET", "/api/health")
+            ready = json.loads(connection.getresponse().read())["data_loaded"]
+        except (OSError, ValueError, KeyError):
+            ready = False
+        if ready and len(worker_pids(server.pid)) == workers:
+            connection.request("GET", "/api/districts")
+            return json.loads(connection.getresponse().read())["districts"][:10]
+        time.sleep(0.5)
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def measure(workers, preload):
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{PORT}",
+           "PRELOAD_APP": "1" if preload else "0"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        districts = wait_until_ready(server, workers)
+        with ProcessPoolExecutor(CLIENT_PROCESSES) as pool:
+            total = sum(pool.map(partial(client, districts), range(CLIENT_PROCESSES)))
+        usage = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        _, master_pss = memory_kb(server.pid)
+        return {
+            "workers": workers,
+            "preload": preload,
+            "requests_per_sec": total / DURATION,
+            "worker_rss_mb": sum(rss for rss, _ in usage) / len(usage) / 1024,
+            "worker_pss_mb": sum(pss for _, pss in usage) / len(usage) / 1024,
+            "total_pss_mb": (master_pss + sum(pss for _, pss in usage)) / 1024,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    print("=" * 72)
+    print("GUNICORN WORKERS: MEMORY AND THROUGHPUT")
+    print("=" * 72)
+    print(f"CPUs: {os.cpu_count()}   client processes: {CLIENT_PROCESSES}   {DURATION:.0f} s per run")
+    print(f"\n{'workers':>8}{'preload':>9}{'req/sec':>10}{'RSS/worker':>13}{'PSS/worker':>13}{'total PSS':>12}")
+    print("-" * 72)
+    for preload in [True, False]:
+        for workers in WORKER_COUNTS:
+            r = measure(workers, preload)
+            print(f"{r['workers']:>8}{'yes' if r['preload'] else 'no':>9}{r['requests_per_sec']:>10,.0f}"
+                  f"{r['worker_rss_mb']:>10.0f} MB{r['worker_pss_mb']:>10.0f} MB{r['total_pss_mb']:>9.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
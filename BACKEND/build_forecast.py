@@ -0,0 +1,36 @@
+"""
+Rebuild the forecast grid served by /api/forecast: every district scored for
+each day of the next FORECAST_HORIZON_DAYS days from its day-of-week
+averages. The backend also rebuilds it on startup and reload whenever the
+model or data changed; run this to refresh it ahead of time. From BACKEND:
+
+    python build_forecast.py
+"""
+import time
+
+import app
+
+app.init_app()
+
+print("\n" + "=" * 60)
+print("FORECAST GRID")
+print("=" * 60)
+
+state = app.serving_state
+if state.model is None or state.aggregate_cube is None:
+    print("✗ Model or data not loaded - cannot build the forecast")
+else:
+    start = time.perf_counter()
+    grid = app.load_forecast(state, rebuild=True)
+    elapsed = time.perf_counter() - start
+
+    print(f"Horizon: {grid.start} to {grid.end} ({grid.days} days)")
+    print(f"Districts: {len(grid.districts)}   workers: {app.FORECAST_WORKERS}")
+    print(f"Built in {elapsed:.2f} s -> {app.FORECAST_PATH}")
+
+    counts = grid.level_counts(grid.start, grid.end)
+    busiest = sorted(counts.items(), key=lambda item: item[1]["High"], reverse=True)[:10]
+    print(f"\n{'district':<32}{'High days':>10}")
+    print("-" * 60)
+    for district, levels in busiest:
+        print(f"{district:<32}{levels['High']:>10}")
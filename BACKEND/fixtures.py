@@ -0,0 +1,152 @@
+"""
+Test data shared by the backend tests, so no test imports another:
+
+- make_data() and serving(): a synthetic table in the merged-data schema,
+  served in-process through the real app with its indexes and cube;
+- write_fixture() and fixture_backend(): small raw CSVs and models loaded
+  by the real reload path, for tests that need loading, ingest or /predict.
+
+Nothing here is a test itself; pytest only collects the test_*.py files.
+"""
+import contextlib
+import os
+import sys
+import tempfile
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+import app as backend
+from feature_engineering import DAY_NAMES, load_merged_data
+from utils.cube import AggregateCube
+from utils.partitions import DateIndex, build_district_index
+from utils.state import ServingState
+
+DISTRICTS = ["Guntur", "Krishna", "Prakasam"]
+COUNT_COLUMNS = ["age_0_5", "age_5_17", "age_18_plus", "bio_age_5_17", "bio_age_18_plus"]
+PAYLOAD = {
+    "year": 2026, "month": 1, "day": 15, "day_of_week": "Wednesday", "district": "Guntur",
+    "age_0_5": 5, "age_5_17": 10, "age_18_plus": 20, "bio_age_5_17": 8, "bio_age_18_plus": 15
+}
+SETTINGS = ["MODEL_PATH", "FEATURES_PATH", "BIO_DATA_PATH", "ENROL_DATA_PATH", "SNAPSHOT_PATH",
+            "FORECAST_PATH", "DELTA_DIR", "ADMIN_TOKEN", "COMPACT_SEGMENTS"]
+
+
+def make_data(rows=30_000, districts=DISTRICTS, pincodes=(522001, 522100), days=365, counts_below=30, seed=3):
+    """
+    rows random rows dated over days from 2025-01-01, with the columns of the
+    merged data, sorted and indexed by build_district_index(df, sort_within="date").
+    pincodes is a [low, high) range every district draws from, or a
+    {district: pincodes} map (its keys are then the districts). Counts are
+    drawn from [0, counts_below).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    if isinstance(pincodes, dict):
+        district = rng.choice(list(pincodes), rows)
+        pincode = np.array([rng.choice(pincodes[d]) for d in district])
+    else:
+        district = rng.choice(districts, rows)
+        pincode = rng.integers(*pincodes, rows)
+    df = pd.DataFrame({
+        "date": dates,
+        "state": pd.Categorical(["Andhra Pradesh"] * rows),
+        "district": pd.Categorical(district),
+        "pincode": pincode.astype("int32"),
+        "year": dates.year.astype("int16"),
+        "month": dates.month.astype("int8"),
+        "day_of_week": pd.Categorical(dates.day_name(), categories=DAY_NAMES),
+        **{column: rng.integers(0, counts_below, rows) for column in COUNT_COLUMNS},
+    })
+    df["total_enrolment"] = df["age_0_5"] + df["age_5_17"] + df["age_18_plus"]
+    df["total_biometric"] = df["bio_age_5_17"] + df["bio_age_18_plus"]
+    return build_district_index(df, sort_within="date")
+
+
+@contextlib.contextmanager
+def serving(df=None, index=None, version=3, per_district=False):
+    """
+    Serve df and index (make_data()'s by default) through the real app as
+    data version version, yielding a test client; the previous state is
+    restored and the response cache emptied afterwards
+    """
+    if df is None:
+        df, index = make_data()
+    previous_state, previous_version = backend.serving_state, backend.reloader.version
+    backend.serving_state = ServingState(version=version, merged_data=df, district_index=index,
+                                         date_index=DateIndex(df, index),
+                                         aggregate_cube=AggregateCube(df, index, per_district=per_district))
+    # Counts as initialized, so the first request does not load the real data
+    backend.reloader.version = max(previous_version, 1)
+    backend.response_cache.invalidate()
+    try:
+        yield backend.app.test_client()
+    finally:
+        backend.serving_state, backend.reloader.version = previous_state, previous_version
+        backend.response_cache.invalidate()
+
+
+def write_fixture(directory):
+    """Small raw CSVs plus two differently trained models sharing one feature set"""
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2025-03-01", periods=60).strftime("%d-%m-%Y")
+    rows = pd.DataFrame({
+        "date": np.repeat(dates, 20),
+        "state": "Andhra Pradesh",
+        "district": np.tile(np.repeat(DISTRICTS, [7, 7, 6]), len(dates)),
+        "pincode": np.tile(np.arange(520001, 520021), len(dates)),
+    })
+    bio = rows.assign(bio_age_5_17=rng.poisson(4, len(rows)), bio_age_17_=rng.poisson(9, len(rows)))
+    enrol = rows.sample(frac=0.3, random_state=1).assign(age_0_5=1, age_5_17=2, age_18_greater=3)
+
+    paths = {
+        "bio": os.path.join(directory, "biometric data.csv"),
+        "enrol": os.path.join(directory, "enrolnment data.csv"),
+        "features": os.path.join(directory, "feature_columns.pkl"),
+        "model": os.path.join(directory, "lightgbm_merged_model.pkl"),
+        "model_a": os.path.join(directory, "model_a.pkl"),
+        "model_b": os.path.join(directory, "model_b.pkl"),
+    }
+    bio.to_csv(paths["bio"], index=False)
+    enrol.to_csv(paths["enrol"], index=False)
+
+    df = load_merged_data(paths["bio"], paths["enrol"])
+    y = pd.qcut(df["total_biometric"], q=3, labels=[0, 1, 2], duplicates="drop").astype(int)
+    X = df[["year", "month", "day", "age_0_5", "age_5_17", "age_18_plus", "bio_age_5_17",
+            "bio_age_18_plus", "total_enrolment", "total_biometric", "day_of_week", "district"]]
+    X = pd.get_dummies(X.astype({"day_of_week": str, "district": str}),
+                       columns=["day_of_week", "district"], drop_first=True)
+    joblib.dump(X.columns.tolist(), paths["features"])
+
+    for key, trees in [("model_a", 3), ("model_b", 30)]:
+        model = lgb.LGBMClassifier(n_estimators=trees, num_leaves=7, verbose=-1, random_state=42)
+        joblib.dump(model.fit(X, y), paths[key])
+    return paths
+
+
+@contextlib.contextmanager
+def fixture_backend():
+    """The backend serving write_fixture()'s files, and their paths; segments are compacted only on request"""
+    originals = {name: getattr(backend, name) for name in SETTINGS}
+    previous_state = backend.serving_state
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_fixture(directory)
+        os.replace(paths["model_a"], paths["model"])
+        backend.MODEL_PATH, backend.FEATURES_PATH = paths["model"], paths["features"]
+        backend.BIO_DATA_PATH, backend.ENROL_DATA_PATH = paths["bio"], paths["enrol"]
+        backend.SNAPSHOT_PATH = os.path.join(directory, "missing.parquet")
+        backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+        backend.DELTA_DIR = os.path.join(directory, "deltas")
+        backend.ADMIN_TOKEN = "test-token"
+        backend.COMPACT_SEGMENTS = 0
+        try:
+            assert backend.reloader.reload()
+            yield backend.app.test_client(), paths
+        finally:
+            for name, value in originals.items():
+                setattr(backend, name, value)
+            backend.publish_state(previous_state)
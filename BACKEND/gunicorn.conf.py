@@ -0,0 +1,28 @@
+"""
+gunicorn settings for the backend (see wsgi.py). Overridable through the
+environment: WEB_CONCURRENCY (worker processes), WEB_THREADS (threads per
+worker), BIND and PRELOAD_APP.
+"""
+import gc
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+threads = int(os.environ.get("WEB_THREADS", "1"))
+# Load model and data once in the master, before forking the workers
+preload_app = os.environ.get("PRELOAD_APP", "1") == "1"
+# Startup builds the data and forecast before the first request
+timeout = 120
+
+
+def when_ready(server):
+    # Everything loaded so far lives as long as the process. Moving it out of
+    # the garbage collector's reach keeps the collector from writing to those
+    # pages, which would give every worker its own copy of them.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+
+    app.start_watcher()
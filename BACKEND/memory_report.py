@@ -0,0 +1,40 @@
+"""
+Memory footprint of merged_data before and after the compact schema.
+
+Run from the BACKEND directory:  python memory_report.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from feature_engineering import compact_frame, memory_usage, merge_sources
+
+BIO_DATA_PATH = "../ML-ALGO/data/biometric data.csv"
+ENROL_DATA_PATH = "../ML-ALGO/data/enrolnment data.csv"
+
+
+def main():
+    raw = merge_sources(BIO_DATA_PATH, ENROL_DATA_PATH)
+    compact = compact_frame(raw)
+
+    raw_usage = memory_usage(raw)
+    compact_usage = memory_usage(compact)
+
+    print("=" * 70)
+    print(f"MERGED DATA MEMORY REPORT ({len(raw):,} records)")
+    print("=" * 70)
+    print(f"{'column':<18}{'raw dtype':<16}{'raw MB':>9}{'compact dtype':>16}{'compact MB':>11}")
+    print("-" * 70)
+    for col in raw.columns:
+        print(f"{col:<18}{str(raw[col].dtype):<16}{raw_usage[col] / 1e6:>9.2f}"
+              f"{str(compact[col].dtype):>16}{compact_usage[col] / 1e6:>11.2f}")
+    print("-" * 70)
+
+    raw_total = sum(raw_usage.values())
+    compact_total = sum(compact_usage.values())
+    print(f"{'TOTAL':<34}{raw_total / 1e6:>9.2f}{'':>16}{compact_total / 1e6:>11.2f}")
+    print(f"\nReduction: {(1 - compact_total / raw_total):.1%} per worker")
+
+
+if __name__ == "__main__":
+    main()
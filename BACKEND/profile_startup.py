@@ -0,0 +1,83 @@
+"""
+Where startup time goes: the cost of importing app (measured in a fresh
+interpreter with -X importtime), the staged init_app() that loads the model
+and data, and the first /api/predict against steady state. Run from the
+BACKEND directory:
+
+    python profile_startup.py
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+PAYLOAD = {
+    "year": 2026, "month": 1, "day": 15, "day_of_week": "Wednesday", "district": "Guntur",
+    "age_0_5": 5, "age_5_17": 10, "age_18_plus": 20, "bio_age_5_17": 8, "bio_age_18_plus": 15
+}
+
+
+def import_profile(top=10):
+    """(total seconds, [(module, cumulative seconds)]) for the direct imports of app"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            rows.append((name.rstrip(), int(cumulative) / 1e6))
+    # Children are listed before their parent, indented two more spaces per level,
+    # so app's own imports are the depth-1 lines between the previous top-level line and app
+    end = next(i for i, (name, _) in enumerate(rows) if name == " app")
+    begin = end
+    while begin > 0 and rows[begin - 1][0].startswith("   "):
+        begin -= 1
+    direct = [(name.strip(), seconds) for name, seconds in rows[begin:end]
+              if name.startswith("   ") and not name.startswith("    ")]
+    return rows[end][1], sorted(direct, key=lambda item: -item[1])[:top]
+
+
+def main():
+    total, direct = import_profile()
+    print("=" * 60)
+    print("IMPORT app")
+    print("=" * 60)
+    print(f"{'module':<40}{'cumulative ms':>16}")
+    print("-" * 60)
+    for name, seconds in direct:
+        print(f"{name:<40}{seconds * 1000:>16.1f}")
+    print(f"{'total':<40}{total * 1000:>16.1f}")
+
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter() - start
+    loaded = [name for name in ("pandas", "lightgbm", "pyarrow") if name in sys.modules]
+    print(f"\nIn-process import: {imported * 1000:.0f} ms, heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+    start = time.perf_counter()
+    app.init_app()
+    initialized = time.perf_counter() - start
+
+    print("\n" + "=" * 60)
+    print("init_app() STAGES")
+    print("=" * 60)
+    for stage, seconds in app.serving_state.stage_timings.items():
+        print(f"{stage:<40}{seconds * 1000:>16.1f}")
+    print(f"{'total (incl. publish and Flask warmup)':<40}{initialized * 1000:>16.1f}")
+
+    client = app.app.test_client()
+    timings = []
+    for i in range(200):
+        # A different input each time so the prediction cache never answers
+        payload = dict(PAYLOAD, age_0_5=i)
+        start = time.perf_counter()
+        assert client.post("/api/predict", json=payload).status_code == 200
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"\nFirst /api/predict: {timings[0]:.2f} ms   steady-state median: {statistics.median(timings[1:]):.2f} ms")
+    print(f"/api/ready: {client.get('/api/ready').status_code}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Aggregate cube parity: /api/statistics, /api/trends and /api/analytics,
+answered from the cube's cells, return what the plain pandas groupbys over
+the raw rows (the endpoints' original implementation) return, for all
+districts and for each one.
+
+    python test_aggregate_cube.py      (or: python -m pytest test_aggregate_cube.py)
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from fixtures import DISTRICTS, make_data, serving
+
+
+def plain(value):
+    """value as JSON would carry it: NumPy scalars as Python numbers"""
+    return json.loads(json.dumps(value, default=lambda v: v.item() if isinstance(v, np.generic) else str(v)))
+
+
+def rows_of(df, district):
+    """Raw rows with the columns the endpoints derived from date"""
+    if district != "All":
+        df = df[df["district"] == district]
+    df = df.copy()
+    df["year"] = df["date"].dt.year
+    df["month"] = df["date"].dt.month
+    df["year_month"] = df["date"].dt.to_period("M").astype(str)
+    df["day_of_week"] = df["date"].dt.day_name()
+    df["crowd_level"] = pd.qcut(df["total_biometric"], q=3, labels=["Low", "Medium", "High"], duplicates="drop")
+    return df
+
+
+def statistics(df, district):
+    crowd_dist = df["crowd_level"].value_counts().to_dict()
+    return {
+        "total_records": int(len(df)),
+        "crowd_distribution": {str(k): int(v) for k, v in crowd_dist.items()},
+        "avg_biometric": float(df["total_biometric"].mean()),
+        "avg_enrolment": float(df["total_enrolment"].mean()),
+        "districts": sorted(df["district"].astype(str).unique().tolist()),
+        "date_range": {"start": str(df["date"].min().date()), "end": str(df["date"].max().date())},
+        "total_biometric": int(df["total_biometric"].sum()),
+        "total_enrolment": int(df["total_enrolment"].sum()),
+        "district": district,
+    }
+
+
+def trends(df, district):
+    monthly = df.groupby(["year", "month", "year_month"]).agg(
+        {"total_biometric": "sum", "total_enrolment": "sum"}).reset_index().sort_values(["year", "month"])
+    return {
+        "monthly": [{"month": int(row["month"]), "year": int(row["year"]), "year_month": row["year_month"],
+                     "total_biometric": float(row["total_biometric"]), "total_enrolment": float(row["total_enrolment"])}
+                    for _, row in monthly.iterrows()],
+        "by_day": df.groupby("day_of_week")["total_biometric"].sum().to_dict(),
+        "district": district,
+        "total_records": len(df),
+    }
+
+
+def analytics(df, district):
+    district_stats = df.groupby("district", observed=True).agg(
+        {"total_enrolment": "sum", "total_biometric": "sum"}).reset_index()
+    district_stats["district"] = district_stats["district"].astype(str)
+    monthly_crowd = df.groupby(["month", "crowd_level"], observed=False).size().reset_index(name="count")
+    return {
+        "district_stats": district_stats.to_dict("records")[:10],
+        "day_analysis": df.groupby("day_of_week").agg({"total_enrolment": "mean", "total_biometric": "mean"}).to_dict("index"),
+        "monthly_crowd": monthly_crowd.to_dict("records"),
+        "total_enrolment": int(df["total_enrolment"].sum()),
+        "total_biometric": int(df["total_biometric"].sum()),
+        "peak_month": int(df.groupby("month")["total_enrolment"].sum().idxmax()),
+        "peak_day": df["day_of_week"].value_counts().idxmax(),
+        "district": district,
+    }
+
+
+def assert_matches(served, expected, path=""):
+    """Equal structures; floats (means) may differ in the last bits from summing in another order"""
+    if isinstance(expected, dict):
+        assert isinstance(served, dict) and set(served) == set(expected), (path, served, expected)
+        for key in expected:
+            assert_matches(served[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert isinstance(served, list) and len(served) == len(expected), (path, served, expected)
+        for i, (s, e) in enumerate(zip(served, expected)):
+            assert_matches(s, e, f"{path}[{i}]")
+    elif isinstance(expected, float):
+        assert served == expected or np.isclose(served, expected, rtol=1e-12, atol=0), (path, served, expected)
+    else:
+        assert served == expected, (path, served, expected)
+
+
+def test_endpoints_match_groupbys():
+    df, index = make_data()
+    # Crowd levels per district, like the original per-request qcut over the filtered rows
+    with serving(df, index, per_district=True) as client:
+        for district in ["All", *DISTRICTS]:
+            rows = rows_of(df, district)
+            for endpoint, reference in [("statistics", statistics), ("trends", trends), ("analytics", analytics)]:
+                response = client.get(f"/api/{endpoint}?district={district}")
+                assert response.status_code == 200, (endpoint, district, response.get_json())
+                assert_matches(response.get_json(), plain(reference(rows, district)), f"{endpoint}?district={district}")
+    print("✓ Statistics, trends and analytics from the cube match pandas groupbys over the raw rows")
+
+
+if __name__ == "__main__":
+    test_endpoints_match_groupbys()
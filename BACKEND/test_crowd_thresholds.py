@@ -0,0 +1,96 @@
+"""
+Crowd-level thresholds: searchsorted against saved tercile edges labels
+values exactly like pd.qcut, the cube labels every district with the
+training thresholds by default and with the district's own terciles when
+asked, and thresholds saved for another model file are not used.
+
+    python test_crowd_thresholds.py      (or: python -m pytest test_crowd_thresholds.py)
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+import app as backend
+from crowd_thresholds import inner_edges, load_for_model, save_thresholds
+from fixtures import make_data
+from utils.cube import AggregateCube, crowd_codes, label_crowd
+
+
+def skewed_data():
+    """Three districts whose biometric counts differ in scale, so their terciles differ"""
+    df, index = make_data()
+    scale = df["district"].map({"Guntur": 1, "Krishna": 3, "Prakasam": 6}).astype(int)
+    df["bio_age_18_plus"] = df["bio_age_18_plus"] * scale
+    df["total_biometric"] = df["bio_age_5_17"] + df["bio_age_18_plus"]
+    return df, index
+
+
+def test_searchsorted_matches_qcut():
+    rng = np.random.default_rng(5)
+    for values in [rng.integers(0, 40, 10_000), rng.poisson(3, 10_000), rng.normal(20, 5, 10_000).round(1)]:
+        values = pd.Series(values)
+        _, bins = pd.qcut(values, q=3, retbins=True, duplicates="drop")
+        expected, _ = crowd_codes(values)
+        assert np.array_equal(label_crowd(values.to_numpy(), inner_edges(bins)), expected)
+    print("✓ searchsorted on the inner tercile edges labels like pd.qcut")
+
+
+def test_global_and_district_levels():
+    df, index = skewed_data()
+    thresholds = inner_edges(pd.qcut(df["total_biometric"], q=3, retbins=True)[1])
+    global_cube = AggregateCube(df, index, thresholds)
+    district_cube = AggregateCube(df, index, thresholds, per_district=True)
+
+    labels = label_crowd(df["total_biometric"].to_numpy(), thresholds)
+    for district, rows in index.items():
+        expected = np.bincount(labels[rows], minlength=3)
+        assert list(global_cube.select(district).crowd_distribution().values()) == expected.tolist()
+        own, _ = crowd_codes(df["total_biometric"].iloc[rows])
+        assert list(district_cube.select(district).crowd_distribution().values()) == np.bincount(own).tolist()
+    assert list(global_cube.thresholds) == ["All"]
+    # Small counts are Low everywhere under the global definition, not a third of each district
+    guntur, prakasam = global_cube.select("Guntur"), global_cube.select("Prakasam")
+    assert guntur.crowd_distribution()["High"] < guntur.total_records / 3
+    assert prakasam.crowd_distribution()["High"] > prakasam.total_records / 3
+    assert global_cube.select("All").crowd_distribution() == district_cube.select("All").crowd_distribution()
+    print("✓ Global thresholds label every district alike, per-district terciles are an option")
+
+
+def test_thresholds_tied_to_model():
+    with tempfile.TemporaryDirectory() as directory:
+        model, path = os.path.join(directory, "model.pkl"), os.path.join(directory, "crowd_thresholds.json")
+        with open(model, "wb") as f:
+            f.write(b"model a")
+        save_thresholds(path, [10, 14], 1000, model)
+        assert load_for_model(path, model).tolist() == [10.0, 14.0]
+
+        originals = backend.THRESHOLDS_PATH, backend.MODEL_PATH
+        backend.THRESHOLDS_PATH, backend.MODEL_PATH = path, model
+        try:
+            assert backend.load_crowd_thresholds().tolist() == [10.0, 14.0]
+            with open(model, "wb") as f:
+                f.write(b"model b")
+            try:
+                load_for_model(path, model)
+            except ValueError as e:
+                assert "out of date" in str(e)
+            else:
+                raise AssertionError("expected ValueError")
+            # Stale or missing thresholds: the backend falls back to the terciles of its data
+            assert backend.load_crowd_thresholds() is None
+            backend.THRESHOLDS_PATH = os.path.join(directory, "missing.json")
+            assert backend.load_crowd_thresholds() is None
+        finally:
+            backend.THRESHOLDS_PATH, backend.MODEL_PATH = originals
+    print("✓ Thresholds are only used with the model file they were saved with")
+
+
+if __name__ == "__main__":
+    test_searchsorted_matches_qcut()
+    test_global_and_district_levels()
+    test_thresholds_tied_to_model()
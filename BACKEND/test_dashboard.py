@@ -0,0 +1,47 @@
+"""
+/api/dashboard: for any district and date window it returns exactly what
+/api/statistics, /api/analytics and /api/trends return for the same query,
+and the same errors for a bad window or an unknown district.
+
+    python test_dashboard.py      (or: python -m pytest test_dashboard.py)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import serving
+
+QUERIES = [
+    "",
+    "?district=All",
+    "?district=Krishna",
+    "?district=Guntur&start=2025-03-03&end=2025-03-09",
+    "?start=2025-06-01",
+]
+
+
+def test_matches_separate_endpoints():
+    with serving() as client:
+        for query in QUERIES:
+            response = client.get(f"/api/dashboard{query}")
+            assert response.status_code == 200, query
+            dashboard = response.get_json()
+            assert sorted(dashboard) == ["analytics", "statistics", "trends"]
+            for endpoint, payload in dashboard.items():
+                assert payload == client.get(f"/api/{endpoint}{query}").get_json(), (endpoint, query)
+    print("✓ /api/dashboard returns the statistics, analytics and trends payloads unchanged")
+
+
+def test_errors():
+    with serving() as client:
+        for query, status in [("?district=Nowhere", 404), ("?start=2025-03-09&end=2025-03-03", 400),
+                              ("?start=March", 400), ("?start=2030-01-01", 404)]:
+            response = client.get(f"/api/dashboard{query}")
+            assert response.status_code == status, query
+            assert response.get_json() == client.get(f"/api/trends{query}").get_json()
+    print("✓ Bad windows and unknown districts fail like the separate endpoints")
+
+
+if __name__ == "__main__":
+    test_matches_separate_endpoints()
+    test_errors()
@@ -0,0 +1,106 @@
+"""
+Date windows on the analytics endpoints: the rows found by binary search
+are exactly the rows a date mask would pick, windowed rollups match a
+direct computation over those rows (with full-history crowd labels), and a
+window covering everything answers exactly like no window.
+
+    python test_date_window.py      (or: python -m pytest test_date_window.py)
+"""
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from fixtures import make_data, serving
+from utils.cube import AggregateCube, crowd_codes
+from utils.partitions import DateIndex
+
+WINDOWS = [
+    (date(2025, 3, 3), date(2025, 3, 9)),
+    (date(2025, 6, 15), date(2025, 6, 15)),
+    (None, date(2025, 2, 1)),
+    (date(2025, 11, 1), None),
+    (date(2024, 1, 1), date(2024, 12, 31)),
+]
+
+
+def mask(df, start, end):
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= (df["date"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        keep &= (df["date"] <= pd.Timestamp(end)).to_numpy()
+    return keep
+
+
+def test_rows_match_a_date_mask():
+    df, index = make_data()
+    dates = DateIndex(df, index)
+    for district in index:
+        assert df["date"].iloc[index[district]].is_monotonic_increasing
+    for start, end in WINDOWS:
+        keep = mask(df, start, end)
+        assert np.array_equal(np.sort(dates.rows("All", start, end)), np.flatnonzero(keep))
+        for district, partition in index.items():
+            rows = dates.rows(district, start, end)
+            expected = np.flatnonzero(keep[partition]) + partition.start
+            assert np.array_equal(np.arange(len(df))[rows], expected)
+    assert dates.rows("Nowhere", date(2025, 3, 1), None) is None
+    print("✓ Binary-searched windows match a boolean date mask")
+
+
+def test_windowed_rollups():
+    df, index = make_data()
+    cube, dates = AggregateCube(df, index, per_district=True), DateIndex(df, index)
+    labels_all, _ = crowd_codes(df["total_biometric"])
+
+    for start, end in WINDOWS[:4]:
+        keep = mask(df, start, end)
+        view = cube.select("All", dates.rows("All", start, end))
+        expected = df[keep]
+        assert view.total_records == len(expected)
+        assert view.total("total_biometric") == int(expected["total_biometric"].sum())
+        assert view.date_range() == (expected["date"].min(), expected["date"].max())
+        # Rows keep the crowd labels of the whole history
+        counts = np.bincount(labels_all[keep], minlength=3)
+        assert list(view.crowd_distribution().values()) == counts.tolist()
+
+        rows = index["Krishna"]
+        labels, _ = crowd_codes(df["total_biometric"].iloc[rows])
+        view = cube.select("Krishna", dates.rows("Krishna", start, end))
+        assert list(view.crowd_distribution().values()) == np.bincount(labels[keep[rows]], minlength=3).tolist()
+
+    # A window covering the whole history reuses the precomputed cells
+    everything = cube.select("Guntur", dates.rows("Guntur", date(2024, 1, 1), date(2026, 1, 1)))
+    assert everything.cells.equals(cube.select("Guntur").cells)
+    print("✓ Windowed rollups match the rows in the window, full windows use the cube")
+
+
+def test_endpoints():
+    with serving() as client:
+        for endpoint in ["statistics", "trends", "analytics"]:
+            full = client.get(f"/api/{endpoint}?district=Krishna").get_json()
+            covering = client.get(f"/api/{endpoint}?district=Krishna&start=2025-01-01&end=2025-12-31").get_json()
+            assert covering == full
+
+            week = client.get(f"/api/{endpoint}?start=2025-03-03&end=2025-03-09")
+            assert week.status_code == 200 and week.get_json()["total_records" if endpoint != "analytics" else "total_enrolment"] > 0
+
+            assert client.get(f"/api/{endpoint}?start=2025-03-09&end=2025-03-03").status_code == 400
+            assert client.get(f"/api/{endpoint}?start=March").status_code == 400
+            assert client.get(f"/api/{endpoint}?start=2030-01-01").status_code == 404
+            assert client.get(f"/api/{endpoint}?district=Nowhere&start=2025-03-01").status_code == 404
+
+        stats = client.get("/api/statistics?start=2025-03-03&end=2025-03-09").get_json()
+        assert stats["date_range"] == {"start": "2025-03-03", "end": "2025-03-09"}
+    print("✓ start/end on /api/statistics, /api/trends and /api/analytics")
+
+
+if __name__ == "__main__":
+    test_rows_match_a_date_mask()
+    test_windowed_rollups()
+    test_endpoints()
@@ -0,0 +1,174 @@
+"""
+Forecast grid: every district x day is scored from that weekday's averages
+exactly like a /api/predict input, lookups return the requested days, a
+stored grid is only reused for the same key, and /api/forecast rolls the
+grid over to a new day without reloading the rest of the serving state,
+retrying a failed roll-over the next day.
+
+    python test_forecast.py      (or: python -m pytest test_forecast.py)
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from feature_encoder import NUMERIC_FEATURES, FeatureEncoder
+from utils.forecast import DAY_NAMES, ForecastGrid, build_forecast_grid, forecast_key
+
+SETTINGS = ["MODEL_PATH", "FEATURES_PATH", "BIO_DATA_PATH", "ENROL_DATA_PATH", "SNAPSHOT_PATH",
+            "FORECAST_PATH", "DELTA_DIR", "date"]
+
+DISTRICTS = ["Guntur", "Krishna", "Prakasam"]
+FEATURES = NUMERIC_FEATURES + [f"day_of_week_{day}" for day in DAY_NAMES[1:]] + [f"district_{d}" for d in DISTRICTS[1:]]
+START = date(2026, 3, 30)
+
+
+class LinearModel:
+    """Deterministic stand-in for the classifier: softmax of three fixed projections"""
+
+    def __init__(self):
+        self.weights = np.random.default_rng(0).normal(0, 0.1, (len(FEATURES), 3))
+
+    def predict_proba(self, features):
+        scores = features @ self.weights
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+def make_averages():
+    rng = np.random.default_rng(1)
+    return {
+        district: {day: {column: int(rng.integers(0, 30)) for column in
+                         ["age_0_5", "age_5_17", "age_18_plus", "bio_age_5_17", "bio_age_18_plus"]}
+                   for day in DAY_NAMES}
+        for district in DISTRICTS
+    }
+
+
+def test_grid_matches_single_predictions():
+    model, encoder, averages = LinearModel(), FeatureEncoder(FEATURES), make_averages()
+    grid = build_forecast_grid(model, encoder, averages, START, 30, workers=2)
+    assert grid.districts == DISTRICTS and grid.days == 30 and grid.end == START + timedelta(days=29)
+
+    for district in DISTRICTS:
+        for offset in [0, 6, 29]:
+            day = START + timedelta(days=offset)
+            counts = {k: float(v) for k, v in averages[district][DAY_NAMES[day.weekday()]].items()}
+            row = {
+                "year": day.year, "month": day.month, "day": day.day, **counts,
+                "total_enrolment": counts["age_0_5"] + counts["age_5_17"] + counts["age_18_plus"],
+                "total_biometric": counts["bio_age_5_17"] + counts["bio_age_18_plus"],
+                "day_of_week": DAY_NAMES[day.weekday()], "district": district,
+            }
+            expected = model.predict_proba(encoder.encode_one(row))[0]
+            assert np.allclose(grid.probabilities[grid.rows[district], offset], expected, rtol=1e-12)
+            assert grid.levels[grid.rows[district], offset] == expected.argmax()
+
+    # Splitting the work across threads does not change the result
+    serial = build_forecast_grid(model, encoder, averages, START, 30, workers=1)
+    assert np.array_equal(serial.probabilities, grid.probabilities)
+    print(f"✓ {len(DISTRICTS)} districts x {grid.days} days match single predictions")
+
+
+def test_lookup_and_storage():
+    grid = build_forecast_grid(LinearModel(), FeatureEncoder(FEATURES), make_averages(), START, 14)
+
+    days = grid.lookup("Krishna", START + timedelta(days=2), START + timedelta(days=4))
+    assert [d["date"] for d in days] == ["2026-04-01", "2026-04-02", "2026-04-03"]
+    assert days[0]["day_of_week"] == "Wednesday"
+    assert all(sum(d["probabilities"].values()) > 0.999 for d in days)
+
+    counts = grid.level_counts(START, START + timedelta(days=6))
+    assert all(sum(levels.values()) == 7 for levels in counts.values())
+    assert grid.covers(START, grid.end) and not grid.covers(START - timedelta(days=1), START)
+
+    key = forecast_key("model-a", make_averages(), START, 14)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "forecast_grid.npz")
+        ForecastGrid(grid.districts, grid.start, grid.levels, grid.probabilities, key).save(path)
+        loaded = ForecastGrid.load(path, key)
+        assert loaded.districts == grid.districts and loaded.start == START
+        assert np.array_equal(loaded.probabilities, grid.probabilities)
+        # A different model (or averages, or horizon) needs a new grid
+        assert ForecastGrid.load(path, forecast_key("model-b", make_averages(), START, 14)) is None
+    print("✓ Lookups, level counts and stored grid keys")
+
+
+def test_rollover_rebuilds_only_the_grid():
+    import app as backend
+    from fixtures import write_fixture
+
+    def days_ahead(days):
+        class Later(date):
+            @classmethod
+            def today(cls):
+                return date.today() + timedelta(days=days)
+        return Later
+
+    Tomorrow = days_ahead(1)
+
+    originals = {name: getattr(backend, name) for name in SETTINGS}
+    previous_state = backend.serving_state
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_fixture(directory)
+        os.replace(paths["model_a"], paths["model"])
+        backend.MODEL_PATH, backend.FEATURES_PATH = paths["model"], paths["features"]
+        backend.BIO_DATA_PATH, backend.ENROL_DATA_PATH = paths["bio"], paths["enrol"]
+        backend.SNAPSHOT_PATH = os.path.join(directory, "merged_snapshot.parquet")
+        backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+        backend.DELTA_DIR = os.path.join(directory, "deltas")
+        try:
+            assert backend.reloader.reload()
+            client = backend.app.test_client()
+            before = backend.serving_state
+            assert client.get("/api/forecast?district=Guntur").get_json()["start"] == date.today().isoformat()
+
+            # The date moves on while the response is cached
+            backend.date = Tomorrow
+            client.get("/api/forecast?district=Guntur")
+            deadline = time.monotonic() + 30
+            while backend.serving_state is before and time.monotonic() < deadline:
+                time.sleep(0.01)
+            after = backend.serving_state
+            assert after.version == before.version + 1
+            assert after.forecast.start == Tomorrow.today()
+            assert client.get("/api/forecast?district=Guntur").get_json()["start"] == Tomorrow.today().isoformat()
+            # Only the grid was rebuilt
+            for part in ["model", "encoder", "merged_data", "district_index", "date_index", "aggregate_cube"]:
+                assert getattr(after, part) is getattr(before, part), part
+
+            # A roll that fails is retried the next day, not on every request that day,
+            # whatever reload failure last_error holds meanwhile
+            backend.date = days_ahead(2)
+            backend.FORECAST_PATH = os.path.join(directory, "missing", "forecast_grid.npz")
+            client.get("/api/forecast?district=Guntur")
+            failed = backend.reloader._thread
+            failed.join()
+            assert backend.serving_state is after and backend.reloader.last_error is not None
+            client.get("/api/forecast?district=Guntur")
+            assert backend.reloader._thread is failed
+
+            backend.date = days_ahead(3)
+            backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+            client.get("/api/forecast?district=Guntur")
+            backend.reloader._thread.join()
+            assert backend.serving_state.forecast.start == backend.date.today()
+        finally:
+            if backend.reloader._thread is not None:
+                backend.reloader._thread.join()
+            for name, setting in originals.items():
+                setattr(backend, name, setting)
+            backend.publish_state(previous_state)
+    print("✓ A new day rebuilds the forecast grid behind a cached response, sharing the rest of the state")
+    print("✓ A failed roll-over is retried the next day")
+
+
+if __name__ == "__main__":
+    test_grid_matches_single_predictions()
+    test_lookup_and_storage()
+    test_rollover_rebuilds_only_the_grid()
@@ -0,0 +1,259 @@
+"""
+Incremental ingestion: a delta sent to /api/admin/ingest is cleaned like
+clean_datasets.py, only new (date, state, district, pincode) keys are added
+as a segment that requests read together with the loaded data, an extract
+that fills in counts a loaded row lacks is merged into it, keys loaded with
+other counts are rejected as a conflict, and once the segments are
+compacted the data and indexes match a full reload that reads the stored
+delta parts back.
+
+Runs in-process against small generated files, no server or real data needed:
+    python test_ingest.py      (or: python -m pytest test_ingest.py)
+"""
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app as backend
+from feature_engineering import DAY_NAMES
+from utils.cube import PINCODE_CELL_KEYS, SUM_COLUMNS, add_cells, merge_cells, pincode_levels
+from fixtures import fixture_backend
+
+URLS = ["/api/trends", "/api/trends?district=YSR Kadapa", "/api/pincode/52000", "/api/pincode/516",
+        "/api/statistics?start=2025-04-28&end=2025-05-02", "/api/district-averages/Krishna",
+        "/api/districts", "/api/records?format=csv&district=Krishna"]
+
+
+def make_delta(loaded_bio):
+    """
+    Five new days for the fixture's pincodes, plus rows the cleaning and key
+    checks must catch; loaded_bio is the fixture's biometric CSV
+    """
+    rng = np.random.default_rng(11)
+    dates = pd.date_range("2025-05-01", periods=5).strftime("%d-%m-%Y")
+    rows = pd.DataFrame({
+        "date": np.repeat(dates, 20),
+        "state": "Andhra Pradesh",
+        "district": np.tile(np.repeat(["Guntur", "Krishna", "Prakasam"], [7, 7, 6]), len(dates)),
+        "pincode": np.tile(np.arange(520001, 520021), len(dates)),
+    })
+    extra = pd.DataFrame({
+        "date": ["02-05-2025", "03-05-2025", "03-05-2025"],
+        "state": "Andhra Pradesh",
+        # A Telangana district, and an old name for a district not seen yet
+        "district": ["Hyderabad", "Cuddapah", "Cuddapah"],
+        "pincode": [500001, 516001, 516002],
+    })
+    bio = pd.concat([rows, extra]).assign(bio_age_5_17=rng.poisson(4, len(rows) + 3),
+                                          bio_age_17_=rng.poisson(9, len(rows) + 3))
+    # A loaded key sent again with the same biometric counts
+    loaded = pd.read_csv(loaded_bio)
+    bio = pd.concat([loaded.head(1), bio.set_axis(loaded.columns, axis=1)])
+    enrol = rows.sample(frac=0.4, random_state=3).assign(age_0_5=2, age_5_17=1, age_18_greater=4)
+    return bio.to_csv(index=False).encode(), enrol.to_csv(index=False).encode()
+
+
+def test_add_cells_matches_regrouping():
+    rng = np.random.default_rng(2)
+
+    def cells(rows):
+        dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 90, rows), unit="D")
+        keyed = pd.DataFrame({
+            "date": dates,
+            "pincode": rng.integers(520001, 520040, rows),
+            "district": pd.Categorical(rng.choice(["Guntur", "Krishna", "NTR"], rows), categories=["Guntur", "Krishna", "NTR"]),
+            "year": dates.year, "month": dates.month,
+            "day_of_week": pd.Categorical(dates.day_name(), categories=DAY_NAMES),
+            "crowd_district": rng.integers(0, 3, rows).astype("int8"),
+            **{col: rng.integers(0, 20, rows) for col in SUM_COLUMNS},
+        })
+        return pincode_levels(keyed)
+
+    old, new = cells(5000), cells(300)
+    for digits in old:
+        merged = add_cells(old[digits], new[digits], PINCODE_CELL_KEYS)
+        regrouped = merge_cells(pd.concat([old[digits], new[digits]], ignore_index=True), PINCODE_CELL_KEYS)
+        pd.testing.assert_frame_equal(merged, regrouped)
+    print("✓ Adding cells matches grouping everything again")
+
+
+def post_delta(client, bio=None, enrol=None, token="test-token"):
+    files = {name: (io.BytesIO(body), f"{name}.csv") for name, body in [("bio", bio), ("enrol", enrol)] if body}
+    return client.post("/api/admin/ingest", data=files, headers={"X-Admin-Token": token},
+                       content_type="multipart/form-data")
+
+
+def answer(client, url):
+    response = client.get(url)
+    return response.get_json() if response.is_json else response.get_data(as_text=True)
+
+
+
+def test_ingest_matches_full_reload():
+    with fixture_backend() as (client, paths):
+        before = backend.serving_state
+        bio, enrol = make_delta(paths["bio"])
+
+        assert post_delta(client, bio, enrol, token="wrong").status_code == 403
+        response = post_delta(client, bio, enrol)
+        report = response.get_json()
+        assert response.status_code == 200, report
+        assert report["biometric"] == {"rows": 104, "removed": 1}
+        assert report["already_present"] == 1 and report["added"] == 102
+        assert report["segments"] == 1
+        assert len(os.listdir(backend.DELTA_DIR)) == 1
+
+        # Added as a segment: the loaded data, its indexes and the forecast are untouched
+        incremental = backend.serving_state
+        assert incremental.version == before.version + 1
+        for part in ["merged_data", "district_index", "date_index", "aggregate_cube", "forecast"]:
+            assert getattr(incremental, part) is getattr(before, part), part
+        assert len(incremental.segments[0].merged_data) == 102
+        assert incremental.record_count() == before.record_count() + 102
+        assert "YSR Kadapa" in incremental.districts()
+        answers = {url: answer(client, url) for url in URLS}
+
+        # Sending the same delta again adds nothing
+        again = post_delta(client, bio, enrol)
+        assert again.status_code == 400 and "already present" in again.get_json()["error"]
+
+        # Folded in: same answers, crowd levels included, and the forecast covers the new district
+        assert backend.reloader.apply(backend.compact_segments, reads_files=False)
+        compacted = backend.serving_state
+        assert compacted.segments == [] and compacted.record_count() == incremental.record_count()
+        assert "YSR Kadapa" in compacted.forecast.rows
+        for url, expected in answers.items():
+            assert answer(client, url) == expected, url
+
+        # A full reload merges the CSVs and reads the stored part back
+        assert backend.reloader.reload()
+        full = backend.serving_state
+        assert full.merged_data.equals(compacted.merged_data)
+        assert full.merged_data.dtypes.equals(compacted.merged_data.dtypes)
+        assert compacted.merged_data["day_of_week"].cat.categories.tolist() == DAY_NAMES
+        assert full.district_index == compacted.district_index
+        assert np.array_equal(full.date_index.sorted_dates, compacted.date_index.sorted_dates)
+        for url, expected in answers.items():
+            fresh = answer(client, url)
+            if isinstance(fresh, dict):
+                # Crowd levels are re-derived from every row on a full reload, the rest must agree
+                fresh.pop("crowd_distribution", None), expected.pop("crowd_distribution", None)
+            assert fresh == expected, url
+        for digits, cells in full.aggregate_cube.pincode_levels.items():
+            folded = compacted.aggregate_cube.pincode_levels[digits]
+            assert cells["records"].sum() == folded["records"].sum()
+    print(f"✓ Ingested {report['added']} new rows in {report['seconds'] * 1000:.0f} ms, matching a full reload")
+
+
+def test_separate_extracts_merge():
+    with fixture_backend() as (client, paths):
+        enrol = b"date,state,district,pincode,age_0_5,age_5_17,age_18_greater\n01-06-2025,Andhra Pradesh,Guntur,520001,1,2,3\n"
+        bio = b"date,state,district,pincode,bio_age_5_17,bio_age_17_\n01-06-2025,Andhra Pradesh,Guntur,520001,4,9\n"
+        before = backend.serving_state
+        assert post_delta(client, enrol=enrol).get_json()["added"] == 1
+        urls = ["/api/statistics?district=Guntur", "/api/pincode/520001",
+                "/api/trends?start=2025-06-01&end=2025-06-01", "/api/records?start=2025-06-01&end=2025-06-01"]
+        enrolment_only = {url: answer(client, url) for url in urls}
+
+        # The biometric extract for the same day arrives in a later upload
+        response = post_delta(client, bio)
+        report = response.get_json()
+        assert response.status_code == 200, report
+        assert report["merged"] == 1 and report["added"] == 0 and report["already_present"] == 0
+        merged = backend.serving_state
+        assert merged.record_count() == before.record_count() + 1
+        records = [line for line in answer(client, "/api/records?start=2025-06-01&end=2025-06-01").splitlines()]
+        assert len(records) == 1 and '"age_18_plus":3' in records[0] and '"bio_age_18_plus":9' in records[0]
+        answers = {url: answer(client, url) for url in urls}
+        assert answers["/api/pincode/520001"]["total_records"] == enrolment_only["/api/pincode/520001"]["total_records"]
+        assert answers["/api/pincode/520001"]["total_biometric"] == enrolment_only["/api/pincode/520001"]["total_biometric"] + 13
+
+        # Both extracts again: nothing new
+        assert "already present" in post_delta(client, bio, enrol).get_json()["error"]
+
+        # Enrolment counts for a key the loaded CSVs only have biometric counts for
+        keys = ["date", "state", "district", "pincode"]
+        loaded = pd.read_csv(paths["bio"]).merge(pd.read_csv(paths["enrol"]), on=keys, how="left", indicator=True)
+        missing = loaded.loc[loaded["_merge"] == "left_only", keys].head(1)
+        late = missing.assign(age_0_5=5, age_5_17=0, age_18_greater=7).to_csv(index=False).encode()
+        assert post_delta(client, enrol=late).get_json()["merged"] == 1
+        urls.append(f"/api/statistics?district={missing['district'].iloc[0]}")
+        answers = {url: answer(client, url) for url in urls}
+
+        # Compacted and fully reloaded, the merged row has taken the place of the first one
+        assert backend.reloader.apply(backend.compact_segments, reads_files=False)
+        compacted = backend.serving_state
+        assert compacted.record_count() == merged.record_count() == len(compacted.merged_data)
+        for url, expected in answers.items():
+            assert answer(client, url) == expected, url
+        assert backend.reloader.reload()
+        full = backend.serving_state
+        pd.testing.assert_frame_equal(full.merged_data, compacted.merged_data)
+        for url, expected in answers.items():
+            fresh = answer(client, url)
+            if isinstance(fresh, dict):
+                fresh.pop("crowd_distribution", None), expected.pop("crowd_distribution", None)
+            assert fresh == expected, url
+    print("✓ An extract that fills in a loaded key's other source is merged into that row")
+
+
+def test_conflicting_counts_rejected():
+    with fixture_backend() as (client, paths):
+        version = backend.serving_state.version
+        # Other counts for a key of the loaded CSVs, next to a new key that is not added either
+        loaded = pd.read_csv(paths["bio"]).head(1)
+        changed = loaded.assign(bio_age_17_=loaded["bio_age_17_"] + 1)
+        fresh = loaded.assign(date="02-06-2025")
+        response = post_delta(client, pd.concat([changed, fresh]).to_csv(index=False).encode())
+        assert response.status_code == 409 and "1 delta rows" in response.get_json()["error"]
+        assert backend.serving_state.version == version
+        assert not os.path.exists(backend.DELTA_DIR)
+    print("✓ Keys loaded with other counts are rejected as a conflict, nothing is ingested")
+
+
+def test_repeated_keys_in_one_delta():
+    with fixture_backend() as (client, paths):
+        before = backend.serving_state
+        row = pd.read_csv(paths["bio"]).head(1).assign(date="03-06-2025")
+        # An exact copy is dropped by the cleaning, the key is added once
+        report = post_delta(client, pd.concat([row, row]).to_csv(index=False).encode()).get_json()
+        assert report["added"] == 1 and report["biometric"]["removed"] == 1
+        assert backend.serving_state.record_count() == before.record_count() + 1
+
+        other = row.assign(date="04-06-2025")
+        clashing = pd.concat([other, other.assign(bio_age_17_=other["bio_age_17_"] + 1)])
+        response = post_delta(client, clashing.to_csv(index=False).encode())
+        assert response.status_code == 409 and "04-06-2025" in response.get_json()["error"]
+        assert backend.serving_state.record_count() == before.record_count() + 1
+    print("✓ A key repeated within one delta is added once, or rejected if its counts differ")
+
+
+def test_segments_compact_in_background():
+    with fixture_backend() as (client, paths):
+        backend.COMPACT_SEGMENTS = 2
+        before = backend.serving_state
+        loaded = pd.read_csv(paths["bio"]).head(3)
+        for day in ["01-07-2025", "02-07-2025"]:
+            report = post_delta(client, loaded.assign(date=day).to_csv(index=False).encode()).get_json()
+            assert report["added"] == 3
+        assert report["segments"] == 2
+        backend.reloader._thread.join()
+
+        compacted = backend.serving_state
+        assert compacted.version == report["version"] + 1
+        assert compacted.segments == [] and compacted.record_count() == before.record_count() + 6
+        assert compacted.merged_data["date"].max() == pd.Timestamp("2025-07-02")
+    print("✓ Segments are folded into the loaded data in the background")
+
+
+if __name__ == "__main__":
+    test_add_cells_matches_regrouping()
+    test_ingest_matches_full_reload()
+    test_separate_extracts_merge()
+    test_conflicting_counts_rejected()
+    test_repeated_keys_in_one_delta()
+    test_segments_compact_in_background()
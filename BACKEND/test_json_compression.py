@@ -0,0 +1,132 @@
+"""
+Fast JSON encoding and response compression: FastJSONProvider writes the
+same bytes as Flask's default provider for the endpoint payloads and for
+values where orjson's output differs, /api/predict (which carries nulls) is
+encoded by orjson, and large responses are gzipped for clients that accept
+it, with a weak ETag that still revalidates to 304.
+
+    python test_json_compression.py      (or: python -m pytest test_json_compression.py)
+"""
+import dataclasses
+import gzip
+import json
+import math
+import os
+import sys
+
+import numpy as np
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app as backend
+from fixtures import PAYLOAD, fixture_backend, serving
+from utils.json_provider import FastJSONProvider, maybe_different
+
+
+@dataclasses.dataclass
+class Reading:
+    district: str
+    value: float
+
+EDGE_CASES = [
+    {"b": 1, "a": [1.5, -0.0, 1e16, 1.5e-7, 123456789.125]},
+    {"nan": math.nan, "inf": math.inf, "none": None},
+    {"none": None, "nested": [{"array": np.array([1.5, np.nan])}], "float32": np.float32("-inf")},
+    {"none": None, "reading": Reading("Guntur", math.nan), "finite": Reading("Krishna", 2.5)},
+    {"city": "Visakhapatnam", "telugu": "విజయవాడ", "del": "\x7f", "quote": "\"\\/\n"},
+    {2: "two", 10: "ten", 1: "one"},
+    {"int": np.int64(7), "float": np.float32(0.5), "array": np.arange(3), "bool": np.bool_(True)},
+    [],
+    "text",
+    12,
+]
+
+
+def stdlib_body(obj, indent=False):
+    provider = DefaultJSONProvider(Flask(__name__))
+    provider.default = FastJSONProvider.default
+    dump_args = {"indent": 2} if indent else {"separators": (",", ":")}
+    return f"{provider.dumps(obj, **dump_args)}\n".encode()
+
+
+def test_matches_default_provider():
+    provider = FastJSONProvider(Flask(__name__))
+    for obj in EDGE_CASES:
+        for indent in (False, True):
+            assert provider.encode(obj, indent) == stdlib_body(obj, indent), (obj, indent)
+    print("✓ Edge cases encode to the default provider's bytes, compact and indented")
+
+
+def test_endpoint_bodies_unchanged():
+    with serving() as client:
+        for query in ["", "?district=Krishna", "?district=Guntur&start=2025-03-03&end=2025-03-09"]:
+            for endpoint in ["statistics", "analytics", "trends", "dashboard"]:
+                body = client.get(f"/api/{endpoint}{query}").data
+                payload = client.get(f"/api/{endpoint}{query}").get_json()
+                assert body == stdlib_body(payload), (endpoint, query)
+                # Encoded by orjson, not by the stdlib fallback
+                assert not maybe_different(body, payload), (endpoint, query)
+    print("✓ Endpoint bodies are byte-identical to the default provider's")
+
+
+def test_predict_encoded_by_orjson():
+    provider = backend.app.json
+    stdlib_calls = []
+    with fixture_backend() as (client, _):
+        # A district the model was trained on, so the warning is null. Request bodies
+        # are encoded up front, since json= would go through the provider as well
+        known = {**PAYLOAD, "district": "Krishna"}
+        requests = [("/api/predict", json.dumps(known)), ("/api/predict/batch", json.dumps([known, {}]))]
+        # The stdlib fallback goes through dumps(); record the calls
+        provider.dumps = lambda obj, **kwargs: stdlib_calls.append(obj) or FastJSONProvider.dumps(provider, obj, **kwargs)
+        try:
+            single, batch = [client.post(url, data=body, content_type="application/json") for url, body in requests]
+        finally:
+            del provider.dumps
+    assert single.status_code == 200 and b'"warning":null' in single.data
+    assert batch.status_code == 200 and b"null" in batch.data
+    assert stdlib_calls == []
+    for response in (single, batch):
+        assert response.data == stdlib_body(response.get_json())
+    print("✓ /api/predict bodies with null are encoded by orjson, byte-identical to the default provider's")
+
+
+def test_gzip_negotiation():
+    with serving() as client:
+        plain = client.get("/api/dashboard")
+        assert "Content-Encoding" not in plain.headers
+        assert len(plain.data) >= backend.COMPRESS_MIN_BYTES
+        compressed = client.get("/api/dashboard", headers={"Accept-Encoding": "gzip, deflate"})
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in compressed.headers["Vary"]
+        assert gzip.decompress(compressed.data) == plain.data
+        refused = client.get("/api/dashboard", headers={"Accept-Encoding": "gzip;q=0"})
+        assert "Content-Encoding" not in refused.headers and refused.data == plain.data
+
+        small = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+        assert len(small.data) < backend.COMPRESS_MIN_BYTES
+        assert "Content-Encoding" not in small.headers
+    print("✓ Large JSON responses are gzipped only for clients that accept it")
+
+
+def test_weak_etag_revalidates():
+    with serving() as client:
+        plain = client.get("/api/dashboard")
+        etag, weak = plain.get_etag()
+        assert etag and not weak
+        compressed = client.get("/api/dashboard", headers={"Accept-Encoding": "gzip"})
+        assert compressed.get_etag() == (etag, True)
+        for encoding in ["gzip", "identity"]:
+            revalidated = client.get("/api/dashboard", headers={"Accept-Encoding": encoding,
+                                                                "If-None-Match": compressed.headers["ETag"]})
+            assert revalidated.status_code == 304, encoding
+    print("✓ Compressed responses carry a weak ETag that still revalidates to 304")
+
+
+if __name__ == "__main__":
+    test_matches_default_provider()
+    test_endpoint_bodies_unchanged()
+    test_predict_encoded_by_orjson()
+    test_gzip_negotiation()
+    test_weak_etag_revalidates()
@@ -0,0 +1,95 @@
+"""
+Shared merged-data snapshot: load_merged_dataset() merges the raw CSVs on
+the first call and writes the snapshot, later calls read it back unchanged,
+and a change to either CSV rebuilds it. The backend goes through the same
+function, so it writes the snapshot the ML scripts read and vice versa.
+
+Runs on small generated files, no server or real data needed:
+    python test_merged_snapshot.py      (or: python -m pytest test_merged_snapshot.py)
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app as backend
+from feature_engineering import load_merged_data, load_merged_dataset
+
+
+def write_csvs(directory, days=20):
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2025-03-01", periods=days).strftime("%d-%m-%Y")
+    rows = pd.DataFrame({
+        "date": np.repeat(dates, 6),
+        "state": "Andhra Pradesh",
+        "district": np.tile(["Guntur", "Guntur", "Krishna", "Krishna", "Prakasam", "Prakasam"], days),
+        "pincode": np.tile(np.arange(522001, 522007), days),
+    })
+    bio = rows.assign(bio_age_5_17=rng.poisson(4, len(rows)), bio_age_17_=rng.poisson(9, len(rows)))
+    enrol = rows.sample(frac=0.4, random_state=1).assign(age_0_5=1, age_5_17=2, age_18_greater=3)
+    paths = [os.path.join(directory, "biometric data.csv"), os.path.join(directory, "enrolnment data.csv")]
+    bio.to_csv(paths[0], index=False)
+    enrol.to_csv(paths[1], index=False)
+    return paths, len(bio), len(enrol)
+
+
+def test_merges_once_then_reads_snapshot():
+    with tempfile.TemporaryDirectory() as directory:
+        (bio_path, enrol_path), bio_rows, enrol_rows = write_csvs(directory)
+        snapshot_path = os.path.join(directory, "merged_snapshot.parquet")
+
+        merged, info = load_merged_dataset(bio_path, enrol_path, snapshot_path)
+        assert not info["cached"] and os.path.exists(snapshot_path)
+        assert info["source_rows"] == {"biometric": bio_rows, "enrolment": enrol_rows}
+        pd.testing.assert_frame_equal(merged, load_merged_data(bio_path, enrol_path))
+
+        cached, cached_info = load_merged_dataset(bio_path, enrol_path, snapshot_path)
+        assert cached_info["cached"]
+        assert cached_info["fingerprint"] == info["fingerprint"]
+        assert cached_info["source_rows"] == info["source_rows"]
+        pd.testing.assert_frame_equal(cached, merged)
+        assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    print("✓ First load merges and writes the snapshot, the next reads it back unchanged")
+
+
+def test_changed_csv_rebuilds():
+    with tempfile.TemporaryDirectory() as directory:
+        (bio_path, enrol_path), _, _ = write_csvs(directory)
+        snapshot_path = os.path.join(directory, "merged_snapshot.parquet")
+        before, _ = load_merged_dataset(bio_path, enrol_path, snapshot_path)
+
+        write_csvs(directory, days=25)
+        after, info = load_merged_dataset(bio_path, enrol_path, snapshot_path)
+        assert not info["cached"]
+        assert len(after) > len(before)
+        pd.testing.assert_frame_equal(after, load_merged_data(bio_path, enrol_path))
+        assert load_merged_dataset(bio_path, enrol_path, snapshot_path)[1]["cached"]
+    print("✓ Changing a source CSV rebuilds the snapshot")
+
+
+def test_backend_shares_snapshot():
+    previous = backend.BIO_DATA_PATH, backend.ENROL_DATA_PATH, backend.SNAPSHOT_PATH, backend.DELTA_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        (bio_path, enrol_path), _, _ = write_csvs(directory)
+        snapshot_path = os.path.join(directory, "merged_snapshot.parquet")
+        # Written by a script, read by the backend
+        merged, info = load_merged_dataset(bio_path, enrol_path, snapshot_path)
+        try:
+            backend.BIO_DATA_PATH, backend.ENROL_DATA_PATH = bio_path, enrol_path
+            backend.SNAPSHOT_PATH = snapshot_path
+            backend.DELTA_DIR = os.path.join(directory, "deltas")
+            df, fingerprint = backend.load_data()
+        finally:
+            backend.BIO_DATA_PATH, backend.ENROL_DATA_PATH, backend.SNAPSHOT_PATH, backend.DELTA_DIR = previous
+        assert fingerprint == info["fingerprint"]
+        pd.testing.assert_frame_equal(df, merged)
+    print("✓ The backend loads the snapshot the scripts wrote")
+
+
+if __name__ == "__main__":
+    test_merges_once_then_reads_snapshot()
+    test_changed_csv_rebuilds()
+    test_backend_shares_snapshot()
@@ -0,0 +1,159 @@
+"""
+/api/metrics: request counts, 5xx errors and latency histograms per route
+pattern, stage timings of the predict path, valid Prometheus text output,
+and an instrumentation overhead within OVERHEAD_BUDGET_US per request.
+
+Runs in-process against small generated files, no server or real data needed:
+    python test_metrics.py      (or: python -m pytest test_metrics.py)
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app as backend
+from fixtures import PAYLOAD, write_fixture
+from utils.metrics import Metrics
+from utils.state import ServingState
+
+SETTINGS = ["MODEL_PATH", "FEATURES_PATH", "BIO_DATA_PATH", "ENROL_DATA_PATH", "SNAPSHOT_PATH",
+            "FORECAST_PATH", "DELTA_DIR"]
+# Request hooks plus the four predict stage laps, per request
+OVERHEAD_BUDGET_US = 25
+SAMPLE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+
+
+def parse(text):
+    """{(name, frozenset of labels): value} for every sample, checking the line format on the way"""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        pairs = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels))
+        samples[name, pairs] = float(value)
+    return samples
+
+
+def value(samples, name, **labels):
+    return samples.get((name, frozenset(labels.items())), 0)
+
+
+def test_histogram_format():
+    metrics = Metrics()
+    for seconds in [0.0004, 0.001, 0.003, 0.2, 12.0]:
+        metrics.observe_request("/api/trends", "GET", 200, seconds)
+    metrics.observe_request("/api/trends", "GET", 500, 0.002)
+    metrics.observe_request('/api/"odd"\\route', "GET", 404, 0.002)
+    samples = parse(metrics.render())
+
+    name = "identiflow_http_request_duration_seconds"
+    buckets = [(float(dict(labels)["le"]), count) for (sample, labels), count in samples.items()
+               if sample == name + "_bucket" and dict(labels)["route"] == "/api/trends"]
+    buckets.sort()
+    counts = [count for _, count in buckets]
+    assert counts == sorted(counts), "buckets must be cumulative"
+    # Bounds are inclusive: 0.001 falls in le="0.001"
+    assert dict(buckets)[0.001] == 2 and dict(buckets)[0.0025] == 3 and buckets[-1] == (float("inf"), 6)
+    assert value(samples, name + "_count", route="/api/trends", method="GET") == 6
+    assert abs(value(samples, name + "_sum", route="/api/trends", method="GET") - 12.2064) < 1e-9
+    assert value(samples, "identiflow_http_request_errors_total", route="/api/trends", method="GET") == 1
+    assert value(samples, "identiflow_http_requests_total", route='/api/\\"odd\\"\\\\route', method="GET", status="404") == 1
+    print("✓ Cumulative buckets, sums, counts and escaped labels")
+
+
+def test_metrics_endpoint():
+    originals = {name: getattr(backend, name) for name in SETTINGS}
+    previous_state = backend.serving_state
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_fixture(directory)
+        os.replace(paths["model_a"], paths["model"])
+        backend.MODEL_PATH, backend.FEATURES_PATH = paths["model"], paths["features"]
+        backend.BIO_DATA_PATH, backend.ENROL_DATA_PATH = paths["bio"], paths["enrol"]
+        backend.SNAPSHOT_PATH = os.path.join(directory, "missing.parquet")
+        backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+        backend.DELTA_DIR = os.path.join(directory, "deltas")
+        try:
+            assert backend.reloader.reload()
+            client = backend.app.test_client()
+            backend.metrics.reset()
+
+            for _ in range(3):
+                assert client.post("/api/predict", json=PAYLOAD).status_code == 200
+            assert client.post("/api/predict", json={"month": 1}).status_code == 400
+            # Invalid inputs get their own error entry, the batch still succeeds
+            bad_inputs = [{}, {"month": None}, {**PAYLOAD, "month": None}, {**PAYLOAD, "day": [15]},
+                          {**PAYLOAD, "month": float("inf")}, {**PAYLOAD, "age_0_5": "inf"},
+                          {**PAYLOAD, "bio_age_5_17": "nan"}]
+            batch = client.post("/api/predict/batch", json=[PAYLOAD, *bad_inputs])
+            assert batch.status_code == 200
+            assert batch.get_json()["errors"] == len(bad_inputs)
+            results = batch.get_json()["results"]
+            assert results[0]["success"]
+            assert all(not result["success"] and result["error"] for result in results[1:])
+            assert client.get("/api/pincode/520001").status_code == 200
+            assert client.get("/api/pincode/52x").status_code == 400
+            assert client.get("/api/no-such-route").status_code == 404
+            # No model: a 500 that counts as an error
+            backend.serving_state = ServingState(version=previous_state.version + 99)
+            assert client.get("/api/model-info").status_code == 500
+
+            response = client.get("/api/metrics")
+            assert response.status_code == 200
+            assert response.content_type.startswith("text/plain; version=0.0.4")
+            samples = parse(response.get_data(as_text=True))
+        finally:
+            for name, setting in originals.items():
+                setattr(backend, name, setting)
+            backend.publish_state(previous_state)
+
+    requests = "identiflow_http_requests_total"
+    assert value(samples, requests, route="/api/predict", method="POST", status="200") == 3
+    assert value(samples, requests, route="/api/predict", method="POST", status="400") == 1
+    assert value(samples, requests, route="/api/pincode/<pincode>", method="GET", status="200") == 1
+    assert value(samples, requests, route="/api/pincode/<pincode>", method="GET", status="400") == 1
+    assert value(samples, requests, route="unmatched", method="GET", status="404") == 1
+    assert value(samples, "identiflow_http_request_errors_total", route="/api/model-info", method="GET") == 1
+    assert value(samples, "identiflow_http_request_errors_total", route="/api/predict", method="POST") == 0
+    assert value(samples, "identiflow_http_request_duration_seconds_count", route="/api/predict", method="POST") == 4
+
+    stages = "identiflow_predict_stage_duration_seconds_count"
+    assert value(samples, stages, route="/api/predict", stage="validate") == 4
+    for stage in ["encode", "infer", "serialize"]:
+        assert value(samples, stages, route="/api/predict", stage=stage) == 3
+        assert value(samples, stages, route="/api/predict/batch", stage=stage) == 1
+    print("✓ /api/metrics counts requests per route pattern, 5xx errors and predict stages")
+
+
+def test_overhead_within_budget():
+    """What a /api/predict request pays for metrics: both request hooks and four stage laps"""
+    metrics, backend.metrics = backend.metrics, Metrics()
+    response = backend.app.response_class("{}", mimetype="application/json")
+    rounds = 20_000
+    try:
+        with backend.app.test_request_context("/api/predict", method="POST"):
+            best = float("inf")
+            for _ in range(5):
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    backend.start_request_timer()
+                    timer = backend.metrics.stage_timer("/api/predict")
+                    for stage in ("validate", "encode", "infer", "serialize"):
+                        timer.lap(stage)
+                    backend.record_request_metrics(response)
+                best = min(best, (time.perf_counter() - start) / rounds * 1e6)
+        assert backend.metrics.requests["/api/predict", "POST", "200"] == 5 * rounds
+    finally:
+        backend.metrics = metrics
+    assert best < OVERHEAD_BUDGET_US, f"{best:.1f} us per request, budget {OVERHEAD_BUDGET_US} us"
+    print(f"✓ Instrumentation costs {best:.1f} us per predict request (budget {OVERHEAD_BUDGET_US} us)")
+
+
+if __name__ == "__main__":
+    test_histogram_format()
+    test_metrics_endpoint()
+    test_overhead_within_budget()
@@ -0,0 +1,58 @@
+"""
+Pincode drill-down: /api/pincode/<pincode> and its prefix rollups match a
+direct computation over the raw rows of those pincodes, at every prefix
+length, whether the prefix is pre-rolled-up or read from the pincode level.
+
+    python test_pincode.py      (or: python -m pytest test_pincode.py)
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from fixtures import make_data, serving
+from utils.cube import crowd_codes
+
+# Two districts, each with its own block of pincodes
+PINCODES = {"Guntur": [522001, 522002, 522019, 522101, 522601], "Krishna": [521001, 521002, 521137, 520001]}
+
+
+def test_pincodes_and_prefixes():
+    df, index = make_data(20_000, pincodes=PINCODES, days=200, seed=5)
+    with serving(df, index, version=4, per_district=True) as client:
+        labels = np.empty(len(df), dtype=np.int8)
+        for rows in index.values():
+            labels[rows], _ = crowd_codes(df["total_biometric"].iloc[rows])
+
+        for prefix in ["522001", "52200", "5221", "522", "52", "5"]:
+            body = client.get(f"/api/pincode/{prefix}").get_json()
+            selected = df["pincode"].astype(str).str.startswith(prefix).to_numpy()
+            rows = df[selected]
+            assert body["level"] == ("pincode" if len(prefix) == 6 else "prefix")
+            assert body["pincodes"] == sorted(rows["pincode"].unique().tolist())
+            assert body["districts"] == sorted(rows["district"].unique().tolist())
+            assert body["total_records"] == len(rows)
+            assert body["total_biometric"] == int(rows["total_biometric"].sum())
+            assert body["crowd_distribution"] == dict(zip(["High", "Low", "Medium"],
+                                                          np.bincount(labels[selected], minlength=3)[[2, 0, 1]].tolist()))
+            months = rows.groupby(rows["date"].dt.strftime("%Y-%m"))["total_enrolment"].sum()
+            assert {m["year_month"]: m["total_enrolment"] for m in body["monthly"]} == months.astype(float).to_dict()
+            means = rows.groupby("day_of_week", observed=True)["bio_age_18_plus"].mean().round(2)
+            assert {day: value["bio_age_18_plus"] for day, value in body["day_averages"].items()} == means.to_dict()
+        print("✓ Pincode and prefix rollups match the raw rows")
+
+
+def test_bad_and_unknown_pincodes():
+    with serving(*make_data(20_000, pincodes=PINCODES, days=200, seed=5), per_district=True) as client:
+        assert client.get("/api/pincode/530001").status_code == 404
+        assert client.get("/api/pincode/9").status_code == 404
+        for bad in ["52a", "5220011", "-52"]:
+            assert client.get(f"/api/pincode/{bad}").status_code == 400
+    print("✓ Unknown pincodes are 404, malformed ones 400")
+
+
+if __name__ == "__main__":
+    test_pincodes_and_prefixes()
+    test_bad_and_unknown_pincodes()
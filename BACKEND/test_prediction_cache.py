@@ -0,0 +1,103 @@
+"""
+Prediction memo cache: a repeated input is answered without scoring the
+model again, entries are bounded and evicted LRU, a new model never sees
+probabilities memoized for the old one, and states that only update the
+data keep the entries.
+
+    python test_prediction_cache.py      (or: python -m pytest test_prediction_cache.py)
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import PAYLOAD, fixture_backend
+from utils.prediction_cache import PredictionCache
+from utils.state import ServingState
+
+
+class CountingModel:
+    """Deterministic stand-in for the classifier that records every row it scores"""
+
+    def __init__(self, offset=0.0):
+        self.offset = offset
+        self.scored_rows = 0
+
+    def predict_proba(self, features):
+        self.scored_rows += len(features)
+        scores = np.column_stack([features.sum(axis=1), features[:, 0], np.full(len(features), self.offset)])
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+def test_repeats_are_not_scored():
+    cache = PredictionCache(maxsize=8)
+    state = ServingState(version=1, model=CountingModel(), model_digest="a")
+    features = np.array([[1.0, 2.0, 0.0], [3.0, 0.0, 1.0]])
+
+    first = cache.predict_proba(state, features)
+    again = cache.predict_proba(state, features)
+    single = cache.predict_proba(state, features[1:])
+    assert state.model.scored_rows == 2
+    assert np.array_equal(first, again) and np.array_equal(single[0], first[1])
+    assert np.array_equal(first, state.model.predict_proba(features))
+
+    # Duplicates inside one batch are scored once, -0.0 and 0.0 share an entry
+    state.model.scored_rows = 0
+    cache.predict_proba(state, np.array([[5.0, 0.0, 0.0], [5.0, -0.0, 0.0], [5.0, 0.0, 0.0]]))
+    assert state.model.scored_rows == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 5, stats
+    print(f"✓ Repeats served from memo, hit rate {stats['hit_rate']:.2f}")
+
+
+def test_eviction_and_model_versions():
+    cache = PredictionCache(maxsize=2)
+    old = ServingState(version=1, model=CountingModel(), model_digest="a")
+    rows = np.arange(9, dtype=np.float64).reshape(3, 3)
+
+    cache.predict_proba(old, rows)
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+
+    # Same input under a new model is scored by it
+    new = ServingState(version=2, model=CountingModel(offset=5.0), model_digest="b")
+    cached_old = cache.predict_proba(old, rows[2:])
+    fresh = cache.predict_proba(new, rows[2:])
+    assert new.model.scored_rows == 1
+    assert not np.array_equal(cached_old, fresh)
+
+    # A later state with the same model, e.g. after an ingest, reuses the entries
+    cache.predict_proba(new.replace(3), rows[2:])
+    assert new.model.scored_rows == 1
+
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
+    print("✓ LRU eviction and per-model entries")
+
+
+def test_data_updates_keep_predictions():
+    import app as backend
+
+    with fixture_backend() as (client, _):
+        assert client.post("/api/predict", json=PAYLOAD).status_code == 200
+        before = backend.prediction_cache.stats()
+        # A state with only its data parts replaced, like an ingest or a forecast roll-over
+        assert backend.reloader.apply(lambda version: backend.serving_state.replace(version), reads_files=False)
+        assert client.post("/api/predict", json=PAYLOAD).status_code == 200
+        after = backend.prediction_cache.stats()
+        assert after["hits"] == before["hits"] + 1 and after["misses"] == before["misses"]
+
+        # A reload of the same model file keeps them too, a new model file drops them
+        assert backend.reloader.reload()
+        assert backend.prediction_cache.stats()["size"] == after["size"] > 0
+        backend.publish_state(backend.serving_state.replace(backend.reloader.version, model_digest="retrained"))
+        assert backend.prediction_cache.stats()["size"] == 0
+    print("✓ Data-only states keep memoized predictions, a new model drops them")
+
+
+if __name__ == "__main__":
+    test_repeats_are_not_scored()
+    test_eviction_and_model_versions()
+    test_data_updates_keep_predictions()
@@ -0,0 +1,129 @@
+"""
+Opt-in request profiling: off unless PROFILING_ENABLED, only for admin
+requests that ask with X-Profile, reports of the top functions stored under
+the request id, and periodic folded stack dumps for flame graphs.
+
+Runs in-process against small generated files, no server or real data needed:
+    python test_profiling.py      (or: python -m pytest test_profiling.py)
+"""
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app as backend
+from fixtures import PAYLOAD, write_fixture
+from utils.profiling import RequestProfiler, StackDumpWindow
+
+SETTINGS = ["MODEL_PATH", "FEATURES_PATH", "BIO_DATA_PATH", "ENROL_DATA_PATH", "SNAPSHOT_PATH",
+            "FORECAST_PATH", "DELTA_DIR", "ADMIN_TOKEN", "PROFILING_ENABLED", "PROFILE_DIR"]
+ADMIN = {"X-Admin-Token": "test-token"}
+
+
+def test_disabled_by_default():
+    if os.environ.get("PROFILING_ENABLED") == "1":
+        return
+    assert not isinstance(backend.app.wsgi_app, RequestProfiler)
+    client = backend.app.test_client()
+    assert client.get("/api/admin/profiles/abc", headers=ADMIN).status_code == 404
+    assert client.post("/api/admin/profile/stacks", headers=ADMIN).status_code == 404
+    print("✓ Without PROFILING_ENABLED no middleware is installed and the endpoints are 404")
+
+
+def test_request_profiles():
+    originals = {name: getattr(backend, name) for name in SETTINGS}
+    previous_state = backend.serving_state
+    wsgi_app = backend.app.wsgi_app
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_fixture(directory)
+        os.replace(paths["model_a"], paths["model"])
+        profiles = os.path.join(directory, "profiles")
+        backend.MODEL_PATH, backend.FEATURES_PATH = paths["model"], paths["features"]
+        backend.BIO_DATA_PATH, backend.ENROL_DATA_PATH = paths["bio"], paths["enrol"]
+        backend.SNAPSHOT_PATH = os.path.join(directory, "missing.parquet")
+        backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+        backend.DELTA_DIR = os.path.join(directory, "deltas")
+        backend.ADMIN_TOKEN, backend.PROFILING_ENABLED, backend.PROFILE_DIR = "test-token", True, profiles
+        backend.app.wsgi_app = RequestProfiler(wsgi_app, backend.has_admin_token, profiles)
+        try:
+            assert backend.reloader.reload()
+            client = backend.app.test_client()
+
+            # Not profiled: no header, no token, or a wrong token
+            for headers in [ADMIN, {"X-Profile": "cprofile"}, {"X-Profile": "cprofile", "X-Admin-Token": "no"}]:
+                response = client.post("/api/predict", json=PAYLOAD, headers=headers)
+                assert response.status_code == 200 and "X-Profile-Id" not in response.headers
+            assert not os.path.exists(profiles)
+
+            response = client.post("/api/predict", json=PAYLOAD,
+                                   headers={**ADMIN, "X-Profile": "cprofile", "X-Request-Id": "predict-1"})
+            assert response.status_code == 200 and response.get_json()["success"]
+            assert response.headers["X-Profile-Id"] == "predict-1"
+            report = client.get("/api/admin/profiles/predict-1", headers=ADMIN).get_json()
+            assert report["mode"] == "cprofile" and report["path"] == "/api/predict"
+            assert report["status"] == "200 OK" and report["seconds"] > 0
+            cumulative = [row["cumulative_seconds"] for row in report["top"]]
+            assert cumulative == sorted(cumulative, reverse=True) and len(cumulative) == 30
+            assert any("predict_crowd" in row["function"] for row in report["top"])
+            assert pstats.Stats(os.path.join(profiles, "predict-1.prof")).total_calls > 0
+
+            # An unusable request id is replaced by a generated one
+            response = client.get("/api/statistics?district=Guntur",
+                                  headers={**ADMIN, "X-Profile": "sample", "X-Request-Id": "../x"})
+            request_id = response.headers["X-Profile-Id"]
+            assert len(request_id) == 32 and response.status_code == 200
+            report = client.get(f"/api/admin/profiles/{request_id}", headers=ADMIN).get_json()
+            assert report["mode"] == "sample" and report["path"] == "/api/statistics?district=Guntur"
+            assert os.path.exists(os.path.join(profiles, request_id + ".folded"))
+
+            assert client.get("/api/admin/profiles/predict-1").status_code == 403
+            assert client.get("/api/admin/profiles/missing", headers=ADMIN).status_code == 404
+        finally:
+            backend.app.wsgi_app = wsgi_app
+            for name, setting in originals.items():
+                setattr(backend, name, setting)
+            backend.publish_state(previous_state)
+    print("✓ Admin requests with X-Profile get a stored top-functions report under their id")
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_stack_dump_window():
+    with tempfile.TemporaryDirectory() as directory:
+        window = StackDumpWindow(directory)
+        stop = threading.Event()
+        worker = threading.Thread(target=busy, args=(stop,))
+        worker.start()
+        try:
+            assert window.start(seconds=0.3, interval=0.005, period=0.1)
+            assert not window.start(seconds=0.3, interval=0.005, period=0.1), "one window at a time"
+            assert window.status()["running"]
+            deadline = time.monotonic() + 5
+            while window.running and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            stop.set()
+            worker.join()
+
+        status = window.status()
+        assert not status["running"] and len(status["files"]) == 3
+        lines = []
+        for name in status["files"]:
+            with open(os.path.join(directory, name)) as f:
+                lines += f.read().splitlines()
+        stacks = [line.rsplit(" ", 1) for line in lines]
+        assert all(count.isdigit() for _, count in stacks)
+        assert any("(busy)" in stack for stack, _ in stacks)
+    print("✓ A stack dump window writes one folded file per period")
+
+
+if __name__ == "__main__":
+    test_disabled_by_default()
+    test_request_profiles()
+    test_stack_dump_window()
@@ -0,0 +1,92 @@
+"""
+Hot reload under load: /api/predict keeps answering while a new model and
+data are built and swapped in, and no response mixes two versions.
+
+Runs in-process against small generated files, no server or real data needed:
+    python test_reload.py      (or: python -m pytest test_reload.py)
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app as backend
+from fixtures import PAYLOAD, write_fixture
+
+
+def predict(client):
+    response = client.post("/api/predict", json=PAYLOAD)
+    return response.status_code, response.headers.get("X-Model-Version"), response.get_json()
+
+
+def test_predict_during_reload():
+    originals = {name: getattr(backend, name) for name in
+                 ["MODEL_PATH", "FEATURES_PATH", "BIO_DATA_PATH", "ENROL_DATA_PATH", "SNAPSHOT_PATH",
+                  "FORECAST_PATH", "DELTA_DIR", "ADMIN_TOKEN"]}
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_fixture(directory)
+        backend.MODEL_PATH = paths["model"]
+        backend.FEATURES_PATH = paths["features"]
+        backend.BIO_DATA_PATH = paths["bio"]
+        backend.ENROL_DATA_PATH = paths["enrol"]
+        backend.SNAPSHOT_PATH = os.path.join(directory, "missing.parquet")
+        backend.FORECAST_PATH = os.path.join(directory, "forecast_grid.npz")
+        backend.DELTA_DIR = os.path.join(directory, "deltas")
+        backend.ADMIN_TOKEN = "test-token"
+        try:
+            client = backend.app.test_client()
+
+            # Version A, served synchronously
+            os.replace(paths["model_a"], paths["model"])
+            assert backend.reloader.reload()
+            _, version_a, body_a = predict(client)
+
+            results = []
+            stop = threading.Event()
+
+            def hammer():
+                worker_client = backend.app.test_client()
+                while not stop.is_set():
+                    results.append(predict(worker_client))
+
+            workers = [threading.Thread(target=hammer) for _ in range(8)]
+            for worker in workers:
+                worker.start()
+            time.sleep(0.3)
+
+            # Swap in version B through the admin endpoint while requests are in flight
+            os.replace(paths["model_b"], paths["model"])
+            response = client.post("/api/admin/reload", headers={"X-Admin-Token": "test-token"})
+            assert response.status_code == 202
+            while backend.reloader.running:
+                time.sleep(0.05)
+            time.sleep(0.3)
+
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+            _, version_b, body_b = predict(client)
+            expected = {version_a: body_a["probabilities"], version_b: body_b["probabilities"]}
+            assert version_a != version_b
+            assert body_a["probabilities"] != body_b["probabilities"]
+
+            seen = set()
+            for status, version, body in results:
+                assert status == 200 and body["success"], body
+                # Probabilities must be exactly those of the model the version header names
+                assert body["probabilities"] == expected[version], (version, body)
+                seen.add(version)
+            assert seen == {version_a, version_b}
+
+            print(f"✓ {len(results)} predictions during reload, versions {sorted(seen)}, no errors")
+        finally:
+            for name, value in originals.items():
+                setattr(backend, name, value)
+            backend.reloader.reload(strict=False)
+
+
+if __name__ == "__main__":
+    test_predict_during_reload()
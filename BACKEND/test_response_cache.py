@@ -0,0 +1,92 @@
+"""
+Response cache: cached GET responses carry an ETag and answer a matching
+If-None-Match with 304, the least recently used entry is evicted at
+maxsize, publishing a new state makes the next request a miss, and
+fallback payloads served with 200 ("Data not loaded") are never stored.
+
+Runs in-process on generated data, no server needed:
+    python test_response_cache.py      (or: python -m pytest test_response_cache.py)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app as backend
+from fixtures import serving
+from utils.state import ServingState
+
+
+def test_etag_and_304():
+    with serving() as client:
+        first = client.get("/api/statistics?district=Krishna")
+        etag, weak = first.get_etag()
+        assert first.status_code == 200 and etag and not weak
+        assert first.last_modified is not None
+
+        again = client.get("/api/statistics?district=Krishna", headers={"If-None-Match": f'"{etag}"'})
+        assert again.status_code == 304 and again.data == b""
+        assert client.get("/api/statistics?district=Krishna",
+                          headers={"If-None-Match": '"something-else"'}).data == first.data
+        assert backend.response_cache.stats()["hits"] >= 2
+    print("✓ Cached responses carry an ETag and a matching If-None-Match gets 304")
+
+
+def test_lru_eviction():
+    entries = backend.response_cache.entries
+    previous_maxsize = entries.maxsize
+    with serving() as client:
+        entries.maxsize = 2
+        try:
+            for district in ["Guntur", "Krishna", "Guntur", "Prakasam"]:
+                client.get(f"/api/statistics?district={district}")
+            stats = backend.response_cache.stats()
+            assert stats["size"] == 2 and stats["evictions"] >= 1
+            # Guntur was used after Krishna, so Krishna was the one evicted
+            misses = stats["misses"]
+            client.get("/api/statistics?district=Guntur")
+            assert backend.response_cache.stats()["misses"] == misses
+            client.get("/api/statistics?district=Krishna")
+            assert backend.response_cache.stats()["misses"] == misses + 1
+        finally:
+            entries.maxsize = previous_maxsize
+    print("✓ The least recently used entry is evicted at maxsize")
+
+
+def test_miss_after_publish():
+    with serving() as client:
+        client.get("/api/trends?district=Guntur")
+        misses = backend.response_cache.stats()["misses"]
+        client.get("/api/trends?district=Guntur")
+        assert backend.response_cache.stats()["misses"] == misses
+
+        backend.publish_state(backend.serving_state)
+        assert backend.response_cache.stats()["size"] == 0
+        client.get("/api/trends?district=Guntur")
+        assert backend.response_cache.stats()["misses"] == misses + 1
+    print("✓ Publishing a state empties the cache, the next request is a miss")
+
+
+def test_fallbacks_not_cached():
+    with serving() as client:
+        loaded = backend.serving_state
+        backend.serving_state = ServingState(version=loaded.version)
+        try:
+            for endpoint in ["statistics", "districts"]:
+                response = client.get(f"/api/{endpoint}")
+                assert response.status_code == 200
+                assert "no-store" in response.headers["Cache-Control"]
+            assert client.get("/api/statistics").get_json()["error"] == "Data not loaded"
+            assert backend.response_cache.stats()["size"] == 0
+        finally:
+            backend.serving_state = loaded
+        # Same cache version: the data shows up without an invalidation
+        assert "error" not in client.get("/api/statistics").get_json()
+        assert client.get("/api/districts").get_json()["districts"]
+    print("✓ Fallback payloads served with 200 are not cached")
+
+
+if __name__ == "__main__":
+    test_etag_and_304()
+    test_lru_eviction()
+    test_miss_after_publish()
+    test_fallbacks_not_cached()
@@ -0,0 +1,77 @@
+"""
+Staged startup: importing app loads nothing heavy, /api/ready answers 503
+until the model, data, indexes and warmup prediction are done and 200
+after, and the first request of a process that never called init_app()
+still gets an answer. The warmup itself leaves /api/metrics empty.
+
+Each check runs in a fresh interpreter against small generated files:
+    python test_startup.py      (or: python -m pytest test_startup.py)
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from fixtures import write_fixture
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPT = """
+import json, sys, time
+import app
+
+paths = json.loads(sys.argv[1])
+report = {"imported": sorted(m for m in ("pandas", "lightgbm", "pyarrow") if m in sys.modules),
+          "version_after_import": app.serving_state.version}
+app.MODEL_PATH, app.FEATURES_PATH = paths["model"], paths["features"]
+app.BIO_DATA_PATH, app.ENROL_DATA_PATH = paths["bio"], paths["enrol"]
+app.SNAPSHOT_PATH, app.FORECAST_PATH = paths["snapshot"], paths["forecast"]
+client = app.app.test_client()
+
+if sys.argv[2] == "probe":
+    report["first_ready"] = client.get("/api/ready").status_code
+    deadline = time.time() + 60
+    while client.get("/api/ready").status_code != 200 and time.time() < deadline:
+        time.sleep(0.05)
+    report["ready"] = client.get("/api/ready").get_json()
+else:
+    response = client.post("/api/predict", json={"month": 1, "day": 15, "day_of_week": "Monday", "district": "Guntur"})
+    report["predict"] = response.status_code
+    # Only the request above is counted, not init_app()'s warmup
+    report["counted"] = sorted("|".join(key) for key in app.metrics.requests)
+
+print(json.dumps(report))
+"""
+
+
+def run(paths, mode):
+    result = subprocess.run([sys.executable, "-c", SCRIPT, json.dumps(paths), mode], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_is_cheap_and_ready_waits_for_stages():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_fixture(directory)
+        os.replace(paths["model_a"], paths["model"])
+        paths["snapshot"] = os.path.join(directory, "missing.parquet")
+        paths["forecast"] = os.path.join(directory, "forecast_grid.npz")
+
+        report = run(paths, "probe")
+        assert report["imported"] == [] and report["version_after_import"] == 0, report
+        assert report["first_ready"] == 503, report
+
+        ready = report["ready"]
+        assert ready["ready"] and all(ready["stages"].values()), ready
+        assert set(ready["stage_seconds"]) == {"model", "data", "indexes", "forecast", "warmup"}
+
+        # Without init_app() or a probe, the first request loads everything itself
+        report = run(paths, "request")
+        assert report["predict"] == 200, report
+        assert report["counted"] == ["/api/predict|POST|200"], report
+    print(f"✓ Import loads nothing heavy, ready after stages {ready['stage_seconds']}")
+
+
+if __name__ == "__main__":
+    test_import_is_cheap_and_ready_waits_for_stages()
@@ -0,0 +1,81 @@
+"""
+Synthetic extracts (ML-ALGO/generate_synthetic_data.py): same layout as the
+real files, loadable by the shared merge without losing rows to cleaning,
+unique keys, byte-identical for a seed whatever the chunk size, and shaped
+by day of week.
+
+    python test_synthetic_data.py      (or: python -m pytest test_synthetic_data.py)
+"""
+import filecmp
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from feature_engineering import BIO_COLUMNS, ENROL_COLUMNS, load_merged_data, normalize_districts
+from generate_synthetic_data import BIO_FILE, ENROL_FILE, build_geography, generate
+
+SMALL = dict(states=2, districts_per_state=4, pincodes_per_district=6, days=28, seed=7)
+
+
+def test_layout_and_merge():
+    with tempfile.TemporaryDirectory() as directory:
+        written = generate(directory, **SMALL)
+        bio = pd.read_csv(os.path.join(directory, BIO_FILE))
+        enrol = pd.read_csv(os.path.join(directory, ENROL_FILE))
+
+    # The headers of the real extracts, which the loaders rename positionally
+    assert list(bio.columns) == ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_17_"]
+    assert list(enrol.columns) == ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_greater"]
+    assert len(bio.columns) == len(BIO_COLUMNS) and len(enrol.columns) == len(ENROL_COLUMNS)
+    assert written == {BIO_FILE: len(bio), ENROL_FILE: len(enrol)}
+    assert bio["date"].str.contains("/").any() and bio["date"].str.contains("-").any()
+
+    for df in (bio, enrol):
+        assert not df.duplicated(["date", "state", "district", "pincode"]).any()
+        assert normalize_districts(df)[1] == 0, "cleaning must not drop generated rows"
+        assert df.groupby("district")["state"].nunique().max() == 1
+        assert df["pincode"].between(100000, 999999).all()
+    assert set(bio["state"]) == {"Andhra Pradesh", "Synthetic State 02"}
+
+    dates = pd.to_datetime(bio["date"], format="mixed", dayfirst=True)
+    per_day = bio.groupby(dates.dt.dayofweek).size()
+    assert per_day[0] > per_day[6], "Mondays are busier than Sundays"
+    print("✓ Generated extracts have the real layout, unique keys and a weekly shape")
+
+
+def test_deterministic_across_chunk_sizes():
+    with tempfile.TemporaryDirectory() as directory:
+        one, two, other = (os.path.join(directory, name) for name in ["one", "two", "other"])
+        written = generate(one, **SMALL)
+        generate(two, chunk_cells=50, **SMALL)
+        generate(other, **{**SMALL, "seed": 8})
+        for name in (BIO_FILE, ENROL_FILE):
+            assert filecmp.cmp(os.path.join(one, name), os.path.join(two, name), shallow=False)
+            assert not filecmp.cmp(os.path.join(one, name), os.path.join(other, name), shallow=False)
+
+        # Like the real extracts, the merge joins on the raw date strings, so a key
+        # written in different date formats in the two files stays two rows
+        merged = load_merged_data(os.path.join(one, BIO_FILE), os.path.join(one, ENROL_FILE))
+        assert max(written.values()) < len(merged) <= sum(written.values())
+        assert merged["district"].nunique() == SMALL["states"] * SMALL["districts_per_state"]
+    print("✓ Same seed, same bytes for any chunk size")
+
+
+def test_pincode_limit():
+    try:
+        build_geography(states=1000, districts_per_state=26, pincodes_per_district=46)
+    except ValueError as e:
+        assert "six digits" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+    print("✓ Too many pincodes for six digits is refused")
+
+
+if __name__ == "__main__":
+    test_layout_and_merge()
+    test_deterministic_across_chunk_sizes()
+    test_pincode_limit()
@@ -0,0 +1,112 @@
+"""
+Parity of the NumPy tree export with LightGBM: probabilities on a held-out
+split must match predict_proba, including rows with missing values, and an
+export only loads next to the model file it was made from.
+
+Runs on generated data, no server or real data needed:
+    python test_tree_export.py      (or: python -m pytest test_tree_export.py)
+"""
+import os
+import sys
+import tempfile
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ML-ALGO"))
+from tree_export import TreeEnsemble, export_checked, export_model, load_for_model
+
+TOLERANCE = 1e-9
+
+
+def make_dataset(rows=6000, seed=3):
+    """Count-like numeric columns plus one-hot columns, labelled into terciles"""
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson([3, 6, 12, 5, 9], size=(rows, 5)).astype(np.float64)
+    one_hot = np.eye(8)[rng.integers(0, 8, rows)]
+    X = np.hstack([counts, one_hot])
+    total = counts[:, 3] + counts[:, 4] + rng.normal(0, 1, rows)
+    y = np.digitize(total, np.quantile(total, [1 / 3, 2 / 3]))
+    return X, y
+
+
+def fit(X, y, **params):
+    model = lgb.LGBMClassifier(n_estimators=60, num_leaves=15, max_depth=6, random_state=42, verbose=-1, **params)
+    return model.fit(X, y)
+
+
+def test_held_out_parity():
+    X, y = make_dataset()
+    X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    model = fit(X_train, y_train)
+    ensemble = TreeEnsemble.from_booster(model.booster_)
+
+    diff = np.abs(ensemble.predict_proba(X_test) - model.predict_proba(X_test)).max()
+    assert diff < TOLERANCE, diff
+    assert (ensemble.predict(X_test) == model.predict(X_test)).all()
+    print(f"✓ Held-out parity: {len(X_test)} rows, max difference {diff:.2e}")
+
+
+def test_missing_values():
+    X, y = make_dataset(seed=5)
+    X[::9, 1] = np.nan
+    X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    for params in [{}, {"zero_as_missing": True}]:
+        model = fit(X_train, y_train, **params)
+        ensemble = TreeEnsemble.from_booster(model.booster_)
+        diff = np.abs(ensemble.predict_proba(X_test) - model.predict_proba(X_test)).max()
+        assert diff < TOLERANCE, (params, diff)
+    print("✓ NaN and zero-as-missing splits match LightGBM")
+
+
+def test_export_round_trip():
+    X, y = make_dataset(rows=2000)
+    model = fit(X, y)
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, "model.pkl")
+        export_path = os.path.join(directory, "trees.npz")
+        joblib.dump(model, model_path)
+        exported = export_model(model, model_path, export_path)
+
+        loaded = load_for_model(export_path, model_path)
+        assert np.array_equal(loaded.predict_proba(X), exported.predict_proba(X))
+
+        # A retrained model without a fresh export must not be scored with the old trees
+        joblib.dump(fit(X, y, learning_rate=0.3), model_path)
+        try:
+            load_for_model(export_path, model_path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("stale export was loaded")
+    print("✓ Export round trip and staleness check")
+
+
+def test_checked_export():
+    X, y = make_dataset(rows=2000)
+    model = fit(X, y)
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, "model.pkl")
+        export_path = os.path.join(directory, "trees.npz")
+        joblib.dump(model, model_path)
+        ensemble, diff = export_checked(model, model_path, export_path, X)
+        assert diff < TOLERANCE and load_for_model(export_path, model_path).n_trees == ensemble.n_trees
+
+        # An export that fails the check is not left for the backend to load
+        try:
+            export_checked(model, model_path, export_path, X, tolerance=-1)
+        except ValueError:
+            assert not os.path.exists(export_path)
+        else:
+            raise AssertionError("failed parity check was not raised")
+    print("✓ Checked export, as the training scripts write it")
+
+
+if __name__ == "__main__":
+    test_held_out_parity()
+    test_missing_values()
+    test_export_round_trip()
+    test_checked_export()
@@ -0,0 +1,61 @@
+import gzip
+
+from utils.response_cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain"}
+
+
+class ResponseCompressor:
+    """
+    Compresses response bodies of at least min_size bytes with the encoding
+    the client prefers among br (when the brotli package is installed) and
+    gzip. Streamed and file responses are sent as they are.
+
+    A compressed response keeps its ETag as a weak one, so conditional
+    requests still match the ETag of the uncompressed body. Bodies with an
+    ETag (those from the response cache) are compressed once per encoding.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=5, maxsize=256):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+        self.compressed = LRUCache(maxsize)
+
+    def compress(self, body, encoding):
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        # mtime=0 so the same body always compresses to the same bytes
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def apply(self, response, accept_encodings):
+        """Compress response in place if it is worth it and the client accepts an encoding"""
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        etag, _ = response.get_etag()
+        compressed = self.compressed.get((etag, encoding)) if etag else None
+        if compressed is None:
+            compressed = self.compress(body, encoding)
+            if etag:
+                self.compressed.put((etag, encoding), compressed)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
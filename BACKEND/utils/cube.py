@@ -0,0 +1,455 @@
+import numpy as np
+import pandas as pd
+
+from utils.partitions import build_district_index, partition_slices
+
+CROWD_LEVELS = ["Low", "Medium", "High"]
+PINCODE_DIGITS = 6
+# Prefixes up to this many digits are rolled up when the cube is built
+PINCODE_ROLLUP_DIGITS = 3
+SUM_COLUMNS = [
+    "age_0_5", "age_5_17", "age_18_plus",
+    "bio_age_5_17", "bio_age_18_plus",
+    "total_enrolment", "total_biometric",
+]
+
+
+CELL_KEYS = ["district", "year", "month", "day_of_week", "crowd_district", "crowd_all"]
+PINCODE_CELL_KEYS = ["pincode", "district", "year", "month", "day_of_week", "crowd_district"]
+
+
+def crowd_codes(values: pd.Series):
+    """
+    Tercile codes (0=Low, 1=Medium, 2=High) exactly as pd.qcut labels them.
+
+    Returns (codes, None), or (None, message) when qcut cannot label the
+    values, e.g. because duplicate bin edges were dropped.
+    """
+    codes, _, error = crowd_terciles(values)
+    return codes, error
+
+
+def crowd_terciles(values: pd.Series):
+    """crowd_codes() plus the two inner tercile edges, for labelling more values later"""
+    try:
+        levels, edges = pd.qcut(values, q=3, labels=CROWD_LEVELS, duplicates="drop", retbins=True)
+    except ValueError as e:
+        return None, None, str(e)
+    return levels.cat.codes.to_numpy(), edges[1:-1], None
+
+
+def label_crowd(values, thresholds):
+    """Codes for values against inner tercile edges; bins are right-closed like qcut's"""
+    return np.searchsorted(thresholds, values, side="left").astype("int8")
+
+
+def rollup_cells(keyed: pd.DataFrame):
+    """Rows keyed with crowd_district/crowd_all rolled up into cube cells"""
+    return keyed.groupby(CELL_KEYS, observed=True).agg(
+        records=("total_biometric", "size"),
+        **{col: (col, "sum") for col in SUM_COLUMNS},
+        date_min=("date", "min"),
+        date_max=("date", "max"),
+    ).reset_index()
+
+
+def merge_cells(cells: pd.DataFrame, keys):
+    """Cells that share keys combined into one"""
+    return cells.groupby(keys, observed=True).agg(
+        records=("records", "sum"),
+        **{col: (col, "sum") for col in SUM_COLUMNS},
+        date_min=("date_min", "min"),
+        date_max=("date_max", "max"),
+    ).reset_index()
+
+
+def _cell_keys(frames, keys):
+    """One int64 per cell of each frame that sorts like its keys, or None if they do not fit"""
+    columns = []
+    for key in keys:
+        values = [f[key].cat.codes.to_numpy() if f[key].dtype == "category" else f[key].to_numpy()
+                  for f in frames]
+        columns.append([v.astype(np.int64) for v in values])
+    encoded = [np.zeros(len(f), dtype=np.int64) for f in frames]
+    span_total = 1
+    for values in columns:
+        low = min((v.min() for v in values if len(v)), default=0)
+        span = max((v.max() for v in values if len(v)), default=0) - low + 1
+        span_total *= int(span)
+        if span_total >= 2 ** 62:
+            return None
+        encoded = [e * span + (v - low) for e, v in zip(encoded, values)]
+    return encoded
+
+
+def add_cells(cells: pd.DataFrame, extra: pd.DataFrame, keys):
+    """
+    cells with the cells of extra added: counts of matching keys are summed
+    and new keys inserted in key order. Both must be sorted by keys with the
+    same categories. Cells that extra does not touch are only copied, not
+    grouped again.
+    """
+    encoded = _cell_keys([cells, extra], keys)
+    if encoded is None:
+        return merge_cells(pd.concat([cells, extra], ignore_index=True), keys)
+    old_keys, new_keys = encoded
+
+    places = np.searchsorted(old_keys, new_keys)
+    matched = places < len(old_keys)
+    matched[matched] = old_keys[places[matched]] == new_keys[matched]
+
+    # Shallow copy: columns are replaced below, never written in place
+    cells = cells.copy(deep=False)
+    targets, sources = places[matched], extra[matched]
+    for col in ["records", *SUM_COLUMNS]:
+        column = cells[col].to_numpy(copy=True)
+        column[targets] += sources[col].to_numpy().astype(column.dtype)
+        cells[col] = column
+    for col, combine in [("date_min", np.minimum), ("date_max", np.maximum)]:
+        column = cells[col].to_numpy(copy=True)
+        column[targets] = combine(column[targets], sources[col].to_numpy())
+        cells[col] = column
+
+    added = extra[~matched]
+    order = np.insert(np.arange(len(cells)), places[~matched], len(cells) + np.arange(len(added)))
+    return pd.concat([cells, added], ignore_index=True).take(order).reset_index(drop=True)
+
+
+def pincode_levels(keyed: pd.DataFrame):
+    """
+    Cells per pincode, and rolled up per short pincode prefix (a hierarchy:
+    515 -> 51 -> 5), as {digits: cells}. Each level is sorted by its key, so a
+    prefix's cells are one contiguous run found by binary search. Longer
+    prefixes cover at most a hundred pincodes and are read as a run of the
+    pincode level.
+    """
+    cells = keyed.groupby(PINCODE_CELL_KEYS, observed=True).agg(
+        records=("total_biometric", "size"),
+        **{col: (col, "sum") for col in SUM_COLUMNS},
+        date_min=("date", "min"),
+        date_max=("date", "max"),
+    ).reset_index()
+    levels = {PINCODE_DIGITS: cells}
+    for digits in range(PINCODE_ROLLUP_DIGITS, 0, -1):
+        finer = levels[digits + 1 if digits < PINCODE_ROLLUP_DIGITS else PINCODE_DIGITS]
+        scale = 10 if digits < PINCODE_ROLLUP_DIGITS else 10 ** (PINCODE_DIGITS - digits)
+        levels[digits] = merge_cells(finer.assign(pincode=finer["pincode"] // scale), PINCODE_CELL_KEYS)
+    return levels
+
+
+def _with_districts(cells, categories):
+    return cells.assign(district=cells["district"].cat.set_categories(categories))
+
+
+class AggregateCube:
+    """
+    Materialized sums keyed by (district, year, month, day_of_week, crowd level).
+
+    Built from a district-sorted frame and its partition index (see
+    utils.partitions.build_district_index).
+
+    Crowd levels are terciles of total_biometric. `thresholds` are the inner
+    tercile edges to label every row with, normally the ones the model was
+    trained with (see ML-ALGO/crowd_thresholds.py); without them the terciles
+    of all rows are used. Each row carries two labels: crowd_all (used for
+    "All") and crowd_district (used for district queries), which is the same
+    label unless per_district is set, in which case it comes from the
+    terciles of the row's own district, computed here once. Every cell stores
+    the record count, the sums of the count columns and the first/last date
+    it covers. A date window narrower than the whole history is answered from
+    its raw rows instead.
+
+    A second set of cells is keyed by pincode as well, with the district
+    labels, for the pincode and pincode-prefix rollups.
+
+    A cube from retraction() has sign -1: its views carry negated counts and
+    cancel the rows it was built from when combined with the other views.
+    """
+
+    sign = 1
+
+    def __init__(self, df: pd.DataFrame, district_index, thresholds=None, per_district=False):
+        self.df = df
+        self.district_index = district_index
+        self.per_district = per_district
+        self.crowd_errors = {}
+        # Inner tercile edges per scope ("All", and each district if per_district)
+        self.thresholds = {}
+
+        if thresholds is not None:
+            self.thresholds["All"] = np.asarray(thresholds, dtype=np.float64)
+            crowd_all = label_crowd(df["total_biometric"].to_numpy(), self.thresholds["All"])
+        else:
+            crowd_all, self.thresholds["All"], error = crowd_terciles(df["total_biometric"])
+            if error:
+                self.crowd_errors["All"] = error
+                crowd_all = np.full(len(df), -1, dtype="int8")
+                del self.thresholds["All"]
+
+        if per_district:
+            crowd_district = np.full(len(df), -1, dtype="int8")
+            for district, rows in district_index.items():
+                codes, thresholds, error = crowd_terciles(df["total_biometric"].iloc[rows])
+                if error:
+                    self.crowd_errors[district] = error
+                else:
+                    crowd_district[rows] = codes
+                    self.thresholds[district] = thresholds
+        else:
+            crowd_district = crowd_all
+
+        # Kept so a date window can be aggregated with each row's full-history labels
+        self.crowd_district, self.crowd_all = crowd_district, crowd_all
+        self._build_cells()
+
+    def _build_cells(self):
+        keyed = self.df.assign(crowd_district=self.crowd_district, crowd_all=self.crowd_all)
+        self.cells, self.index = build_district_index(rollup_cells(keyed))
+
+        # The same cells per pincode, and per pincode prefix
+        self.pincode_levels = pincode_levels(keyed)
+        self.pincodes = np.unique(self.pincode_levels[PINCODE_DIGITS]["pincode"].to_numpy())
+
+    def retraction(self, positions):
+        """
+        A cube over this cube's rows at positions, with the labels they have
+        here, that subtracts them: combine_views() over its views and this
+        cube's counts those rows out. Used when an ingest replaces loaded rows.
+        """
+        rows = self.df.iloc[positions].assign(crowd_all=self.crowd_all[positions],
+                                              crowd_district=self.crowd_district[positions])
+        rows, district_index = build_district_index(rows, sort_within="date")
+
+        cube = object.__new__(AggregateCube)
+        cube.df = rows.drop(columns=["crowd_all", "crowd_district"])
+        cube.district_index, cube.per_district = district_index, self.per_district
+        cube.crowd_errors, cube.thresholds = dict(self.crowd_errors), dict(self.thresholds)
+        cube.crowd_all = rows["crowd_all"].to_numpy()
+        cube.crowd_district = rows["crowd_district"].to_numpy()
+        cube.sign = -1
+        cube._build_cells()
+        return cube
+
+    def without(self, keep, df: pd.DataFrame, district_index):
+        """
+        This cube without the rows where keep is False: df and district_index
+        are those of self.df[keep]. Rows keep their labels; the cells are
+        grouped again, since a removed row cannot be taken out of a cell's dates.
+        """
+        cube = object.__new__(AggregateCube)
+        cube.df, cube.district_index, cube.per_district = df, district_index, self.per_district
+        cube.crowd_errors, cube.thresholds = dict(self.crowd_errors), dict(self.thresholds)
+        cube.crowd_all, cube.crowd_district = self.crowd_all[keep], self.crowd_district[keep]
+        cube._build_cells()
+        return cube
+
+    def labelled(self, df: pd.DataFrame, district_index):
+        """
+        A cube over other rows (an ingested segment, see utils.ingest), df and
+        district_index as build_district_index(rows, sort_within="date")
+        returned them. The rows are labelled with the tercile edges already in
+        use; with per_district, a district seen for the first time gets edges
+        from its own rows. Only those rows are grouped into cells. A full
+        reload recomputes the terciles over every row.
+        """
+        cube = object.__new__(AggregateCube)
+        cube.df, cube.district_index, cube.per_district = df, district_index, self.per_district
+        cube.crowd_errors, cube.thresholds = dict(self.crowd_errors), dict(self.thresholds)
+
+        values = df["total_biometric"].to_numpy()
+        cube.crowd_all = (label_crowd(values, cube.thresholds["All"]) if "All" in cube.thresholds
+                          else np.full(len(df), -1, dtype="int8"))
+        cube.crowd_district = cube.crowd_all
+        if self.per_district:
+            cube.crowd_district = np.full(len(df), -1, dtype="int8")
+            for district, rows in district_index.items():
+                if district not in cube.thresholds and district not in cube.crowd_errors:
+                    _, thresholds, error = crowd_terciles(df["total_biometric"].iloc[rows])
+                    if error:
+                        cube.crowd_errors[district] = error
+                        continue
+                    cube.thresholds[district] = thresholds
+                if district in cube.thresholds:
+                    cube.crowd_district[rows] = label_crowd(values[rows], cube.thresholds[district])
+
+        cube._build_cells()
+        return cube
+
+    def merged(self, other, df: pd.DataFrame, district_index, order):
+        """
+        This cube with the rows of other, a cube from labelled(), folded in:
+        df, district_index and order as utils.partitions.insert_rows(self.df,
+        other.df) returned them. Rows keep their labels and other's cells are
+        added to the existing ones, so no row is grouped again.
+        """
+        cube = object.__new__(AggregateCube)
+        cube.df, cube.district_index, cube.per_district = df, district_index, self.per_district
+        # other was labelled with this cube's edges plus those of its new districts
+        cube.crowd_errors, cube.thresholds = dict(other.crowd_errors), dict(other.thresholds)
+        cube.crowd_district = np.concatenate([self.crowd_district, other.crowd_district])[order]
+        cube.crowd_all = np.concatenate([self.crowd_all, other.crowd_all])[order]
+
+        categories = df["district"].cat.categories
+        cells = add_cells(_with_districts(self.cells, categories), _with_districts(other.cells, categories), CELL_KEYS)
+        cube.cells, cube.index = cells, partition_slices(cells)
+        cube.pincode_levels = {
+            digits: add_cells(_with_districts(cells, categories),
+                              _with_districts(other.pincode_levels[digits], categories), PINCODE_CELL_KEYS)
+            for digits, cells in self.pincode_levels.items()
+        }
+        cube.pincodes = np.union1d(self.pincodes, other.pincodes)
+        return cube
+
+    def select(self, district, rows=None):
+        """
+        Cells for one district, or all cells for 'All', with a crowd_level
+        column holding the labels for that scope. None if the district is unknown.
+        With rows (from utils.partitions.DateIndex.rows) only those rows are
+        aggregated; they keep the crowd labels of the scope's whole history.
+        Raises ValueError for a scope whose crowd levels could not be computed.
+        """
+        if not district or district == "All":
+            scope, codes = "All", "crowd_all"
+            if rows is not None and len(rows) == len(self.df):
+                rows = None
+            cells = self.cells
+        else:
+            scope, codes = district, "crowd_district"
+            partition = self.index.get(district)
+            if partition is None:
+                return None
+            if rows is not None and rows == self.district_index[district]:
+                rows = None
+            cells = self.cells.iloc[partition]
+
+        if rows is not None:
+            # A window narrower than the scope: each of its rows acts as a cell of one
+            # record, which is cheaper than grouping a few thousand rows into cells first
+            window = self.df.iloc[rows]
+            cells = window[["district", "year", "month", "day_of_week", *SUM_COLUMNS]].assign(
+                records=1, date_min=window["date"], date_max=window["date"],
+                crowd_district=self.crowd_district[rows], crowd_all=self.crowd_all[rows],
+            )
+
+        crowd_level = pd.Categorical.from_codes(cells[codes], categories=CROWD_LEVELS)
+        cells = cells.drop(columns=["crowd_district", "crowd_all"]).assign(crowd_level=crowd_level)
+        return CubeView(self._signed(cells), self.crowd_error(scope))
+
+    def _signed(self, cells):
+        if self.sign > 0:
+            return cells
+        return cells.assign(**{col: -cells[col].astype(np.int64) for col in ["records", *SUM_COLUMNS]})
+
+    def crowd_error(self, scope):
+        """Why crowd levels could not be computed for a scope ('All' or a district), or None"""
+        return self.crowd_errors.get(scope if self.per_district else "All")
+
+
+    def pincodes_under(self, prefix):
+        """Every pincode starting with the digits in prefix"""
+        scale = 10 ** (PINCODE_DIGITS - len(prefix))
+        lo, hi = np.searchsorted(self.pincodes, [int(prefix) * scale, (int(prefix) + 1) * scale])
+        return self.pincodes[lo:hi].tolist()
+
+    def select_pincodes(self, prefix):
+        """
+        Cells of the pincodes starting with the digits in prefix (all six
+        digits select a single pincode), labelled with their district's crowd
+        levels. None if no pincode matches.
+        """
+        if len(prefix) in self.pincode_levels:
+            cells, lower, upper = self.pincode_levels[len(prefix)], int(prefix), int(prefix) + 1
+        else:
+            scale = 10 ** (PINCODE_DIGITS - len(prefix))
+            cells, lower, upper = self.pincode_levels[PINCODE_DIGITS], int(prefix) * scale, (int(prefix) + 1) * scale
+        lo, hi = np.searchsorted(cells["pincode"].to_numpy(), [lower, upper])
+        if lo == hi:
+            return None
+
+        cells = cells.iloc[lo:hi]
+        crowd_level = pd.Categorical.from_codes(cells["crowd_district"], categories=CROWD_LEVELS)
+        cells = cells.drop(columns=["crowd_district"]).assign(crowd_level=crowd_level)
+        errors = [self.crowd_error(d) for d in cells["district"].unique() if self.crowd_error(d)]
+        return CubeView(self._signed(cells), errors[0] if errors else None)
+
+
+class CubeView:
+    """The cube cells of one scope, with the per-endpoint rollups"""
+
+    def __init__(self, cells, crowd_error=None):
+        self.cells = cells
+        self.crowd_error = crowd_error
+
+    def _require_crowd_levels(self):
+        if self.crowd_error:
+            raise ValueError(self.crowd_error)
+
+    @property
+    def total_records(self):
+        return int(self.cells["records"].sum())
+
+    def total(self, column):
+        return int(self.cells[column].sum())
+
+    def mean(self, column):
+        return float(self.cells[column].sum()) / self.total_records
+
+    def districts(self):
+        return sorted(self.cells["district"].unique().tolist())
+
+    def date_range(self):
+        return self.cells["date_min"].min(), self.cells["date_max"].max()
+
+    def crowd_distribution(self):
+        self._require_crowd_levels()
+        counts = self.cells.groupby("crowd_level", observed=False)["records"].sum()
+        return {str(level): int(count) for level, count in counts.items()}
+
+    def monthly_totals(self):
+        """Sums per (year, month), sorted chronologically"""
+        return self.cells.groupby(["year", "month"])[["total_biometric", "total_enrolment"]].sum()
+
+    def day_totals(self, column):
+        return self.cells.groupby("day_of_week", observed=True)[column].sum()
+
+    def day_means(self, columns):
+        """Per-day-of-week means, as a groupby mean over the raw rows would give"""
+        sums = self.cells.groupby("day_of_week", observed=True)[["records", *columns]].sum()
+        return sums[columns].div(sums["records"], axis=0)
+
+    def district_totals(self, columns):
+        return self.cells.groupby("district", observed=True)[columns].sum()
+
+    def monthly_crowd(self):
+        """Record counts for every observed month x crowd level, zeros included"""
+        self._require_crowd_levels()
+        counts = self.cells.groupby(["month", "crowd_level"], observed=False)["records"].sum()
+        return [
+            {"month": int(month), "crowd_level": level, "count": int(count)}
+            for (month, level), count in counts.items()
+        ]
+
+    def peak_month(self):
+        return int(self.cells.groupby("month")["total_enrolment"].sum().idxmax())
+
+    def peak_day(self):
+        counts = self.cells.groupby("day_of_week", observed=False)["records"].sum()
+        return counts.idxmax()
+
+
+def combine_views(views):
+    """
+    One CubeView over the cells of several (the loaded data, each ingested
+    segment and the retractions of rows they replaced), skipping None. Every
+    rollup groups and sums, so cells with the same keys in different views
+    add up as if they had been merged. None if no view is left.
+    """
+    views = [view for view in views if view is not None]
+    if len(views) <= 1:
+        return views[0] if views else None
+    categories = pd.Index(sorted(set().union(*(view.cells["district"].cat.categories for view in views))))
+    # Signed counts: unsigned sums next to a retraction's negative ones would turn into floats
+    counts = {col: np.int64 for col in ["records", *SUM_COLUMNS]}
+    cells = pd.concat([_with_districts(view.cells, categories).astype(counts) for view in views], ignore_index=True)
+    errors = [view.crowd_error for view in views if view.crowd_error]
+    return CubeView(cells, errors[0] if errors else None)
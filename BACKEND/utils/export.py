@@ -0,0 +1,36 @@
+import numpy as np
+
+RECORD_COLUMNS = [
+    "date", "state", "district", "pincode",
+    "age_0_5", "age_5_17", "age_18_plus",
+    "bio_age_5_17", "bio_age_18_plus",
+    "total_enrolment", "total_biometric",
+]
+RECORD_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_ROWS = 5000
+
+
+def iter_records(df, rows=slice(None), fmt="ndjson", chunk_rows=CHUNK_ROWS, header=True):
+    """
+    Yield df.iloc[rows] as NDJSON or CSV text, chunk_rows rows at a time.
+    rows is a slice or an array of positions (see utils.partitions.DateIndex).
+    Only one chunk is formatted at a time, so memory stays flat however many
+    rows match. header=False leaves out the CSV header, for streams that
+    continue another one.
+    """
+    if isinstance(rows, slice):
+        start, stop, _ = rows.indices(len(df))
+        chunks = (slice(i, min(i + chunk_rows, stop)) for i in range(start, stop, chunk_rows))
+    else:
+        chunks = (rows[i:i + chunk_rows] for i in range(0, len(rows), chunk_rows))
+
+    if fmt == "csv" and header:
+        yield ",".join(RECORD_COLUMNS) + "\n"
+
+    for positions in chunks:
+        chunk = df.iloc[positions]
+        chunk = chunk[RECORD_COLUMNS].assign(date=np.datetime_as_string(chunk["date"].to_numpy(), unit="D"))
+        if fmt == "csv":
+            yield chunk.to_csv(index=False, header=False)
+        else:
+            yield chunk.to_json(orient="records", lines=True)
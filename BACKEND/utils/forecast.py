@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+from utils.cube import CROWD_LEVELS
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+AVERAGE_COLUMNS = ["age_0_5", "age_5_17", "age_18_plus", "bio_age_5_17", "bio_age_18_plus"]
+# Used for a day of week a district has no records for
+DEFAULT_DAY_AVERAGES = {"age_0_5": 1, "age_5_17": 3, "age_18_plus": 8, "bio_age_5_17": 5, "bio_age_18_plus": 12}
+
+
+def day_of_week_averages(cube):
+    """Rounded per-day-of-week averages of a district's counts, as /api/district-averages reports them"""
+    day_averages = cube.day_means(AVERAGE_COLUMNS).round(0).astype(int)
+    return {
+        day: ({column: int(day_averages.loc[day, column]) for column in AVERAGE_COLUMNS}
+              if day in day_averages.index else dict(DEFAULT_DAY_AVERAGES))
+        for day in DAY_NAMES
+    }
+
+
+def district_day_averages(cube, districts):
+    """day_of_week_averages() for each of districts, from one groupby over the cube's cells"""
+    sums = cube.cells.groupby(["district", "day_of_week"], observed=True)[["records", *AVERAGE_COLUMNS]].sum()
+    means = sums[AVERAGE_COLUMNS].div(sums["records"], axis=0).round(0).astype(int).to_dict("index")
+    return {
+        district: {day: dict(means.get((district, day), DEFAULT_DAY_AVERAGES)) for day in DAY_NAMES}
+        for district in districts
+    }
+
+
+def forecast_key(model_digest, averages, start, horizon):
+    """Identifies a grid: changes when the model, the input averages or the horizon change"""
+    payload = json.dumps([model_digest, averages, start.isoformat(), horizon], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ForecastGrid:
+    """
+    Predicted crowd level and probabilities for every district x day of a
+    horizon starting at `start`. A lookup is a dict hit for the district row
+    and date arithmetic for the day columns.
+    """
+
+    def __init__(self, districts, start, levels, probabilities, key=""):
+        self.districts = list(districts)
+        self.rows = {district: i for i, district in enumerate(self.districts)}
+        self.start = start
+        self.levels = levels
+        self.probabilities = probabilities
+        self.key = key
+
+    @property
+    def days(self):
+        return self.levels.shape[1]
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=self.days - 1)
+
+    def covers(self, start, end):
+        return self.start <= start <= end <= self.end
+
+    def _columns(self, start, end):
+        return slice((start - self.start).days, (end - self.start).days + 1)
+
+    def lookup(self, district, start, end):
+        """Per-day forecast of one district between start and end, both inclusive"""
+        row, columns = self.rows[district], self._columns(start, end)
+        levels = self.levels[row, columns]
+        probabilities = self.probabilities[row, columns]
+        days = []
+        for offset, (level, day_probabilities) in enumerate(zip(levels, probabilities)):
+            day = start + timedelta(days=offset)
+            days.append({
+                "date": day.isoformat(),
+                "day_of_week": DAY_NAMES[day.weekday()],
+                "prediction": CROWD_LEVELS[level],
+                "probabilities": {name: float(p) for name, p in zip(CROWD_LEVELS, day_probabilities)},
+            })
+        return days
+
+    def level_counts(self, start, end):
+        """Days per crowd level of every district between start and end, both inclusive"""
+        levels = self.levels[:, self._columns(start, end)]
+        counts = np.stack([(levels == i).sum(axis=1) for i in range(len(CROWD_LEVELS))], axis=1)
+        return {
+            district: {name: int(count) for name, count in zip(CROWD_LEVELS, counts[row])}
+            for district, row in self.rows.items()
+        }
+
+    def save(self, path):
+        # Per-process temporary name: workers started without preload may build at the same time
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, districts=np.array(self.districts, dtype=str), start=self.start.isoformat(),
+                 levels=self.levels, probabilities=self.probabilities, key=self.key)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, key):
+        """The grid stored at path, or None if it is missing or was built for a different key"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if str(data["key"]) != key:
+                return None
+            return cls(data["districts"].tolist(), date.fromisoformat(str(data["start"])),
+                       data["levels"], data["probabilities"], key)
+
+
+def build_forecast_grid(model, encoder, averages, start, horizon, workers=None, key=""):
+    """
+    Score every district in `averages` (district -> day name -> counts) for
+    each day from start over the horizon. Districts are split into chunks that
+    are encoded and scored concurrently.
+    """
+    districts = sorted(averages)
+    dates = [start + timedelta(days=offset) for offset in range(horizon)]
+
+    def score(chunk):
+        rows = []
+        for district in chunk:
+            for day in dates:
+                counts = {column: float(value) for column, value in averages[district][DAY_NAMES[day.weekday()]].items()}
+                rows.append({
+                    "year": day.year, "month": day.month, "day": day.day,
+                    **counts,
+                    "total_enrolment": counts["age_0_5"] + counts["age_5_17"] + counts["age_18_plus"],
+                    "total_biometric": counts["bio_age_5_17"] + counts["bio_age_18_plus"],
+                    "day_of_week": DAY_NAMES[day.weekday()],
+                    "district": district,
+                })
+        if not rows:
+            return np.empty((0, len(CROWD_LEVELS)))
+        return model.predict_proba(encoder.encode_many(rows))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(districts) or 1))
+    chunks = [chunk.tolist() for chunk in np.array_split(np.array(districts, dtype=object), workers)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        scored = list(pool.map(score, chunks))
+
+    probabilities = np.vstack(scored).reshape(len(districts), horizon, len(CROWD_LEVELS))
+    levels = probabilities.argmax(axis=2).astype(np.int8)
+    return ForecastGrid(districts, start, levels, probabilities, key)
@@ -0,0 +1,214 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from utils.partitions import DateIndex, build_district_index, find_existing, insert_rows, partition_slices
+
+
+class IngestConflict(ValueError):
+    """Delta rows whose counts disagree with those already loaded for their key, or with each other"""
+
+
+class Segment:
+    """
+    Rows ingested since the data was loaded, kept apart from it until
+    compact() folds them in: sorted by district and date, with their own
+    district slices, DateIndex and AggregateCube built from these rows alone,
+    so an ingest costs as much as its delta whatever the size of the history.
+    Has the data attributes of ServingState, see ServingState.layers().
+
+    A delta that fills in counts a loaded row lacks (e.g. the enrolment
+    extract for a key loaded from the biometric one) brings the merged row.
+    The row it replaces is listed in replaces, {layer number: positions},
+    and counted out by a retraction segment in retracted.
+    """
+
+    def __init__(self, merged_data, district_index, date_index, aggregate_cube, replaces=None, retracted=()):
+        self.merged_data = merged_data
+        self.district_index = district_index
+        self.date_index = date_index
+        self.aggregate_cube = aggregate_cube
+        self.replaces = replaces if replaces is not None else {}
+        self.retracted = list(retracted)
+
+    @classmethod
+    def from_rows(cls, rows, labelled_by):
+        """A segment of rows, crowd-labelled with the tercile edges of the cube labelled_by"""
+        merged_data, district_index = build_district_index(rows, sort_within="date")
+        return cls(merged_data, district_index, DateIndex(merged_data, district_index),
+                   labelled_by.labelled(merged_data, district_index))
+
+    @classmethod
+    def retraction(cls, layer, positions):
+        """A segment subtracting the rows of layer at positions, see AggregateCube.retraction"""
+        cube = layer.aggregate_cube.retraction(positions)
+        return cls(cube.df, cube.district_index, DateIndex(cube.df, cube.district_index), cube)
+
+    @classmethod
+    def without(cls, layer, positions):
+        """layer without its rows at positions, indexes and cells rebuilt; for compact()"""
+        keep = np.ones(len(layer.merged_data), dtype=bool)
+        keep[positions] = False
+        merged_data = layer.merged_data[keep].reset_index(drop=True)
+        district_index = partition_slices(merged_data)
+        return cls(merged_data, district_index, DateIndex(merged_data, district_index),
+                   layer.aggregate_cube.without(keep, merged_data, district_index))
+
+
+def merge_layers(target, source):
+    """
+    A Segment with the rows of source (a Segment) inserted into those of
+    target (a Segment or ServingState), indexes and cells merged instead of
+    rebuilt. Costs as much as target's rows, which is why only compact() does it.
+    """
+    merged_data, district_index, order = insert_rows(target.merged_data, source.merged_data)
+    return Segment(
+        merged_data, district_index,
+        target.date_index.extended(merged_data, district_index, order),
+        target.aggregate_cube.merged(source.aggregate_cube, merged_data, district_index, order),
+    )
+
+
+def read_delta(bio_file=None, enrol_file=None):
+    """
+    Read biometric and/or enrolment delta extracts (paths or file objects in
+    the raw CSV layout), clean them like clean_datasets.py and outer-merge
+    them like the full load. Returns (rows in the compact schema, report).
+    Raises ValueError if neither is given or a file cannot be used.
+    """
+    from feature_engineering import BIO_COLUMNS, ENROL_COLUMNS, compact_frame, merge_frames, normalize_districts
+
+    if bio_file is None and enrol_file is None:
+        raise ValueError("No delta given: send a biometric and/or an enrolment CSV")
+
+    report = {}
+    frames = []
+    for name, source, columns in [("biometric", bio_file, BIO_COLUMNS), ("enrolment", enrol_file, ENROL_COLUMNS)]:
+        if source is None:
+            frames.append(pd.DataFrame(columns=columns))
+            continue
+        try:
+            df = pd.read_csv(source)
+            df = df.set_axis(columns, axis=1)
+        except (ValueError, pd.errors.ParserError) as e:
+            raise ValueError(f"Unreadable {name} delta: {e}")
+        df, removed = normalize_districts(df)
+        report[name] = {"rows": len(df) + removed, "removed": removed}
+        frames.append(df)
+
+    try:
+        rows = compact_frame(merge_frames(*frames))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Delta rows could not be merged: {e}")
+    report["merged_rows"] = len(rows)
+    return rows, report
+
+
+def _examples(rows):
+    return ", ".join(f"{row.date:%d-%m-%Y} {row.district} {row.pincode}" for row in rows.head(3).itertuples())
+
+
+def check_rows(state, rows):
+    """
+    Sort delta rows out against every layer of state, keyed by (date,
+    state, district, pincode). Returns (rows to add, replaces, counts):
+
+    - a key not loaded yet is added;
+    - a loaded key whose nonzero delta counts equal the loaded ones is
+      already present, and skipped (zeros are a source the row has no data
+      from, so sending only one extract again is not a conflict);
+    - a loaded key the delta has counts for where the loaded row has zeros
+      is merged: the row to add holds both, and replaces ({layer number:
+      positions}, see Segment) names the row it replaces.
+
+    counts has already_present and merged. Raises IngestConflict, and
+    nothing is ingested, if a nonzero delta count disagrees with a nonzero
+    loaded one, or the delta has one key twice with different counts (exact
+    copies are already dropped by the cleaning in read_delta).
+    """
+    from feature_engineering import COUNT_COLUMNS, MERGE_KEYS, compact_frame
+
+    repeated = rows.duplicated(MERGE_KEYS, keep=False)
+    if repeated.any():
+        raise IngestConflict(
+            f"{int(repeated.sum())} delta rows share a key with other counts "
+            f"(e.g. {_examples(rows[repeated])}); nothing was ingested - send each key once"
+        )
+
+    counts = rows[COUNT_COLUMNS].to_numpy().astype(np.int64)
+    merged = counts.copy()
+    present = np.zeros(len(rows), dtype=bool)
+    fills = np.zeros(len(rows), dtype=bool)
+    conflicts = np.zeros(len(rows), dtype=bool)
+    replaces = {}
+    replaced = state.replaced()
+    for number, layer in enumerate(state.layers()):
+        positions = find_existing(layer.merged_data, layer.district_index, rows)
+        if number in replaced:
+            # Superseded by a row of a later segment, which is matched there
+            positions[np.isin(positions, replaced[number])] = -1
+        matched = np.flatnonzero(positions >= 0)
+        if not len(matched):
+            continue
+        loaded = np.column_stack([layer.merged_data[col].to_numpy()[positions[matched]] for col in COUNT_COLUMNS])
+        delta = counts[matched]
+        clash = ((loaded != delta) & (loaded != 0) & (delta != 0)).any(axis=1)
+        fill = ((loaded == 0) & (delta != 0)).any(axis=1) & ~clash
+        conflicts[matched[clash]] = True
+        present[matched[~clash & ~fill]] = True
+        fills[matched[fill]] = True
+        merged[matched[fill]] = np.maximum(loaded[fill], delta[fill])
+        if fill.any():
+            replaces[number] = np.sort(positions[matched[fill]])
+
+    if conflicts.any():
+        raise IngestConflict(
+            f"{int(conflicts.sum())} delta rows have keys already loaded with other counts "
+            f"(e.g. {_examples(rows[conflicts])}); nothing was ingested - correct the source CSVs and reload instead"
+        )
+
+    added = rows[~present]
+    if fills.any():
+        values = pd.DataFrame(merged[~present], columns=COUNT_COLUMNS, index=added.index)
+        added = compact_frame(added.assign(
+            **values,
+            total_enrolment=values["age_0_5"] + values["age_5_17"] + values["age_18_plus"],
+            total_biometric=values["bio_age_5_17"] + values["bio_age_18_plus"],
+        ))
+    return added, replaces, {"already_present": int(present.sum()), "merged": int(fills.sum())}
+
+
+def add_segment(state, rows, replaces, version):
+    """
+    A new ServingState: state with rows added as one more Segment, labelled
+    like the newest layer, replacing the rows in replaces (see check_rows).
+    The loaded data, the other segments, the model and the forecast are
+    shared with state.
+    """
+    layers = state.layers()
+    segment = Segment.from_rows(rows, layers[-1].aggregate_cube)
+    segment.replaces = replaces
+    segment.retracted = [Segment.retraction(layers[number], positions) for number, positions in replaces.items()]
+    return state.replace(version, segments=[*state.segments, segment])
+
+
+def compact(state, version):
+    """
+    A new ServingState with the segments of state folded into its data and
+    indexes: rows replaced by a segment are dropped, the segments are merged
+    together, then inserted into the loaded data once. The rows keep the
+    crowd labels they were ingested with. The forecast is left to the caller.
+    """
+    replaced = state.replaced()
+    base, *segments = [Segment.without(layer, replaced[number]) if number in replaced else layer
+                       for number, layer in enumerate(state.layers())]
+    folded = merge_layers(base, functools.reduce(merge_layers, segments))
+    return state.replace(
+        version,
+        merged_data=folded.merged_data,
+        district_index=folded.district_index,
+        date_index=folded.date_index,
+        aggregate_cube=folded.aggregate_cube,
+        segments=[],
+    )
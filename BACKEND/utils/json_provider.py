@@ -0,0 +1,90 @@
+import dataclasses
+import math
+import re
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    (orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+     | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS)
+    if orjson is not None else 0
+)
+# Where orjson's output can differ from the stdlib encoder's: floats in exponent
+# notation (1e16 vs 1e+16), NaN and Infinity (orjson writes null, the stdlib NaN and
+# Infinity) and DEL, which the stdlib escapes. Non-ASCII output differs too (no
+# ensure_ascii). The exponent pattern starts with a literal so the regex engine can skip ahead
+EXPONENT = re.compile(rb"e[-0-9]")
+
+
+def has_non_finite(obj):
+    """True if obj holds a NaN or infinite float anywhere inside"""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(has_non_finite(value) for value in obj)
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "O":
+            return has_non_finite(obj.tolist())
+        return obj.dtype.kind in "fc" and not np.isfinite(obj).all()
+    if isinstance(obj, np.inexact):
+        return not np.isfinite(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return has_non_finite(dataclasses.asdict(obj))
+    return False
+
+
+def maybe_different(body, obj):
+    """
+    Whether orjson's body for obj may differ from the stdlib encoder's. A
+    null is only looked into, by walking obj, when it could stand for NaN or
+    Infinity; None alone (e.g. a "warning": null) keeps the orjson body.
+    """
+    if b"\x7f" in body or not body.isascii() or EXPONENT.search(body) is not None:
+        return True
+    return b"null" in body and has_non_finite(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider with responses encoded by orjson when it is
+    installed, byte for byte as the default provider would encode them:
+    sorted keys, ASCII only, compact unless debugging. An orjson body that
+    might differ (see maybe_different), or an object orjson will not encode,
+    is encoded by the stdlib instead. NumPy scalars and arrays are accepted
+    by both paths, so payloads can be built from array.tolist() or handed
+    over as arrays.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, np.generic):
+            return o.item()
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        return DefaultJSONProvider.default(o)
+
+    def encode(self, obj, indent=False):
+        """The body response() sends for obj, as bytes"""
+        if orjson is not None and self.sort_keys and self.ensure_ascii:
+            option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+            try:
+                body = orjson.dumps(obj, default=self.default, option=option)
+            except TypeError:
+                body = None
+            if body is not None and not maybe_different(body, obj):
+                return body + b"\n"
+        dump_args = {"indent": 2} if indent else {"separators": (",", ":")}
+        return f"{self.dumps(obj, **dump_args)}\n".encode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.encode(obj, indent), mimetype=self.mimetype)
@@ -0,0 +1,157 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds; every histogram also has a +Inf bucket
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "identiflow"
+
+
+class Histogram:
+    """Observation counts per bucket plus their sum, like a Prometheus histogram"""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        # Bucket bounds are inclusive (le), the last slot is +Inf
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def samples(self):
+        """(le, cumulative count) for every bucket, +Inf last"""
+        total = 0
+        for bound, count in zip([*map(_number, self.buckets), "+Inf"], self.counts):
+            total += count
+            yield bound, total
+
+
+class StageTimer:
+    """
+    Times consecutive stages of one request: each lap(stage) records the time
+    since the previous lap (or since the timer was created).
+    """
+
+    __slots__ = ("metrics", "route", "last")
+
+    def __init__(self, metrics, route):
+        self.metrics = metrics
+        self.route = route
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.metrics.observe_stage(self.route, stage, now - self.last)
+        self.last = now
+
+
+class Metrics:
+    """
+    Request counters and latency histograms per route, plus stage histograms
+    for the predict path, rendered in the Prometheus text format.
+
+    Observing is a dict lookup, a binary search over the buckets and a few
+    additions under one lock, so it can stay on in production. Each process
+    keeps its own numbers: with several gunicorn workers a scrape sees the
+    worker that answered it.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.errors = {}
+            self.latency = {}
+            self.stages = {}
+
+    def observe_request(self, route, method, status, seconds):
+        """Count one response; status 500 and above counts as an error"""
+        if not self.enabled:
+            return
+        with self._lock:
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if status >= 500:
+                self.errors[route, method] = self.errors.get((route, method), 0) + 1
+            histogram = self.latency.get((route, method))
+            if histogram is None:
+                histogram = self.latency[route, method] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_stage(self, route, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get((route, stage))
+            if histogram is None:
+                histogram = self.stages[route, stage] = Histogram(STAGE_BUCKETS)
+            histogram.observe(seconds)
+
+    def stage_timer(self, route):
+        return StageTimer(self, route)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            requests = dict(self.requests)
+            errors = dict(self.errors)
+            latency = {key: _copy(histogram) for key, histogram in self.latency.items()}
+            stages = {key: _copy(histogram) for key, histogram in self.stages.items()}
+
+        lines = []
+        _counter(lines, "http_requests_total", "Requests answered, by route, method and status",
+                 ("route", "method", "status"), requests)
+        _counter(lines, "http_request_errors_total", "Requests answered with a 5xx status, by route and method",
+                 ("route", "method"), errors)
+        _histogram(lines, "http_request_duration_seconds",
+                   "Time from the start of request handling to the response, by route and method",
+                   ("route", "method"), latency)
+        _histogram(lines, "predict_stage_duration_seconds",
+                   "Time spent in each stage of a prediction request (validate, encode, infer, serialize)",
+                   ("route", "stage"), stages)
+        return "\n".join(lines) + "\n"
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts, copy.sum = list(histogram.counts), histogram.sum
+    return copy
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def _labels(names, values):
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _counter(lines, name, help_text, names, values):
+    lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} counter"]
+    for key, value in sorted(values.items()):
+        lines.append(f"{PREFIX}_{name}{_labels(names, key)} {value}")
+
+
+def _histogram(lines, name, help_text, names, histograms):
+    lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        for bound, total in histogram.samples():
+            bucket = _labels((*names, "le"), (*key, bound))
+            lines.append(f"{PREFIX}_{name}_bucket{bucket} {total}")
+        lines.append(f"{PREFIX}_{name}_sum{_labels(names, key)} {_number(histogram.sum)}")
+        lines.append(f"{PREFIX}_{name}_count{_labels(names, key)} {histogram.count}")
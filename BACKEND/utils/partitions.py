@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+
+def build_district_index(df: pd.DataFrame, sort_within=None):
+    """
+    Sort rows by district and record where each district's rows start and stop.
+
+    Returns the sorted frame and a {district: slice} map. df.iloc[index[name]]
+    is a cheap view over that district's rows, so requests never scan or copy
+    the whole table. With sort_within (a column name), rows inside each
+    district are ordered by that column as well.
+    """
+    # Stable sort keeps the original row order inside each district
+    by = ["district"] if sort_within is None else ["district", sort_within]
+    df = df.sort_values(by, kind="stable").reset_index(drop=True)
+    return df, partition_slices(df)
+
+
+def partition_slices(df: pd.DataFrame):
+    """{district: slice} for a frame whose rows are already grouped by district"""
+    codes = df["district"].cat.codes.to_numpy()
+    boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(df)]))
+
+    index = {}
+    categories = df["district"].cat.categories
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        if stop > start:
+            index[categories[codes[start]]] = slice(start, stop)
+
+    return index
+
+
+def _district_day_keys(codes, dates):
+    """One sortable int64 per row: district code in the high bits, day number in the low 32"""
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    return (codes.astype(np.int64) << 32) | (days - np.iinfo(np.int32).min)
+
+
+def insert_rows(df: pd.DataFrame, rows: pd.DataFrame):
+    """
+    Insert rows into a frame from build_district_index(df, sort_within="date"),
+    keeping it sorted by district and date, without sorting the existing rows
+    again: each new row's place is found by binary search.
+
+    Returns (frame, {district: slice}, order), where order[i] is the position
+    in concat([df, rows]) of the frame's row i.
+    """
+    # One category set per column for both frames. Districts stay sorted (Index.union),
+    # like a fresh load's, so the existing district order stays valid; other columns
+    # keep their categories in order (day_of_week's are DAY_NAMES) and get unseen ones appended
+    for col in df.select_dtypes("category").columns:
+        if col == "district":
+            categories = df[col].cat.categories.union(rows[col].astype(str).unique())
+            df = df.assign(**{col: df[col].cat.set_categories(categories)})
+        else:
+            unseen = pd.Index(rows[col].astype(str).unique()).difference(df[col].cat.categories)
+            df = df.assign(**{col: df[col].cat.add_categories(unseen)})
+            categories = df[col].cat.categories
+        rows = rows.assign(**{col: pd.Categorical(rows[col].astype(str), categories=categories)})
+    rows = rows.reset_index(drop=True)
+    ordered = rows.sort_values(["district", "date"], kind="stable")
+
+    old_keys = _district_day_keys(df["district"].cat.codes.to_numpy(), df["date"].to_numpy())
+    new_keys = _district_day_keys(ordered["district"].cat.codes.to_numpy(), ordered["date"].to_numpy())
+    # After the existing rows of the same district and day, like a stable sort would put them
+    places = np.searchsorted(old_keys, new_keys, side="right")
+    order = np.insert(np.arange(len(df)), places, len(df) + ordered.index.to_numpy())
+
+    combined = pd.concat([df, rows], ignore_index=True).take(order).reset_index(drop=True)
+    return combined, partition_slices(combined), order
+
+
+def find_existing(df: pd.DataFrame, district_index, rows: pd.DataFrame):
+    """
+    For each of rows, the position in df, a frame from
+    build_district_index(df, sort_within="date"), of the row with the same
+    date, state, district and pincode, or -1 where there is none. Only the
+    partitions of the districts rows name are searched, by binary search on
+    their dates, so the work follows the size of rows, not of df.
+    """
+    found = np.full(len(rows), -1, dtype=np.int64)
+    dates = df["date"].to_numpy()
+    districts = rows["district"].astype(str).to_numpy()
+    for district in np.unique(districts):
+        partition = district_index.get(district)
+        if partition is None:
+            continue
+        mine = np.flatnonzero(districts == district)
+        new_dates = rows["date"].to_numpy()[mine]
+        lo = np.searchsorted(dates[partition], new_dates, side="left") + partition.start
+        hi = np.searchsorted(dates[partition], new_dates, side="right") + partition.start
+
+        # Existing rows of every day the new rows fall on
+        blocks = np.unique(np.stack([lo, hi], axis=1), axis=0)
+        candidates = np.concatenate([np.arange(start, stop) for start, stop in blocks if stop > start] or [[]]).astype(np.int64)
+        if not len(candidates):
+            continue
+        existing = pd.MultiIndex.from_arrays([
+            dates[candidates],
+            df["pincode"].to_numpy()[candidates],
+            df["state"].iloc[candidates].astype(str).to_numpy(),
+        ])
+        unique = ~existing.duplicated()
+        matches = existing[unique].get_indexer(pd.MultiIndex.from_arrays([
+            new_dates, rows["pincode"].to_numpy()[mine], rows["state"].astype(str).to_numpy()[mine],
+        ]))
+        found[mine] = np.where(matches >= 0, candidates[unique][np.maximum(matches, 0)], -1)
+    return found
+
+
+class DateIndex:
+    """
+    Finds the rows of a date window by binary search.
+
+    Expects the frame from build_district_index(df, sort_within="date"), so
+    each district's dates are already sorted and a district window is a
+    slice inside its partition. For all districts it keeps the row positions
+    in date order, and a window is a run of those positions.
+    """
+
+    def __init__(self, df: pd.DataFrame, district_index):
+        self.district_index = district_index
+        self.dates = df["date"].to_numpy()
+        self.order = np.argsort(self.dates, kind="stable")
+        self.sorted_dates = self.dates[self.order]
+
+    @staticmethod
+    def _bounds(start, end):
+        """datetime.date start/end (inclusive, None for open) as a half-open datetime64 range"""
+        lower = np.datetime64(start, "ns") if start is not None else np.datetime64("NaT")
+        upper = np.datetime64(end, "ns") + np.timedelta64(1, "D") if end is not None else np.datetime64("NaT")
+        return lower, upper
+
+    @staticmethod
+    def _search(dates, lower, upper):
+        lo = np.searchsorted(dates, lower, side="left") if not np.isnat(lower) else 0
+        hi = np.searchsorted(dates, upper, side="left") if not np.isnat(upper) else len(dates)
+        return int(lo), int(max(lo, hi))
+
+    def rows(self, district, start=None, end=None):
+        """
+        Rows of one district (a slice) or of all districts for None/'All'
+        (an array of positions) dated between start and end. None if the
+        district is unknown.
+        """
+        lower, upper = self._bounds(start, end)
+        if not district or district == "All":
+            lo, hi = self._search(self.sorted_dates, lower, upper)
+            return self.order[lo:hi]
+
+        rows = self.district_index.get(district)
+        if rows is None:
+            return None
+        lo, hi = self._search(self.dates[rows], lower, upper)
+        return slice(rows.start + lo, rows.start + hi)
+
+    def extended(self, df: pd.DataFrame, district_index, order):
+        """
+        The index after insert_rows(): df, district_index and order as it
+        returned them. The existing date order is kept and the new rows are
+        merged into it by binary search instead of sorting every row again.
+        """
+        old_rows = len(self.dates)
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+
+        index = object.__new__(DateIndex)
+        index.district_index = district_index
+        index.dates = df["date"].to_numpy()
+
+        new_positions = position[old_rows:]
+        new_positions = new_positions[np.argsort(index.dates[new_positions], kind="stable")]
+        new_dates = index.dates[new_positions]
+        places = np.searchsorted(self.sorted_dates, new_dates, side="right")
+        index.order = np.insert(position[self.order], places, new_positions)
+        index.sorted_dates = np.insert(self.sorted_dates, places, new_dates)
+        return index
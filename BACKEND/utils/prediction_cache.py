@@ -0,0 +1,50 @@
+import numpy as np
+
+from utils.response_cache import LRUCache
+
+
+class PredictionCache:
+    """
+    Memoizes model probabilities per encoded feature row.
+
+    The key is the row's float64 bytes, so inputs that differ only in how they
+    were written ("5" vs 5.0, field order) share an entry, together with the
+    digest of the model file, so a request still running on a replaced model
+    can never store its result for the new one, while states that only update
+    the data (reloads, ingests, forecast roll-overs) keep the entries. Call
+    invalidate() when the model changes to drop the old entries.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.entries = LRUCache(maxsize)
+
+    def invalidate(self):
+        self.entries.clear()
+
+    def stats(self):
+        return self.entries.stats()
+
+    def predict_proba(self, state, features):
+        """Probabilities for each row of features, scoring only the rows not seen before"""
+        # Adding 0.0 folds -0.0 into 0.0 so both produce the same key
+        keys = [(state.model_digest, row.tobytes()) for row in features + 0.0]
+        probabilities = [self.entries.get(key) for key in keys]
+
+        # Rows repeated within one request are scored once
+        misses = {}
+        for i, cached in enumerate(probabilities):
+            if cached is None:
+                misses.setdefault(keys[i], []).append(i)
+
+        if misses:
+            first_rows = [positions[0] for positions in misses.values()]
+            scored = state.model.predict_proba(features[first_rows])
+            for (key, positions), row_probabilities in zip(misses.items(), scored):
+                # A copy, so the entry does not keep the whole batch result alive
+                row_probabilities = row_probabilities.copy()
+                row_probabilities.flags.writeable = False
+                self.entries.put(key, row_probabilities)
+                for i in positions:
+                    probabilities[i] = row_probabilities
+
+        return np.vstack(probabilities)
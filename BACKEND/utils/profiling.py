@@ -0,0 +1,259 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from werkzeug.datastructures import EnvironHeaders
+
+PROFILE_MODES = ("cprofile", "sample")
+# Caller-supplied request ids are used in file names, so only these are accepted
+REQUEST_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+def collapse(frame):
+    """A frame's stack root first, as a flame graph 'folded' line: a;b;c"""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def write_folded(stacks, path):
+    """Write Counter({folded stack: samples}) in the format flamegraph.pl and speedscope read"""
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def cprofile_top(profiler, top):
+    """The top functions of a cProfile run by cumulative time"""
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:top]
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": calls,
+            "primitive_calls": primitive,
+            "total_seconds": round(total, 6),
+            "cumulative_seconds": round(cumulative, 6),
+        }
+        for (filename, line, name), (primitive, calls, total, cumulative, _) in rows
+    ]
+
+
+def sampled_top(stacks, top):
+    """The top functions of sampled stacks by the share of samples they were on the stack for"""
+    samples = sum(stacks.values())
+    on_stack = Counter()
+    for stack, count in stacks.items():
+        for name in set(stack.split(";")):
+            on_stack[name] += count
+    return [
+        {"function": name, "samples": count, "share": round(count / samples, 4)}
+        for name, count in on_stack.most_common(top)
+    ]
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of running threads every `interval` seconds
+    from a background thread and counts them as folded stacks. With
+    thread_id only that thread is sampled, otherwise every thread but the
+    sampler itself.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        if self.thread_id is not None:
+            frames = {self.thread_id: frames[self.thread_id]} if self.thread_id in frames else {}
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident != own:
+                    self.stacks[collapse(frame)] += 1
+
+    def take(self):
+        """The stacks counted so far, starting a new count"""
+        with self._lock:
+            stacks, self.stacks = self.stacks, Counter()
+        return stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class StackDumpWindow:
+    """
+    Samples every thread for `seconds` and writes the stacks seen in each
+    `period` to its own folded file in output_dir (stacks-<start>-<n>.folded),
+    ready for flamegraph.pl or speedscope. One window runs at a time.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self.running = False
+        self.files = []
+        self.ends_at = None
+
+    def start(self, seconds, interval, period):
+        """Start a window; False if one is already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self.running, self.files = True, []
+            self.ends_at = time.time() + seconds
+        threading.Thread(target=self._run, args=(seconds, interval, period), name="stack-dumps", daemon=True).start()
+        return True
+
+    def _run(self, seconds, interval, period):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        sampler = StackSampler(interval).start()
+        try:
+            deadline = time.monotonic() + seconds
+            part = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                time.sleep(max(0.0, min(period, remaining)))
+                part += 1
+                path = os.path.join(self.output_dir, f"stacks-{stamp}-{part:03d}.folded")
+                write_folded(sampler.take(), path)
+                self.files.append(os.path.basename(path))
+                if remaining <= period:
+                    break
+        finally:
+            sampler.stop()
+            self.running = False
+
+    def status(self):
+        return {
+            "running": self.running,
+            "ends_at": datetime.fromtimestamp(self.ends_at, timezone.utc).isoformat() if self.running else None,
+            "files": list(self.files),
+        }
+
+
+class RequestProfiler:
+    """
+    WSGI middleware that profiles single requests on demand. A request with
+    an X-Profile header (cprofile, the default for any other value, or
+    sample) that authorize(headers) accepts runs under cProfile or a stack
+    sampler; the top functions are stored as <request id>.json in
+    output_dir, next to the raw .prof or .folded file, and the id is sent
+    back in X-Profile-Id. Every other request goes straight through.
+
+    Only installed when profiling is enabled, so a disabled setup does not
+    run any of this. A profiled response is buffered so its body is part of
+    the profile.
+    """
+
+    def __init__(self, wsgi_app, authorize, output_dir, top=30, sample_interval=0.001):
+        self.wsgi_app = wsgi_app
+        self.authorize = authorize
+        self.output_dir = output_dir
+        self.top = top
+        self.sample_interval = sample_interval
+
+    def __call__(self, environ, start_response):
+        mode = environ.get("HTTP_X_PROFILE")
+        if not mode or not self.authorize(EnvironHeaders(environ)):
+            return self.wsgi_app(environ, start_response)
+
+        mode = mode if mode in PROFILE_MODES else "cprofile"
+        request_id = environ.get("HTTP_X_REQUEST_ID", "")
+        if not REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured["status"] = status
+            return start_response(status, [*headers, ("X-Profile-Id", request_id)], exc_info)
+
+        started = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(self.sample_interval, threading.get_ident()).start()
+        try:
+            body = self.wsgi_app(environ, capture_start_response)
+            try:
+                chunks = list(body)
+            finally:
+                if hasattr(body, "close"):
+                    body.close()
+        finally:
+            if mode == "cprofile":
+                profiler.disable()
+            else:
+                sampler.stop()
+            seconds = time.perf_counter() - started
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, request_id)
+        if mode == "cprofile":
+            profiler.dump_stats(base + ".prof")
+            top = cprofile_top(profiler, self.top)
+        else:
+            stacks = sampler.take()
+            write_folded(stacks, base + ".folded")
+            top = sampled_top(stacks, self.top)
+
+        query = environ.get("QUERY_STRING")
+        report = {
+            "request_id": request_id,
+            "mode": mode,
+            "method": environ.get("REQUEST_METHOD"),
+            "path": environ.get("PATH_INFO", "") + (f"?{query}" if query else ""),
+            "status": captured.get("status"),
+            "seconds": round(seconds, 6),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "top": top,
+        }
+        with open(base + ".json", "w") as f:
+            json.dump(report, f, indent=2)
+        return chunks
+
+
+def read_report(output_dir, request_id):
+    """A stored request profile, or None if there is none with that id"""
+    if not REQUEST_ID.match(request_id):
+        return None
+    path = os.path.join(output_dir, request_id + ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
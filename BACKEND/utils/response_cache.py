@@ -0,0 +1,106 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, make_response, request
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ResponseCache:
+    """
+    Caches rendered GET responses keyed on (path, query args, data version).
+
+    Cached responses carry an ETag and a Last-Modified header set to the time
+    the data was loaded, and conditional requests are answered with 304.
+    Only 200 responses are stored, and not those marked Cache-Control:
+    no-store (fallback payloads such as "Data not loaded"). Call
+    invalidate() whenever the model or data is reloaded.
+    """
+
+    def __init__(self, maxsize=256):
+        self.entries = LRUCache(maxsize)
+        self.version = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def invalidate(self):
+        self.version += 1
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.entries.clear()
+
+    def stats(self):
+        return {**self.entries.stats(), "data_version": self.version}
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Capture the version first so a response computed from data that is
+            # being replaced can never be stored under the new version
+            version = self.version
+            last_modified = self.last_modified
+            key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+
+            entry = self.entries.get(key)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.cache_control.no_store:
+                    return response
+
+                body = response.get_data()
+                entry = (body, response.mimetype, hashlib.sha1(body).hexdigest())
+                self.entries.put(key, entry)
+
+            body, mimetype, etag = entry
+            response = Response(body, mimetype=mimetype)
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            return response.make_conditional(request)
+
+        return wrapper
@@ -0,0 +1,193 @@
+import copy
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+class ServingState:
+    """
+    Everything a request reads: the model, its feature columns and encoder,
+    the data and the indexes and forecast derived from them. A state is built
+    completely before it is published and never mutated afterwards, so a
+    request that grabs the current state once sees one consistent version for
+    its whole duration.
+    """
+
+    def __init__(self, version=0, model=None, feature_columns=None, encoder=None,
+                 merged_data=None, district_index=None, date_index=None, aggregate_cube=None,
+                 forecast=None, segments=(), model_digest=None):
+        self.version = version
+        self.model = model
+        # SHA-256 of the model file, which memoized predictions are keyed on
+        self.model_digest = model_digest
+        self.feature_columns = feature_columns
+        self.encoder = encoder
+        self.merged_data = merged_data
+        self.district_index = district_index if district_index is not None else {}
+        self.date_index = date_index
+        self.aggregate_cube = aggregate_cube
+        self.forecast = forecast
+        # Rows ingested since the data was loaded, not folded in yet (see utils.ingest.Segment)
+        self.segments = list(segments)
+        self.warmed_up = False
+        # Seconds spent in each startup stage, filled in by the builder
+        self.stage_timings = {}
+        # Fingerprint of the source CSVs merged_data was loaded from
+        self.data_fingerprint = None
+        self.loaded_at = datetime.now(timezone.utc)
+
+    def replace(self, version, **parts):
+        """
+        A new state under version with the given parts (e.g. forecast=...)
+        swapped in and everything else shared with this one
+        """
+        updated = copy.copy(self)
+        updated.version = version
+        updated.stage_timings = dict(self.stage_timings)
+        updated.loaded_at = datetime.now(timezone.utc)
+        for name, value in parts.items():
+            setattr(updated, name, value)
+        return updated
+
+    def layers(self):
+        """
+        The loaded data followed by each ingested segment. All of them have
+        merged_data, district_index, date_index and aggregate_cube, and a
+        request combines what it reads from each.
+        """
+        return [self, *self.segments]
+
+    def cube_layers(self):
+        """
+        layers() plus the retractions of rows a segment replaced (see
+        AggregateCube.retraction), which count those rows out when their
+        views are combined with the others
+        """
+        return [*self.layers(), *(retraction for segment in self.segments for retraction in segment.retracted)]
+
+    def replaced(self):
+        """{number of a layer in layers(): sorted positions of its rows that a later segment replaced}"""
+        positions = {}
+        for segment in self.segments:
+            for layer, rows in segment.replaces.items():
+                positions[layer] = np.union1d(positions.get(layer, rows), rows)
+        return positions
+
+    def districts(self):
+        """Every district with data, sorted"""
+        names = set(self.district_index)
+        for segment in self.segments:
+            names.update(segment.district_index)
+        return sorted(names)
+
+    def record_count(self):
+        if self.merged_data is None:
+            return 0
+        replaced = sum(len(rows) for rows in self.replaced().values())
+        return sum(len(layer.merged_data) for layer in self.layers()) - replaced
+
+
+class Reloader:
+    """
+    Rebuilds the serving state in a background thread and publishes it atomically.
+
+    `build(version)` returns a new ServingState and `publish(state)` swaps it
+    in. Only one reload runs at a time. If a build fails, the current state
+    stays in place and the error is reported in status().
+    """
+
+    def __init__(self, build, publish, watch_paths=()):
+        self._build = build
+        self._publish = publish
+        self._watch_paths = list(watch_paths)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.version = 0
+        self.last_error = None
+        self.last_reload = None
+        # Modification times of the watched files when the current state was built
+        self._seen = None
+
+    def reload(self, **build_kwargs):
+        """Build and publish a new state in the calling thread"""
+        return self.apply(lambda version: self._build(version, **build_kwargs))
+
+    def apply(self, build, writes_files=False, reads_files=True):
+        """
+        Publish the state build(version) returns, one at a time with reloads.
+        Used by reload() and by updates that derive the next state from the
+        current one instead of loading everything again; such a build returns
+        None to publish nothing. Pass writes_files when build itself writes
+        watched files that its state already covers, and reads_files=False
+        when it only recomputes part of the current state, so watched files
+        that changed meanwhile still trigger a full reload.
+        """
+        with self._lock:
+            version = self.version + 1
+            # Files changed from here on are not in this state and should trigger the watcher
+            if reads_files and not writes_files:
+                self._seen = self._mtimes()
+            try:
+                state = build(version)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"✗ Reload failed, keeping version {self.version}: {e}")
+                return False
+            if state is None:
+                return False
+            if reads_files and writes_files:
+                self._seen = self._mtimes()
+            self._publish(state)
+            self.version = version
+            self.last_error = None
+            self.last_reload = state.loaded_at
+            return True
+
+    def trigger(self, build=None, **apply_kwargs):
+        """
+        Start a background reload, or apply(build, **apply_kwargs) in the
+        background when build is given. Returns the thread, or None if one is
+        already running.
+        """
+        if self.running:
+            return None
+        target = self.reload if build is None else lambda: self.apply(build, **apply_kwargs)
+        self._thread = threading.Thread(target=target, name="state-reload", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self):
+        return {
+            "version": self.version,
+            "reloading": self.running,
+            "last_reload": self.last_reload.isoformat() if self.last_reload else None,
+            "last_error": self.last_error,
+        }
+
+    def _mtimes(self):
+        mtimes = {}
+        for path in self._watch_paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def watch(self, interval):
+        """Poll the watched files every `interval` seconds and reload when one changes"""
+        def poll():
+            if self._seen is None:
+                self._seen = self._mtimes()
+            while True:
+                time.sleep(interval)
+                if self._mtimes() != self._seen and self.trigger() is not None:
+                    print("↻ Model or data files changed - reloading in the background")
+
+        threading.Thread(target=poll, name="state-watch", daemon=True).start()
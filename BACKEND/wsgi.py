@@ -0,0 +1,14 @@
+"""
+WSGI entry point for production serving. From the BACKEND directory:
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+gunicorn.conf.py preloads this module in the master process, so the model,
+merged_data and the derived indexes are built once and the forked workers
+share those pages instead of each loading a copy.
+"""
+from app import app as application, init_app
+
+__all__ = ["application"]
+
+init_app()
@@ -34,6 +34,15 @@ ChartJS.register(
   Filler
 )
 
+// The fields /api/statistics used to send with an error, which the overview renders as zeros
+const STATISTICS_FALLBACK = {
+  total_records: 0,
+  crowd_distribution: {},
+  avg_biometric: 0,
+  avg_enrolment: 0,
+  districts: []
+}
+
 const Dashboard = ({ onBack, initialTab = 'overview' }) => {
   const [loading, setLoading] = useState(true)
   const [activeTab, setActiveTab] = useState(initialTab)
@@ -74,25 +83,34 @@ const Dashboard = ({ onBack, initialTab = 'overview' }) => {
     }
   }, [])
 
+  // /api/dashboard returns the statistics, analytics and trends payloads together,
+  // or an error status with a single {error} that each view shows as before
+  const setDashboardData = async (response) => {
+    const data = await response.json().catch(() => ({}))
+    if (!response.ok || !data.statistics) {
+      const error = { error: data.error || `Request failed with status ${response.status}` }
+      setStatistics({ ...STATISTICS_FALLBACK, ...error })
+      setAnalytics(error)
+      setTrends(error)
+      return
+    }
+    setStatistics(data.statistics)
+    setAnalytics(data.analytics)
+    setTrends(data.trends)
+  }
+
   const fetchAllData = async () => {
     try {
       setLoading(true)
       
-      const [statsRes, analyticsRes, trendsRes, districtsRes] = await Promise.all([
-        fetch(`http://localhost:5000/api/statistics?district=${selectedDistrict}`),
-        fetch(`http://localhost:5000/api/analytics?district=${selectedDistrict}`),
-        fetch(`http://localhost:5000/api/trends?district=${selectedDistrict}`),
+      const [dashboardRes, districtsRes] = await Promise.all([
+        fetch(`http://localhost:5000/api/dashboard?district=${selectedDistrict}`),
         fetch('http://localhost:5000/api/districts')
       ])
 
-      const statsData = await statsRes.json()
-      const analyticsData = await analyticsRes.json()
-      const trendsData = await trendsRes.json()
       const districtsData = await districtsRes.json()
 
-      setStatistics(statsData)
-      setAnalytics(analyticsData)
-      setTrends(trendsData)
+      await setDashboardData(dashboardRes)
       setDistricts(districtsData.districts || [])
 
       await generatePredictions()
@@ -108,19 +126,8 @@ const Dashboard = ({ onBack, initialTab = 'overview' }) => {
     try {
       setPredictions([])
       
-      const [statsRes, analyticsRes, trendsRes] = await Promise.all([
-        fetch(`http://localhost:5000/api/statistics?district=${selectedDistrict}`),
-        fetch(`http://localhost:5000/api/analytics?district=${selectedDistrict}`),
-        fetch(`http://localhost:5000/api/trends?district=${selectedDistrict}`)
-      ])
-
-      const statsData = await statsRes.json()
-      const analyticsData = await analyticsRes.json()
-      const trendsData = await trendsRes.json()
-
-      setStatistics(statsData)
-      setAnalytics(analyticsData)
-      setTrends(trendsData)
+      const dashboardRes = await fetch(`http://localhost:5000/api/dashboard?district=${selectedDistrict}`)
+      await setDashboardData(dashboardRes)
 
       await generatePredictions(selectedDistrict)
       
@@ -1,26 +1,9 @@
-import pandas as pd
+from feature_engineering import load_merged_dataset
 
-# Load both datasets
-bio_df = pd.read_csv("data/biometric data.csv")
-enrol_df = pd.read_csv("data/enrolnment data.csv")
-
-bio_df.columns = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_18_plus"]
-enrol_df.columns = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_plus"]
-
-# Merge
-df = pd.merge(bio_df, enrol_df, on=["date", "state", "district", "pincode"], how="outer")
-df = df.fillna(0)
-
-# Convert date
-df["date"] = pd.to_datetime(df["date"], format="mixed", dayfirst=True)
-df["year"] = df["date"].dt.year
-df["month"] = df["date"].dt.month
+# Merged biometric/enrolment rows with date parts and totals (shared snapshot)
+df, _ = load_merged_dataset()
 df["year_month"] = df["date"].dt.to_period('M').astype(str)
 
-# Calculate totals
-df["total_enrolment"] = df["age_0_5"] + df["age_5_17"] + df["age_18_plus"]
-df["total_biometric"] = df["bio_age_5_17"] + df["bio_age_18_plus"]
-
 print("="*80)
 print("MONTHLY DATA ANALYSIS")
 print("="*80)
@@ -1,30 +1,30 @@
-import pandas as pd
+from feature_engineering import load_merged_dataset
 
-# Load biometric data
-bio_df = pd.read_csv("data/biometric data.csv")
-bio_df.columns = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_18_plus"]
-
-# Convert date
-bio_df["date"] = pd.to_datetime(bio_df["date"], format="mixed", dayfirst=True)
+# Merged biometric/enrolment rows (shared snapshot); the raw row counts are kept with it
+df, data_info = load_merged_dataset()
+has_biometric = df["total_biometric"] > 0
 
 print("="*60)
 print("DATA ANALYSIS - MONTHS PRESENT")
 print("="*60)
 
-print(f"\nTotal Records: {len(bio_df):,}")
+print(f"\nTotal Records: {len(df):,} merged "
+      f"({data_info['source_rows']['biometric']:,} biometric, {data_info['source_rows']['enrolment']:,} enrolment)")
 print(f"\nDate Range:")
-print(f"  Min: {bio_df['date'].min()}")
-print(f"  Max: {bio_df['date'].max()}")
+print(f"  Min: {df['date'].min()}")
+print(f"  Max: {df['date'].max()}")
 
 print(f"\nMonths Present:")
-months = bio_df['date'].dt.to_period('M').value_counts().sort_index()
+periods = df['date'].dt.to_period('M')
+months = periods.value_counts().sort_index()
+biometric_months = periods[has_biometric].value_counts()
 for month, count in months.items():
-    print(f"  {month}: {count:,} records")
+    print(f"  {month}: {count:,} records ({biometric_months.get(month, 0):,} with biometric updates)")
 
 print(f"\nTotal Unique Months: {len(months)}")
 
 # Check year distribution
 print(f"\nYear Distribution:")
-years = bio_df['date'].dt.year.value_counts().sort_index()
+years = df['year'].value_counts().sort_index()
 for year, count in years.items():
     print(f"  {year}: {count:,} records")
@@ -1,47 +1,12 @@
 import pandas as pd
 import os
 
+from feature_engineering import normalize_districts
+
 print("="*70)
 print("DATA PREPROCESSING - CLEANING DUPLICATE DISTRICTS")
 print("="*70)
 
-# District name standardization mapping
-district_mapping = {
-    # Anantapur variations
-    'Anantapur': 'Ananthapuramu',
-    'Ananthapur': 'Ananthapuramu',
-    
-    # Rangareddy variations
-    'K.V.Rangareddy': 'Rangareddy',
-    'K.v. Rangareddy': 'Rangareddy',
-    'Rangareddi': 'Rangareddy',
-    
-    # Mahabubnagar variations
-    'Mahabub Nagar': 'Mahabubnagar',
-    'Mahbubnagar': 'Mahabubnagar',
-    
-    # Karimnagar variations
-    'Karim Nagar': 'Karimnagar',
-    
-    # YSR variations
-    'Y. S. R': 'YSR',
-    
-    # Cuddapah (old name for YSR Kadapa)
-    'Cuddapah': 'YSR Kadapa',
-    
-    # NTR variations
-    'N. T. R': 'NTR',
-    
-    # Remove Telangana districts (not in Andhra Pradesh)
-    'Adilabad': None,
-    'Hyderabad': None,
-    'Khammam': None,
-    'Medak': None,
-    'Nalgonda': None,
-    'Nizamabad': None,
-    'Warangal': None
-}
-
 def clean_dataset(file_path, output_path, dataset_name):
     """Clean a dataset by standardizing district names and removing duplicates"""
     print(f"\n{'='*70}")
@@ -53,22 +18,11 @@ def clean_dataset(file_path, output_path, dataset_name):
     print(f"Original records: {len(df):,}")
     print(f"Original districts: {df['district'].nunique()}")
     
-    # Standardize district names
-    df['district'] = df['district'].replace(district_mapping)
-    
-    # Remove Telangana districts (None values)
-    before_removal = len(df)
-    df = df[df['district'].notna()]
-    removed = before_removal - len(df)
+    # Standardize district names, remove Telangana districts and duplicates
+    # (shared with incremental ingestion, see feature_engineering.normalize_districts)
+    df, removed = normalize_districts(df)
     if removed > 0:
-        print(f"Removed {removed:,} records from Telangana districts")
-    
-    # Remove any remaining duplicates based on all columns
-    before_dedup = len(df)
-    df = df.drop_duplicates()
-    dedup_removed = before_dedup - len(df)
-    if dedup_removed > 0:
-        print(f"Removed {dedup_removed:,} duplicate records")
+        print(f"Removed {removed:,} Telangana or duplicate records")
     
     # Sort by date and district for consistency
     if 'date' in df.columns:
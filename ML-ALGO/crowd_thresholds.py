@@ -0,0 +1,45 @@
+"""
+Crowd-level thresholds fixed at training time.
+
+The training scripts label every row Low/Medium/High by the terciles of
+total_biometric over the whole training set. save_thresholds() stores the
+two inner tercile edges next to the model, so the backend labels the rows it
+serves with the same definition of "High" the model was trained on instead
+of recomputing terciles over whatever rows a query selects.
+
+A value v is Low for v <= low, Medium for low < v <= high and High above,
+the right-closed bins pd.qcut uses.
+"""
+
+import json
+
+import numpy as np
+
+from tree_export import file_digest
+
+CROWD_COLUMN = "total_biometric"
+
+
+def inner_edges(bins):
+    """The two inner edges of the bins pd.qcut(..., q=3, retbins=True) returned"""
+    return [float(edge) for edge in bins[1:-1]]
+
+
+def save_thresholds(path, thresholds, rows, model_path):
+    """Write the inner tercile edges, tied to the model file they were trained with"""
+    with open(path, "w") as f:
+        json.dump({
+            "column": CROWD_COLUMN,
+            "thresholds": [float(edge) for edge in thresholds],
+            "rows": int(rows),
+            "model_digest": file_digest(model_path),
+        }, f, indent=2)
+
+
+def load_for_model(path, model_path):
+    """The thresholds at path, only if they were saved with the model file currently at model_path"""
+    with open(path) as f:
+        saved = json.load(f)
+    if saved["model_digest"] != file_digest(model_path):
+        raise ValueError("Crowd thresholds are out of date with the model file - re-run training")
+    return np.asarray(saved["thresholds"], dtype=np.float64)
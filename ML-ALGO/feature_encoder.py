@@ -0,0 +1,85 @@
+"""
+Feature encoder compiled once from the saved feature_columns.pkl.
+
+Turns prediction inputs into the model's feature matrix without going
+through pandas: numeric values and one-hot indicators are written straight
+into NumPy rows at positions looked up in a name -> index map. Used by the
+backend and by predict.py.
+"""
+
+import numpy as np
+
+NUMERIC_FEATURES = [
+    "year", "month", "day",
+    "age_0_5", "age_5_17", "age_18_plus",
+    "bio_age_5_17", "bio_age_18_plus",
+    "total_enrolment", "total_biometric",
+]
+CATEGORICAL_FEATURES = ["day_of_week", "district"]
+CROWD_LEVELS = ["Low", "Medium", "High"]
+
+
+class FeatureEncoder:
+    """
+    One-hot columns follow the `<feature>_<value>` naming produced by
+    get_dummies(drop_first=True) at training time. A value without a column
+    (the dropped reference category or an unseen district) leaves all of its
+    indicator columns at zero.
+    """
+
+    def __init__(self, feature_columns):
+        self.feature_columns = list(feature_columns)
+        self.positions = {name: i for i, name in enumerate(self.feature_columns)}
+        self.numeric_positions = [
+            (name, self.positions[name]) for name in NUMERIC_FEATURES if name in self.positions
+        ]
+        self.known_districts = frozenset(
+            name[len("district_"):] for name in self.feature_columns if name.startswith("district_")
+        )
+        self._template = np.zeros((1, len(self.feature_columns)), dtype=np.float64)
+
+    def district_in_training(self, district):
+        """Whether the training data had a one-hot column for this district"""
+        return district in self.known_districts
+
+    def encode_one(self, row):
+        """Single input dict -> (1, n_features) matrix"""
+        features = self._template.copy()
+        values = features[0]
+        for name, position in self.numeric_positions:
+            values[position] = row[name]
+        for name in CATEGORICAL_FEATURES:
+            position = self.positions.get(f"{name}_{row[name]}")
+            if position is not None:
+                values[position] = 1.0
+        return features
+
+    def encode_many(self, rows):
+        """List of input dicts -> (len(rows), n_features) matrix"""
+        features = np.zeros((len(rows), len(self.feature_columns)), dtype=np.float64)
+
+        for name, position in self.numeric_positions:
+            features[:, position] = np.fromiter((row[name] for row in rows), np.float64, len(rows))
+
+        for name in CATEGORICAL_FEATURES:
+            positions = np.fromiter(
+                (self.positions.get(f"{name}_{row[name]}", -1) for row in rows), np.int64, len(rows)
+            )
+            hit = positions >= 0
+            features[np.flatnonzero(hit), positions[hit]] = 1.0
+
+        return features
+
+    def encode(self, rows):
+        return self.encode_one(rows[0]) if len(rows) == 1 else self.encode_many(rows)
+
+
+def predict_levels(model, features):
+    """
+    Score once with predict_proba and take the argmax as the predicted level,
+    instead of calling predict and predict_proba (which scores the trees twice).
+    Returns (level names, probabilities).
+    """
+    probabilities = model.predict_proba(features)
+    levels = [CROWD_LEVELS[i] for i in probabilities.argmax(axis=1)]
+    return levels, probabilities
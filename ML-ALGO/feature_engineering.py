@@ -0,0 +1,306 @@
+"""
+Shared loading and feature engineering for the merged biometric/enrollment dataset.
+
+Used by the training and analysis scripts and by the backend, which imports
+this module from ../ML-ALGO so both sides build exactly the same frame.
+load_merged_dataset() merges the raw CSVs once and keeps the result as a
+Parquet snapshot keyed by their contents; later callers read the snapshot.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+BIO_COLUMNS = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_18_plus"]
+ENROL_COLUMNS = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_plus"]
+MERGE_KEYS = ["date", "state", "district", "pincode"]
+COUNT_COLUMNS = ["bio_age_5_17", "bio_age_18_plus", "age_0_5", "age_5_17", "age_18_plus"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Default locations, relative to ML-ALGO (where the scripts are run from)
+BIO_DATA_PATH = "data/biometric data.csv"
+ENROL_DATA_PATH = "data/enrolnment data.csv"
+SNAPSHOT_PATH = "data/merged_snapshot.parquet"
+
+# District name standardization (see clean_datasets.py). None marks Telangana
+# districts, which are not part of Andhra Pradesh and are dropped
+DISTRICT_MAPPING = {
+    # Anantapur variations
+    'Anantapur': 'Ananthapuramu',
+    'Ananthapur': 'Ananthapuramu',
+
+    # Rangareddy variations
+    'K.V.Rangareddy': 'Rangareddy',
+    'K.v. Rangareddy': 'Rangareddy',
+    'Rangareddi': 'Rangareddy',
+
+    # Mahabubnagar variations
+    'Mahabub Nagar': 'Mahabubnagar',
+    'Mahbubnagar': 'Mahabubnagar',
+
+    # Karimnagar variations
+    'Karim Nagar': 'Karimnagar',
+
+    # YSR variations
+    'Y. S. R': 'YSR',
+
+    # Cuddapah (old name for YSR Kadapa)
+    'Cuddapah': 'YSR Kadapa',
+
+    # NTR variations
+    'N. T. R': 'NTR',
+
+    # Remove Telangana districts (not in Andhra Pradesh)
+    'Adilabad': None,
+    'Hyderabad': None,
+    'Khammam': None,
+    'Medak': None,
+    'Nalgonda': None,
+    'Nizamabad': None,
+    'Warangal': None
+}
+
+# Bump whenever load_merged_data() changes the columns it produces so that
+# snapshots written by an older version are rebuilt instead of reused.
+SNAPSHOT_VERSION = 3
+SNAPSHOT_METADATA_KEY = b"identiflow.snapshot"
+
+
+def load_merged_data(bio_path, enrol_path):
+    """Merged dataset with derived columns, in the compact in-memory schema"""
+    return compact_frame(merge_sources(bio_path, enrol_path))
+
+
+def merge_sources(bio_path, enrol_path):
+    """Read both raw CSVs, outer-merge them and add the derived columns"""
+    return merge_frames(pd.read_csv(bio_path), pd.read_csv(enrol_path))
+
+
+def load_merged_dataset(bio_path=BIO_DATA_PATH, enrol_path=ENROL_DATA_PATH, snapshot_path=SNAPSHOT_PATH):
+    """
+    (frame, info): the merged dataset in the compact schema, read from the
+    snapshot when it was built from the current CSVs, otherwise merged and
+    written to snapshot_path so the next caller reads it. info is the
+    snapshot metadata (fingerprint, rows, source_rows) plus "cached", True
+    when the snapshot was used.
+    """
+    fingerprint = fingerprint_sources([bio_path, enrol_path])
+    snapshot = read_snapshot(snapshot_path, fingerprint)
+    if snapshot is not None:
+        df, info = snapshot
+        return df, {**info, "cached": True}
+
+    df, info = rebuild_snapshot(bio_path, enrol_path, snapshot_path, fingerprint)
+    return df, {**info, "cached": False}
+
+
+def rebuild_snapshot(bio_path, enrol_path, snapshot_path, fingerprint=None):
+    """
+    Merge the raw CSVs and write the snapshot, returning (frame, metadata).
+    Without pyarrow, or with a read-only data directory, the frame is still
+    returned and the next caller merges again.
+    """
+    if fingerprint is None:
+        fingerprint = fingerprint_sources([bio_path, enrol_path])
+    bio_df, enrol_df = pd.read_csv(bio_path), pd.read_csv(enrol_path)
+    df = compact_frame(merge_frames(bio_df, enrol_df))
+    # Raw row counts, for the scripts that report them next to the merged count
+    source_rows = {"biometric": len(bio_df), "enrolment": len(enrol_df)}
+
+    try:
+        info = write_snapshot(df, snapshot_path, fingerprint, source_rows=source_rows)
+    except (ImportError, OSError):
+        info = snapshot_metadata(df, fingerprint, source_rows=source_rows)
+    return df, info
+
+
+def normalize_districts(df):
+    """
+    Standardize district names with DISTRICT_MAPPING, drop the Telangana
+    districts and exact duplicate rows. Returns (frame, rows removed).
+    """
+    before = len(df)
+    df = df.assign(district=df["district"].replace(DISTRICT_MAPPING))
+    df = df[df["district"].notna()].drop_duplicates()
+    return df, before - len(df)
+
+
+def merge_frames(bio_df, enrol_df):
+    """Outer-merge raw biometric and enrolment rows and add the derived columns"""
+    bio_df = bio_df.set_axis(BIO_COLUMNS, axis=1)
+    enrol_df = enrol_df.set_axis(ENROL_COLUMNS, axis=1)
+
+    df = pd.merge(bio_df, enrol_df, on=MERGE_KEYS, how="outer")
+    df = df.fillna(0)
+
+    df["date"] = pd.to_datetime(df["date"], format="mixed", dayfirst=True)
+    df["year"] = df["date"].dt.year
+    df["month"] = df["date"].dt.month
+    df["day"] = df["date"].dt.day
+    df["day_of_week"] = df["date"].dt.day_name()
+
+    df["total_enrolment"] = df["age_0_5"] + df["age_5_17"] + df["age_18_plus"]
+    df["total_biometric"] = df["bio_age_5_17"] + df["bio_age_18_plus"]
+
+    return df
+
+
+def compact_frame(df):
+    """
+    Shrink the merged frame: categorical strings, smallest unsigned ints for
+    the counts and small ints for the date parts. Values are unchanged.
+    """
+    df = df.copy()
+
+    for col in ["state", "district"]:
+        df[col] = df[col].astype("category")
+    df["day_of_week"] = pd.Categorical(df["day_of_week"], categories=DAY_NAMES)
+
+    # Counts are float64 only because fillna(0) runs after the outer merge
+    for col in COUNT_COLUMNS:
+        df[col] = pd.to_numeric(df[col].astype("int64"), downcast="unsigned")
+
+    # Totals are kept signed and wide enough that sums of uint16 counts cannot overflow
+    for col in ["total_enrolment", "total_biometric"]:
+        df[col] = df[col].astype("int32")
+
+    df["pincode"] = df["pincode"].astype("int32")
+    df["year"] = df["year"].astype("int16")
+    df["month"] = df["month"].astype("int8")
+    df["day"] = df["day"].astype("int8")
+
+    return df
+
+
+def memory_usage(df):
+    """Deep memory usage in bytes per column"""
+    return df.memory_usage(deep=True, index=False).to_dict()
+
+
+def fingerprint_sources(paths):
+    """SHA-256 over the contents of the source files (order matters)"""
+    digest = hashlib.sha256(f"v{SNAPSHOT_VERSION}".encode())
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_metadata(df, fingerprint, **extra):
+    """The metadata stored with a snapshot of df"""
+    return {"fingerprint": fingerprint, "version": SNAPSHOT_VERSION, "rows": len(df), **extra}
+
+
+def write_snapshot(df, path, fingerprint, **extra):
+    """
+    Write the merged frame to Parquet with the source fingerprint (and any
+    extra keys) in its metadata, and return that metadata
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    info = snapshot_metadata(df, fingerprint, **extra)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SNAPSHOT_METADATA_KEY] = json.dumps(info).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write next to the target and rename so readers never see a partial file;
+    # the pid keeps processes that miss the snapshot at once from sharing a temp file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return info
+
+
+def read_snapshot_info(path):
+    """Return the snapshot metadata dict, or None if there is no readable snapshot"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        return json.loads(metadata[SNAPSHOT_METADATA_KEY])
+    except Exception:
+        return None
+
+
+def read_snapshot(path, fingerprint):
+    """
+    (frame, metadata) of the snapshot at path, or None unless it was built
+    from sources matching `fingerprint`
+    """
+    info = read_snapshot_info(path)
+    if info is None or info.get("fingerprint") != fingerprint:
+        return None
+
+    import pyarrow.parquet as pq
+    return pq.read_table(path).to_pandas(), info
+
+
+def write_delta(df, delta_dir, fingerprint):
+    """
+    Store ingested rows (merged, compact schema) as a new Parquet part in
+    delta_dir. The part records the fingerprint of the source CSVs it was
+    ingested on top of, and parts are named so they sort in ingestion order.
+    """
+    os.makedirs(delta_dir, exist_ok=True)
+    path = os.path.join(delta_dir, f"delta-{time.time_ns()}.parquet")
+    write_snapshot(df, path, fingerprint)
+    return path
+
+
+def read_deltas(delta_dir, fingerprint):
+    """
+    (parts, skipped): the ingested parts in delta_dir stored on top of source
+    CSVs matching `fingerprint`, oldest first, and how many parts were left
+    out because the CSVs have changed since.
+    """
+    if not os.path.isdir(delta_dir):
+        return [], 0
+
+    parts, skipped = [], 0
+    for name in sorted(os.listdir(delta_dir)):
+        if not name.endswith(".parquet"):
+            continue
+        part = read_snapshot(os.path.join(delta_dir, name), fingerprint)
+        if part is None:
+            skipped += 1
+            continue
+        parts.append(part[0])
+    return parts, skipped
+
+
+def append_rows(df, parts):
+    """
+    df with the rows of parts appended, back in the compact schema. A part
+    row for a key that an earlier row has is that row with the delta's
+    counts merged in (see BACKEND/utils/ingest.py), so it replaces it.
+    """
+    if not parts:
+        return df
+    combined = pd.concat([df, *parts], ignore_index=True)
+    # Concatenating categoricals with different categories falls back to object
+    for col in ["state", "district"]:
+        combined[col] = combined[col].astype(str).astype("category")
+    combined["day_of_week"] = pd.Categorical(combined["day_of_week"], categories=DAY_NAMES)
+
+    keys = pd.MultiIndex.from_frame(combined[MERGE_KEYS])
+    replaced = keys.duplicated(keep="last") & keys.isin(keys[len(df):])
+    if replaced.any():
+        combined = combined[~replaced].reset_index(drop=True)
+    return combined
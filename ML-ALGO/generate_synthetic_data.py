@@ -0,0 +1,187 @@
+"""
+Generate synthetic biometric and enrolment extracts for scale testing.
+
+Writes `biometric data.csv` and `enrolnment data.csv` in the exact layout of
+the real extracts (same headers, dd-mm-YYYY and dd/mm/YYYY dates mixed, one
+row per date/state/district/pincode key and file), for any number of states,
+districts, pincodes and days. The defaults reproduce the size of the current
+Andhra Pradesh files; --states 10 or --states 100 gives 10x or 100x.
+
+Rows are generated and appended one block of days at a time, so memory use
+does not grow with the output and files larger than RAM can be written.
+Every day draws from its own seeded random stream, so the same seed gives
+byte-identical files whatever --chunk-cells is.
+
+    python generate_synthetic_data.py --states 10 --output-dir data/synthetic
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+BIO_HEADER = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_17_"]
+ENROL_HEADER = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_greater"]
+BIO_FILE = "biometric data.csv"
+ENROL_FILE = "enrolnment data.csv"
+
+# The first state is Andhra Pradesh with its real districts, so the trained
+# model and the backend recognise them; further states are synthetic
+FIRST_STATE = "Andhra Pradesh"
+AP_DISTRICTS = [
+    "Alluri Sitharama Raju", "Anakapalli", "Ananthapuramu", "Annamayya", "Bapatla", "Chittoor",
+    "East Godavari", "Eluru", "Guntur", "Kakinada", "Konaseema", "Krishna", "Kurnool", "NTR",
+    "Nandyal", "Palnadu", "Parvathipuram Manyam", "Prakasam", "Sri Potti Sriramulu Nellore",
+    "Sri Sathya Sai", "Srikakulam", "Tirupati", "Visakhapatnam", "Vizianagaram", "West Godavari",
+    "YSR Kadapa",
+]
+FIRST_PINCODE = 515001
+
+# Share of (day, pincode) keys with a row, and mean counts per row, as in the real extracts
+BIO_FILL = 0.59
+ENROL_FILL = 0.2
+BIO_MEANS = {"bio_age_5_17": 4, "bio_age_17_": 9}
+ENROL_MEANS = {"age_0_5": 1, "age_5_17": 2, "age_18_greater": 3}
+
+# Relative demand per day of week (Monday first) and per month (January first).
+# Both scale how many keys get a row that day and the counts in those rows, and
+# average 1 so the totals stay those of the flat profile
+WEEKDAY_SHAPE = np.array([1.25, 1.1, 1.0, 1.0, 1.05, 0.7, 0.3])
+WEEKDAY_SHAPE = WEEKDAY_SHAPE / WEEKDAY_SHAPE.mean()
+MONTH_SHAPE = np.array([1.1, 1.0, 0.95, 0.9, 1.2, 1.3, 1.15, 1.0, 0.95, 0.9, 0.85, 0.8])
+MONTH_SHAPE = MONTH_SHAPE / MONTH_SHAPE.mean()
+
+# (day, pincode) keys per written block; bounds memory use
+CHUNK_CELLS = 2_000_000
+
+
+def build_geography(states, districts_per_state, pincodes_per_district):
+    """
+    A frame with one row per pincode: its state and district names. Pincodes
+    are consecutive from FIRST_PINCODE, so each district and state covers one
+    run of them. Raises ValueError when they would not fit in six digits.
+    """
+    total = states * districts_per_state * pincodes_per_district
+    if FIRST_PINCODE + total - 1 > 999_999:
+        raise ValueError(f"{total:,} pincodes do not fit in six digits from {FIRST_PINCODE}")
+
+    state_names, district_names = [], []
+    for s in range(states):
+        state = FIRST_STATE if s == 0 else f"Synthetic State {s + 1:02d}"
+        for d in range(districts_per_state):
+            if s == 0 and d < len(AP_DISTRICTS):
+                district = AP_DISTRICTS[d]
+            else:
+                # District names are unique across states: the backend keys on district alone
+                district = f"{state} District {d + 1:02d}"
+            state_names.append(state)
+            district_names.append(district)
+
+    return pd.DataFrame({
+        "state": np.repeat(state_names, pincodes_per_district),
+        "district": np.repeat(district_names, pincodes_per_district),
+        "pincode": np.arange(FIRST_PINCODE, FIRST_PINCODE + total),
+    })
+
+
+def day_rows(seed, day_number, stream, date, geography, fill, means, shape):
+    """
+    One day's rows of one file: each key gets a row with probability
+    fill x shape, with Poisson counts around means x shape. Rows come out in
+    random order with the two date formats of the real files mixed.
+    """
+    rng = np.random.default_rng([seed, day_number, stream])
+    present = np.flatnonzero(rng.random(len(geography)) < min(1.0, fill * shape))
+    rng.shuffle(present)
+    rows = geography.iloc[present]
+    dates = np.where(rng.random(len(present)) < 0.5, date.strftime("%d-%m-%Y"), date.strftime("%d/%m/%Y"))
+    return pd.DataFrame({
+        "date": dates,
+        "state": rows["state"].to_numpy(),
+        "district": rows["district"].to_numpy(),
+        "pincode": rows["pincode"].to_numpy(),
+        **{column: rng.poisson(mean * shape, len(present)) for column, mean in means.items()},
+    })
+
+
+def generate(output_dir, states=1, districts_per_state=len(AP_DISTRICTS), pincodes_per_district=46,
+             days=306, start="2025-03-01", seed=42, flat=False, chunk_cells=CHUNK_CELLS):
+    """
+    Write both extracts into output_dir, a block of days at a time.
+    Returns {file name: rows written}.
+    """
+    geography = build_geography(states, districts_per_state, pincodes_per_district)
+    dates = pd.date_range(start, periods=days)
+    days_per_chunk = max(1, chunk_cells // len(geography))
+    outputs = [
+        (os.path.join(output_dir, BIO_FILE), BIO_HEADER, BIO_FILL, BIO_MEANS, 0),
+        (os.path.join(output_dir, ENROL_FILE), ENROL_HEADER, ENROL_FILL, ENROL_MEANS, 1),
+    ]
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for path, header, fill, means, stream in outputs:
+        pd.DataFrame(columns=header).to_csv(path, index=False)
+        written[os.path.basename(path)] = 0
+
+    for first in range(0, days, days_per_chunk):
+        chunk = range(first, min(first + days_per_chunk, days))
+        shapes = [1.0 if flat else WEEKDAY_SHAPE[dates[i].dayofweek] * MONTH_SHAPE[dates[i].month - 1]
+                  for i in chunk]
+        for path, header, fill, means, stream in outputs:
+            rows = pd.concat([day_rows(seed, i, stream, dates[i], geography, fill, means, shape)
+                              for i, shape in zip(chunk, shapes)], ignore_index=True)
+            rows.to_csv(path, mode="a", header=False, index=False)
+            written[os.path.basename(path)] += len(rows)
+        print(f"  days {chunk.start + 1}-{chunk.stop} of {days} written")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic biometric/enrolment extracts")
+    parser.add_argument("--output-dir", default="data/synthetic")
+    parser.add_argument("--states", type=int, default=1)
+    parser.add_argument("--districts", type=int, default=len(AP_DISTRICTS), help="districts per state")
+    parser.add_argument("--pincodes", type=int, default=46, help="pincodes per district")
+    parser.add_argument("--days", type=int, default=306)
+    parser.add_argument("--start", default="2025-03-01", help="first date, YYYY-MM-DD")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--flat", action="store_true",
+                        help="no day-of-week or seasonal shape, like the current extracts")
+    parser.add_argument("--chunk-cells", type=int, default=CHUNK_CELLS,
+                        help="(day, pincode) keys generated per block")
+    parser.add_argument("--force", action="store_true", help="overwrite existing files")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SYNTHETIC DATA GENERATION")
+    print("=" * 60)
+    existing = [name for name in (BIO_FILE, ENROL_FILE) if os.path.exists(os.path.join(args.output_dir, name))]
+    if existing and not args.force:
+        print(f"✗ {', '.join(existing)} already in {args.output_dir} - pass --force to overwrite")
+        return
+
+    pincodes = args.states * args.districts * args.pincodes
+    print(f"States: {args.states}, districts: {args.states * args.districts:,}, pincodes: {pincodes:,}")
+    print(f"Days: {args.days} from {args.start}, seed {args.seed}, "
+          f"{'flat' if args.flat else 'day-of-week and seasonal'} profile\n")
+
+    start = time.perf_counter()
+    try:
+        written = generate(args.output_dir, args.states, args.districts, args.pincodes, args.days,
+                           args.start, args.seed, args.flat, args.chunk_cells)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return
+    elapsed = time.perf_counter() - start
+
+    print()
+    for name, rows in written.items():
+        size = os.path.getsize(os.path.join(args.output_dir, name))
+        print(f"✓ {name}: {rows:,} rows, {size / 1e6:,.1f} MB")
+    print(f"✓ Done in {elapsed:.1f}s -> {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
-import pandas as pd
 import joblib
-import numpy as np
+
+from feature_encoder import CROWD_LEVELS, FeatureEncoder, predict_levels
 
 print("=" * 60)
 print("LightGBM Crowd Level Prediction")
@@ -10,6 +10,7 @@ print("=" * 60)
 print("\nLoading model...")
 model = joblib.load("models/lightgbm_merged_model.pkl")
 feature_columns = joblib.load("models/feature_columns.pkl")
+encoder = FeatureEncoder(feature_columns)
 
 print("Model loaded successfully!")
 print(f"Number of features: {len(feature_columns)}")
@@ -41,31 +42,19 @@ print("\nInput Data:")
 for key, value in sample_data.items():
     print(f"  {key}: {value}")
 
-# Convert to DataFrame
-input_df = pd.DataFrame([sample_data])
-
-# One-hot encode categorical features
-input_encoded = pd.get_dummies(input_df, columns=["day_of_week", "district"], drop_first=True)
-
-# Align with training features
-for col in feature_columns:
-    if col not in input_encoded.columns:
-        input_encoded[col] = 0
-
-input_encoded = input_encoded[feature_columns]
-
-# Make prediction
-prediction = model.predict(input_encoded)[0]
-prediction_proba = model.predict_proba(input_encoded)[0]
+# Encode straight into the model's feature layout
+input_encoded = encoder.encode_one(sample_data)
 
-crowd_levels = ["Low", "Medium", "High"]
+# Make prediction (one scoring pass; the level is the most probable class)
+levels, probabilities = predict_levels(model, input_encoded)
+prediction_proba = probabilities[0]
 
 print("\n" + "-" * 60)
 print("PREDICTION RESULT")
 print("-" * 60)
-print(f"Predicted Crowd Level: {crowd_levels[prediction]}")
+print(f"Predicted Crowd Level: {levels[0]}")
 print(f"\nProbabilities:")
-for i, level in enumerate(crowd_levels):
+for i, level in enumerate(CROWD_LEVELS):
     print(f"  {level}: {prediction_proba[i]:.2%}")
 
 print("\n" + "=" * 60)
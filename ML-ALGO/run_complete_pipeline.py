@@ -10,6 +10,10 @@ from sklearn.metrics import classification_report, accuracy_score
 import joblib
 import os
 
+from crowd_thresholds import inner_edges, save_thresholds
+from feature_engineering import load_merged_dataset
+from tree_export import export_checked
+
 def main():
     print("\n" + "="*70)
     print(" AADHAAR TREND ANALYSIS - COMPLETE ML PIPELINE")
@@ -17,33 +21,22 @@ def main():
     
     # Step 1: Load Data
     print("\n[STEP 1] Loading datasets...")
-    bio_df = pd.read_csv("data/biometric data.csv")
-    enrol_df = pd.read_csv("data/enrolnment data.csv")
-    print(f"✓ Biometric: {bio_df.shape[0]:,} records")
-    print(f"✓ Enrollment: {enrol_df.shape[0]:,} records")
+    df, data_info = load_merged_dataset()
+    print(f"✓ Biometric: {data_info['source_rows']['biometric']:,} records")
+    print(f"✓ Enrollment: {data_info['source_rows']['enrolment']:,} records")
     
-    # Step 2: Preprocess
+    # Steps 2-3: column names, outer merge and date features come from the
+    # shared snapshot (feature_engineering.py), rebuilt only when the CSVs change
     print("\n[STEP 2] Preprocessing...")
-    bio_df.columns = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_18_plus"]
-    enrol_df.columns = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_plus"]
-    print("✓ Column names standardized")
+    print("✓ Column names standardized, dates parsed")
     
-    # Step 3: Merge
     print("\n[STEP 3] Merging datasets...")
-    df = pd.merge(bio_df, enrol_df, on=["date", "state", "district", "pincode"], how="outer")
-    df = df.fillna(0)
-    print(f"✓ Merged dataset: {df.shape[0]:,} records")
+    print(f"✓ Merged dataset: {df.shape[0]:,} records ({'snapshot' if data_info['cached'] else 'merged from CSVs'})")
     
     # Step 4: Feature Engineering
     print("\n[STEP 4] Feature engineering...")
-    df["date"] = pd.to_datetime(df["date"], format="mixed", dayfirst=True)
-    df["year"] = df["date"].dt.year
-    df["month"] = df["date"].dt.month
-    df["day"] = df["date"].dt.day
-    df["day_of_week"] = df["date"].dt.day_name()
-    df["total_enrolment"] = df["age_0_5"] + df["age_5_17"] + df["age_18_plus"]
-    df["total_biometric"] = df["bio_age_5_17"] + df["bio_age_18_plus"]
-    df["crowd_level"] = pd.qcut(df["total_biometric"], q=3, labels=[0, 1, 2], duplicates="drop")
+    df["crowd_level"], crowd_bins = pd.qcut(df["total_biometric"], q=3, labels=[0, 1, 2],
+                                            duplicates="drop", retbins=True)
     df = df.dropna(subset=["crowd_level"])
     print(f"✓ Features created: {df.shape[1]} columns")
     
@@ -53,6 +46,9 @@ def main():
                     "bio_age_5_17", "bio_age_18_plus", "total_enrolment", "total_biometric"]
     X = df[feature_cols + ["day_of_week", "district"]].copy()
     y = df["crowd_level"].astype(int)
+    # As strings, so the dummy columns match models/feature_columns.pkl (see train_lightgbm_merged.py)
+    X["day_of_week"] = X["day_of_week"].astype(str)
+    X["district"] = X["district"].astype(str)
     X = pd.get_dummies(X, columns=["day_of_week", "district"], drop_first=True)
     print(f"✓ Feature matrix: {X.shape}")
     
@@ -79,7 +75,15 @@ def main():
     os.makedirs("models", exist_ok=True)
     joblib.dump(model, "models/lightgbm_merged_model.pkl")
     joblib.dump(X.columns.tolist(), "models/feature_columns.pkl")
+    save_thresholds("models/crowd_thresholds.json", inner_edges(crowd_bins), len(df), "models/lightgbm_merged_model.pkl")
     print("✓ Model saved to models/")
+    # The NumPy tree export the backend scores with, checked against LightGBM on the test split
+    try:
+        ensemble, max_diff = export_checked(model, "models/lightgbm_merged_model.pkl",
+                                            "models/lightgbm_merged_trees.npz", X_test)
+    except ValueError as e:
+        raise SystemExit(f"✗ {e}")
+    print(f"✓ Tree export: {ensemble.n_trees} trees, max probability difference {max_diff:.2e}")
     
     # Step 10: Demo Prediction
     print("\n[STEP 10] Demo prediction...")
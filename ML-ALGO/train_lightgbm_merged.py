@@ -4,77 +4,43 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import joblib
 import os
+from crowd_thresholds import inner_edges, save_thresholds
+from feature_engineering import load_merged_dataset
+from tree_export import export_checked
 
 print("=" * 60)
 print("LightGBM Training with Merged Datasets")
 print("=" * 60)
 
 # ---------------------------------
-# Load both datasets
+# Load the merged dataset
 # ---------------------------------
-print("\n[1/7] Loading datasets...")
-bio_df = pd.read_csv("data/biometric data.csv")
-enrol_df = pd.read_csv("data/enrolnment data.csv")
+print("\n[1/5] Loading merged dataset...")
 
-print(f"Biometric data shape: {bio_df.shape}")
-print(f"Enrollment data shape: {enrol_df.shape}")
+# Outer merge of both CSVs on (date, state, district, pincode) with the date
+# parts and totals added, read from the snapshot unless the CSVs have changed
+df, data_info = load_merged_dataset()
 
-# ---------------------------------
-# Standardize column names
-# ---------------------------------
-print("\n[2/7] Preprocessing datasets...")
-
-# Rename biometric columns
-bio_df.columns = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_18_plus"]
-
-# Rename enrollment columns  
-enrol_df.columns = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_plus"]
-
-# ---------------------------------
-# Merge datasets on common keys
-# ---------------------------------
-print("\n[3/7] Merging datasets...")
-df = pd.merge(
-    bio_df,
-    enrol_df,
-    on=["date", "state", "district", "pincode"],
-    how="outer"
-)
-
-# Fill missing values with 0
-df = df.fillna(0)
-
-print(f"Merged dataset shape: {df.shape}")
+print(f"Biometric records: {data_info['source_rows']['biometric']:,}")
+print(f"Enrollment records: {data_info['source_rows']['enrolment']:,}")
+print(f"Merged dataset shape: {df.shape} ({'snapshot' if data_info['cached'] else 'merged from CSVs'})")
 print(f"\nSample data:")
 print(df.head())
 
 # ---------------------------------
 # Feature Engineering
 # ---------------------------------
-print("\n[4/7] Feature engineering...")
-
-# Convert date to datetime
-df["date"] = pd.to_datetime(df["date"], format="mixed", dayfirst=True)
-
-# Extract date features
-df["year"] = df["date"].dt.year
-df["month"] = df["date"].dt.month
-df["day"] = df["date"].dt.day
-df["day_of_week"] = df["date"].dt.day_name()
-
-# Total enrollment
-df["total_enrolment"] = df["age_0_5"] + df["age_5_17"] + df["age_18_plus"]
-
-# Total biometric updates
-df["total_biometric"] = df["bio_age_5_17"] + df["bio_age_18_plus"]
+print("\n[2/5] Feature engineering...")
 
 # Create target variable: Crowd Level (Low, Medium, High)
-df["crowd_level"] = pd.qcut(
+df["crowd_level"], crowd_bins = pd.qcut(
     df["total_biometric"],
     q=3,
     labels=[0, 1, 2],  # 0=Low, 1=Medium, 2=High
-    duplicates="drop"
+    duplicates="drop",
+    retbins=True
 )
+crowd_thresholds = inner_edges(crowd_bins)
 
 # Remove rows with missing target
 df = df.dropna(subset=["crowd_level"])
@@ -82,11 +48,12 @@ df = df.dropna(subset=["crowd_level"])
 print(f"Dataset after feature engineering: {df.shape}")
 print(f"\nCrowd level distribution:")
 print(df["crowd_level"].value_counts().sort_index())
+print(f"Tercile thresholds (total_biometric): Low <= {crowd_thresholds[0]:g} < Medium <= {crowd_thresholds[1]:g} < High")
 
 # ---------------------------------
 # Prepare features for training
 # ---------------------------------
-print("\n[5/7] Preparing features...")
+print("\n[3/5] Preparing features...")
 
 feature_cols = [
     "year", "month", "day",
@@ -98,6 +65,12 @@ feature_cols = [
 X = df[feature_cols + ["day_of_week", "district"]].copy()
 y = df["crowd_level"].astype(int)
 
+# The snapshot stores these as categoricals (day_of_week in calendar order);
+# as strings get_dummies sorts them, which fixes the column order and the
+# dropped first level that models/feature_columns.pkl records
+X["day_of_week"] = X["day_of_week"].astype(str)
+X["district"] = X["district"].astype(str)
+
 # One-hot encode categorical features
 X = pd.get_dummies(X, columns=["day_of_week", "district"], drop_first=True)
 
@@ -107,7 +80,7 @@ print(f"Target shape: {y.shape}")
 # ---------------------------------
 # Train-test split
 # ---------------------------------
-print("\n[6/7] Splitting data...")
+print("\n[4/5] Splitting data...")
 X_train, X_test, y_train, y_test = train_test_split(
     X, y,
     test_size=0.2,
@@ -121,7 +94,7 @@ print(f"Testing samples: {X_test.shape[0]}")
 # ---------------------------------
 # Train LightGBM Model
 # ---------------------------------
-print("\n[7/7] Training LightGBM model...")
+print("\n[5/5] Training LightGBM model...")
 
 model = lgb.LGBMClassifier(
     n_estimators=300,
@@ -174,8 +147,22 @@ joblib.dump(model, "models/lightgbm_merged_model.pkl")
 # Save feature columns for prediction
 joblib.dump(X.columns.tolist(), "models/feature_columns.pkl")
 
+# The tercile edges the labels were built with, so the backend labels served rows the same way
+save_thresholds("models/crowd_thresholds.json", crowd_thresholds, len(df), "models/lightgbm_merged_model.pkl")
+
+# Flatten the trees for the NumPy evaluator used by the backend; the export
+# must score the held-out split like LightGBM does
+try:
+    ensemble, max_diff = export_checked(model, "models/lightgbm_merged_model.pkl",
+                                        "models/lightgbm_merged_trees.npz", X_test)
+except ValueError as e:
+    raise SystemExit(f"✗ {e}")
+
 print("\n" + "=" * 60)
 print("MODEL SAVED SUCCESSFULLY")
 print("=" * 60)
 print("Model: models/lightgbm_merged_model.pkl")
 print("Features: models/feature_columns.pkl")
+print(f"Crowd thresholds: models/crowd_thresholds.json {crowd_thresholds}")
+print(f"Tree export: models/lightgbm_merged_trees.npz ({ensemble.n_trees} trees, "
+      f"max probability difference on test set {max_diff:.2e})")
@@ -0,0 +1,223 @@
+"""
+Export a trained LightGBM multiclass model to flat NumPy arrays and score it
+without LightGBM.
+
+Scoring follows the QuickScorer scheme: every split node carries a bitmask of
+the leaves in its left subtree. A row that goes right at a node rules those
+leaves out, and the leftmost leaf of a tree that is not ruled out is the leaf
+the row ends in. So instead of walking each tree node by node, all split
+tests are evaluated as whole-array comparisons, OR-ed together per tree, and
+the lowest clear bit picks the leaf.
+
+Nodes are stored grouped by their rank inside their tree (first split of
+every tree, then the second, ...), with trees sorted by size, so the nodes
+of rank k belong to the first group_sizes[k] trees and each group is a plain
+slice of the per-tree accumulator.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+ZERO_THRESHOLD = 1e-35  # LightGBM's kZeroThreshold
+MAX_LEAVES = 64  # leaves of one tree must fit in a uint64 bitmask
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _flatten_tree(structure):
+    """Split nodes of one tree in preorder as dicts, plus its leaf values left to right"""
+    splits, leaves = [], []
+
+    def walk(node):
+        if "leaf_value" in node:
+            leaves.append(node["leaf_value"])
+            return 1 << (len(leaves) - 1)
+        if node["decision_type"] != "<=":
+            raise ValueError(f"Unsupported split type {node['decision_type']} (categorical splits)")
+        split = {
+            "feature": node["split_feature"],
+            "threshold": node["threshold"],
+            "default_left": node["default_left"],
+            "missing_type": MISSING_TYPES[node["missing_type"]],
+        }
+        splits.append(split)
+        split["left_leaves"] = walk(node["left_child"])
+        return split["left_leaves"] | walk(node["right_child"])
+
+    walk(structure)
+    if len(leaves) > MAX_LEAVES:
+        raise ValueError(f"Trees with more than {MAX_LEAVES} leaves are not supported")
+    return splits, leaves
+
+
+class TreeEnsemble:
+    """Flattened LightGBM softmax ensemble with a predict_proba like the sklearn wrapper's"""
+
+    ARRAYS = ["feature", "threshold", "default_left", "missing_type", "left_leaves",
+              "group_sizes", "leaf_values", "tree_class"]
+
+    def __init__(self, feature, threshold, default_left, missing_type, left_leaves,
+                 group_sizes, leaf_values, tree_class, num_class, source_digest=""):
+        self.feature = feature
+        self.threshold = threshold
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.left_leaves = left_leaves
+        self.group_sizes = group_sizes
+        self.leaf_values = leaf_values
+        self.tree_class = tree_class
+        self.num_class = int(num_class)
+        self.source_digest = str(source_digest)
+
+        self.n_trees, self.max_leaves = leaf_values.shape
+        self.has_zero_missing = bool((missing_type == MISSING_ZERO).any())
+        self._mask_dtype = np.uint32 if self.max_leaves <= 32 else np.uint64
+        bounds = np.concatenate([[0], np.cumsum(group_sizes)])
+        self._groups = [
+            (self.feature[start:end], self.threshold[start:end, None],
+             self.left_leaves[start:end, None].astype(self._mask_dtype), slice(start, end))
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        self._leaf_base = (np.arange(self.n_trees) * self.max_leaves)[:, None]
+        self._flat_leaf_values = leaf_values.ravel()
+        # Sums each class's trees: (num_class, n_trees)
+        self._class_matrix = np.eye(self.num_class)[tree_class].T.copy()
+
+    @classmethod
+    def from_booster(cls, booster, source_digest=""):
+        dump = booster.dump_model()
+        if not dump.get("objective", "").startswith("multiclass "):
+            raise ValueError(f"Only softmax multiclass models are supported, got {dump.get('objective')}")
+        num_class = dump["num_class"]
+
+        trees = [_flatten_tree(tree["tree_structure"]) for tree in dump["tree_info"]]
+        tree_class = [tree["tree_index"] % num_class for tree in dump["tree_info"]]
+        order = sorted(range(len(trees)), key=lambda i: -len(trees[i][0]))
+
+        splits, group_sizes = [], []
+        for rank in range(len(trees[order[0]][0]) if trees else 0):
+            group = [trees[i][0][rank] for i in order if len(trees[i][0]) > rank]
+            splits.extend(group)
+            group_sizes.append(len(group))
+
+        max_leaves = max(len(leaves) for _, leaves in trees)
+        leaf_values = np.zeros((len(trees), max_leaves))
+        for row, i in enumerate(order):
+            leaves = trees[i][1]
+            leaf_values[row, :len(leaves)] = leaves
+
+        return cls(
+            feature=np.asarray([s["feature"] for s in splits], dtype=np.int32),
+            threshold=np.asarray([s["threshold"] for s in splits], dtype=np.float64),
+            default_left=np.asarray([s["default_left"] for s in splits], dtype=bool),
+            missing_type=np.asarray([s["missing_type"] for s in splits], dtype=np.int8),
+            left_leaves=np.asarray([s["left_leaves"] for s in splits], dtype=np.uint64),
+            group_sizes=np.asarray(group_sizes, dtype=np.int32),
+            leaf_values=leaf_values,
+            tree_class=np.asarray([tree_class[i] for i in order], dtype=np.int32),
+            num_class=num_class,
+            source_digest=source_digest,
+        )
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            **{name: getattr(self, name) for name in self.ARRAYS},
+            num_class=self.num_class,
+            source_digest=self.source_digest,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                **{name: data[name] for name in cls.ARRAYS},
+                num_class=data["num_class"],
+                source_digest=data["source_digest"],
+            )
+
+    def _go_right(self, values, threshold, nodes):
+        """Split decisions with LightGBM's missing-value rules, for inputs containing NaN or zero-as-missing splits"""
+        nan = np.isnan(values)
+        missing_type = self.missing_type[nodes, None]
+        # Outside NaN-typed splits LightGBM scores a NaN as 0.0
+        values = np.where(nan & (missing_type != MISSING_NAN), 0.0, values)
+        missing = np.where(missing_type == MISSING_ZERO, np.abs(values) <= ZERO_THRESHOLD,
+                           nan & (missing_type == MISSING_NAN))
+        return np.where(missing, ~self.default_left[nodes, None], values > threshold)
+
+    def _leaf_index(self, X):
+        """Index of the leaf reached in every tree: (n_trees, n_rows)"""
+        columns = np.ascontiguousarray(X.T)
+        check_missing = self.has_zero_missing or np.isnan(columns).any()
+        ruled_out = np.zeros((self.n_trees, columns.shape[1]), dtype=self._mask_dtype)
+
+        for feature, threshold, left_leaves, nodes in self._groups:
+            values = columns.take(feature, axis=0)
+            go_right = self._go_right(values, threshold, nodes) if check_missing else values > threshold
+            trees = ruled_out[:len(feature)]
+            trees |= go_right * left_leaves
+
+        # Lowest clear bit of ruled_out, located through the float exponent of that power of two
+        exit_bit = ~ruled_out & (ruled_out + self._mask_dtype(1))
+        return (exit_bit.astype(np.float64).view(np.int64) >> 52) - 1023
+
+    def raw_score(self, X, chunk_rows=128):
+        X = np.asarray(X, dtype=np.float64)
+        scores = np.empty((len(X), self.num_class))
+        for start in range(0, len(X), chunk_rows):
+            leaves = self._leaf_index(X[start:start + chunk_rows])
+            values = self._flat_leaf_values.take(self._leaf_base + leaves)
+            scores[start:start + chunk_rows] = (self._class_matrix @ values).T
+        return scores
+
+    def predict_proba(self, X):
+        scores = self.raw_score(X)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+
+def export_model(model, model_path, output_path):
+    """Flatten a fitted LGBMClassifier saved at model_path and write it to output_path"""
+    ensemble = TreeEnsemble.from_booster(model.booster_, source_digest=file_digest(model_path))
+    ensemble.save(output_path)
+    return ensemble
+
+
+def export_checked(model, model_path, output_path, X, tolerance=1e-9):
+    """
+    export_model(), then score X (e.g. the held-out split) with the export and
+    with LightGBM. Returns (ensemble, max probability difference). Raises
+    ValueError, and removes the export so the backend keeps using LightGBM,
+    if they differ by more than tolerance.
+    """
+    ensemble = export_model(model, model_path, output_path)
+    X = np.asarray(X, dtype=np.float64)
+    max_diff = float(np.abs(ensemble.predict_proba(X) - model.predict_proba(X)).max())
+    if max_diff > tolerance:
+        os.remove(output_path)
+        raise ValueError(f"Tree export does not match LightGBM (max probability difference {max_diff:.2e})")
+    return ensemble, max_diff
+
+
+def load_for_model(export_path, model_path):
+    """Load an export only if it was made from the model file currently at model_path"""
+    ensemble = TreeEnsemble.load(export_path)
+    if ensemble.source_digest != file_digest(model_path):
+        raise ValueError("Tree export is out of date with the model file - re-run training")
+    return ensemble
@@ -8,6 +8,8 @@ import seaborn as sns
 import joblib
 import numpy as np
 
+from feature_engineering import load_merged_dataset
+
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 6)
@@ -36,16 +38,7 @@ print("✓ Saved: models/feature_importance.png")
 
 # 2. Load training data for distribution plot
 print("\n[2/3] Creating crowd level distribution plot...")
-bio_df = pd.read_csv("data/biometric data.csv")
-enrol_df = pd.read_csv("data/enrolnment data.csv")
-
-bio_df.columns = ["date", "state", "district", "pincode", "bio_age_5_17", "bio_age_18_plus"]
-enrol_df.columns = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_plus"]
-
-df = pd.merge(bio_df, enrol_df, on=["date", "state", "district", "pincode"], how="outer")
-df = df.fillna(0)
-
-df["total_biometric"] = df["bio_age_5_17"] + df["bio_age_18_plus"]
+df, data_info = load_merged_dataset()
 df["crowd_level"] = pd.qcut(df["total_biometric"], q=3, labels=["Low", "Medium", "High"], duplicates="drop")
 df = df.dropna(subset=["crowd_level"])
 
@@ -78,8 +71,8 @@ summary_text = f"""
 ╚══════════════════════════════════════════════════════════════╝
 
 📊 DATASET STATISTICS
-   • Biometric Records: {len(bio_df):,}
-   • Enrollment Records: {len(enrol_df):,}
+   • Biometric Records: {data_info['source_rows']['biometric']:,}
+   • Enrollment Records: {data_info['source_rows']['enrolment']:,}
    • Merged Records: {len(df):,}
    • Features: {len(feature_columns)}
 